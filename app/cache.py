@@ -0,0 +1,188 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+from .config import (
+    log,
+    USER_SYSTEM_ID,
+    API_KEY_CACHE_SIZE,
+    API_KEY_CACHE_TTL_SECONDS,
+    API_KEY_CACHE_NEGATIVE_TTL_SECONDS,
+    SYSTEM_SETTINGS_CHECK_SECONDS,
+)
+from .database import Database
+from . import queries
+from .models import SystemProperty
+
+MISSING = object()  # Returned by TTLCache.get() when the key is not cached (None is a valid cached value)
+
+
+class TTLCache:
+    """ Bounded in-memory cache (least recently used entries are evicted first) with expiring entries.
+
+        `None` values are cached too (negative caching), with their own time to live. """
+
+    def __init__(self, name:str, max_size:int, ttl:float, negative_ttl:float|None=None) -> None:
+        self.name = name
+        self._max_size = max(1, max_size)
+        self._ttl = ttl
+        self._negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._entries:OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, key:Hashable) -> Any:
+        """ Get a cached value, or MISSING """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISSING
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key:Hashable, value:Any) -> None:
+        ttl = self._negative_ttl if value is None else self._ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key:Hashable) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def invalidate_values(self, predicate:Callable[[Any], bool]) -> None:
+        """ Remove all the entries whose value matches the predicate """
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """ Current cache usage and counters """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "name": self.name,
+                "max_size": self._max_size,
+                "size": len(self._entries),
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                **self._stats,
+            }
+
+
+class SystemSettings:
+    """ In-memory copy of the system properties (properties of the system user).
+
+        All the properties are loaded at once. The copy is reloaded when the change counter
+        of the database (`rr_settings_version`, increased by triggers) differs from the loaded
+        one; the counter is checked at most once every `check_interval` seconds, so changes
+        made by other processes are seen within that delay. """
+
+    def __init__(self, check_interval:float=SYSTEM_SETTINGS_CHECK_SECONDS) -> None:
+        self._check_interval = check_interval
+        self._values:dict[str, str] = {}
+        self._version:int|None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "reads": 0,
+            "version_checks": 0,
+            "reloads": 0,
+            "errors": 0,
+        }
+
+    def get(self, key:SystemProperty) -> str | None:
+        """ Get a system property value by key """
+        self._refresh()
+        with self._lock:
+            self._stats["reads"] += 1
+            return self._values.get(key.value)
+
+    def get_bool(self, key:SystemProperty, default:bool=False) -> bool:
+        """ Get a TRUE/FALSE system property """
+        value = self.get(key)
+        if value is None:
+            return default
+        return value == "TRUE"
+
+    def get_int(self, key:SystemProperty, default:int) -> int:
+        """ Get a numeric system property """
+        value = self.get(key)
+        try:
+            return int(value) if value is not None else default
+        except ValueError:
+            log.warning("System property %s is not a number: %s", key.value, value)
+            return default
+
+    def invalidate(self) -> None:
+        """ Check the change counter again on the next read (after a write of this process) """
+        with self._lock:
+            self._checked_at = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": "system_settings",
+                "size": len(self._values),
+                "version": self._version,
+                **self._stats,
+            }
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self._check_interval:
+                return
+            self._checked_at = now
+            self._stats["version_checks"] += 1
+            db = Database()
+            try:
+                version = db.c.execute("SELECT version FROM rr_settings_version WHERE id = 1").fetchone()
+                version = version[0] if version else None
+                if version is not None and version == self._version:
+                    return
+                rows = db.c.execute(queries.USER_PROPERTIES, (USER_SYSTEM_ID,)).fetchall()
+                self._values = {key: value for key, value in rows}
+                self._version = version
+                self._stats["reloads"] += 1
+            except Exception as e:
+                # Keep serving the last known values and try again at the next check
+                log.error(f"Error loading system properties: {e}")
+                self._stats["errors"] += 1
+            finally:
+                db.close()
+
+
+system_settings = SystemSettings()
+
+# API key -> User (None for unknown keys)
+api_key_cache = TTLCache("api_keys", API_KEY_CACHE_SIZE, API_KEY_CACHE_TTL_SECONDS, API_KEY_CACHE_NEGATIVE_TTL_SECONDS)
+
+
+def cache_stats() -> list[dict]:
+    """ Stats of every cache in use """
+    return [api_key_cache.stats(), system_settings.stats()]
@@ -8,6 +8,8 @@ APP_NAME = os.environ.get('RR_APP_NAME') or "Round Review"
 USER_ADMIN_NAME = os.environ.get('RR_ADMIN_NAME') or "admin"
 USER_ADMIN_EMAIL = os.environ.get('RR_ADMIN_EMAIL') or "admin@system.com"
 USER_DEFAULT_PASSWORD = os.environ.get('RR_DEFAULT_USER_PASSWORD') or secrets.token_hex(16)
+SECRET_KEY = os.environ.get('RR_SECRET_KEY') or secrets.token_hex(32)
+BASE_URL = (os.environ.get('RR_BASE_URL') or "").rstrip("/")
 
 GITHUB_OAUTH_ENABLED = os.environ.get('GITHUB_OAUTH_ENABLED') is not None or False
 GITHUB_OAUTH_CLIENT_ID = os.environ.get('GITHUB_OAUTH_CLIENT_ID') or None
@@ -16,6 +18,35 @@ GITHUB_OAUTH_ACCESS_TOKEN_URL = os.environ.get('GITHUB_OAUTH_ACCESS_TOKEN_URL')
 GITHUB_OAUTH_AUTHORIZE_URL = os.environ.get('GITHUB_OAUTH_AUTHORIZE_URL') or 'https://github.com/login/oauth/authorize'
 GITHUB_OAUTH_API_BASE_URL = os.environ.get('GITHUB_OAUTH_API_BASE_URL') or 'https://api.github.com/'
 
+SERVER_THREADS = int(os.environ.get('RR_SERVER_THREADS') or 4)
+DB_POOL_SIZE = int(os.environ.get('RR_DB_POOL_SIZE') or SERVER_THREADS + 4)
+DB_POOL_TIMEOUT_SECONDS = float(os.environ.get('RR_DB_POOL_TIMEOUT_SECONDS') or 10)
+DB_POOL_HEALTH_CHECK_SECONDS = int(os.environ.get('RR_DB_POOL_HEALTH_CHECK_SECONDS') or 30)
+DB_JOURNAL_MODE = (os.environ.get('RR_DB_JOURNAL_MODE') or "WAL").upper()
+DB_SYNCHRONOUS = (os.environ.get('RR_DB_SYNCHRONOUS') or "NORMAL").upper()
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('RR_DB_BUSY_TIMEOUT_MS') or 5000)
+DB_MMAP_SIZE = int(os.environ.get('RR_DB_MMAP_SIZE') or 268435456)  # Bytes (256 MB)
+DB_CACHE_SIZE = int(os.environ.get('RR_DB_CACHE_SIZE') or -16000)  # Pages if positive, KiB if negative (16 MB)
+DB_TEMP_STORE = (os.environ.get('RR_DB_TEMP_STORE') or "MEMORY").upper()
+DB_MAINTENANCE_INTERVAL_MINUTES = int(os.environ.get('RR_DB_MAINTENANCE_INTERVAL_MINUTES') or 60)
+STORAGE_BACKEND = os.environ.get('RR_STORAGE_BACKEND') or "filesystem"
+STORAGE_PATH = os.environ.get('RR_STORAGE_PATH') or "database/objects"
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('RR_CHANGE_LOG_RETENTION_DAYS') or 30)
+API_KEY_CACHE_SIZE = int(os.environ.get('RR_API_KEY_CACHE_SIZE') or 1024)
+API_KEY_CACHE_TTL_SECONDS = int(os.environ.get('RR_API_KEY_CACHE_TTL_SECONDS') or 300)
+API_KEY_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get('RR_API_KEY_CACHE_NEGATIVE_TTL_SECONDS') or 30)
+SYSTEM_SETTINGS_CHECK_SECONDS = float(os.environ.get('RR_SYSTEM_SETTINGS_CHECK_SECONDS') or 5)
+EVENTS_MAX_CLIENTS = int(os.environ.get('RR_EVENTS_MAX_CLIENTS') or 32)  # Served by their own threads (see main.py)
+EVENTS_MAX_DURATION_SECONDS = int(os.environ.get('RR_EVENTS_MAX_DURATION_SECONDS') or 300)
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('RR_HTTP_CONNECT_TIMEOUT_SECONDS') or 5)
+HTTP_READ_TIMEOUT_SECONDS = float(os.environ.get('RR_HTTP_READ_TIMEOUT_SECONDS') or 10)
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('RR_HTTP_MAX_CONNECTIONS_PER_HOST') or 10)
+WEBHOOK_WORKERS = int(os.environ.get('RR_WEBHOOK_WORKERS') or 8)
+WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get('RR_WEBHOOK_TIMEOUT_SECONDS') or 10)
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('RR_WEBHOOK_MAX_ATTEMPTS') or 8)
+WEBHOOK_RETENTION_DAYS = int(os.environ.get('RR_WEBHOOK_RETENTION_DAYS') or 7)
+WEBHOOK_CONTENT_URL_TTL_SECONDS = int(os.environ.get('RR_WEBHOOK_CONTENT_URL_TTL_SECONDS') or 900)
+
 
 # ------ Defaults ------ 
 VERSION = "0.2.1"
@@ -23,6 +54,29 @@ USER_SYSTEM_ID = 1
 USER_SYSTEM_NAME = "_SYSTEM"
 USER_SYSTEM_EMAIL = "system@local"
 SYSTEM_MAX_UPLOAD_SIZE_MB = 2  # Default max upload size for objects in Megabytes
+SYSTEM_WEBHOOK_COALESCE_SECONDS = 0  # Default coalescing window of the status change webhooks (0 = disabled)
+PROJECT_RECENT_OBJECTS_LIMIT = 5  # Documents in the "Recent documents" widgets of a project
+OBJECTS_PAGE_SIZE = 100  # Objects per page of the objects listing API (default of "limit")
+OBJECTS_PAGE_MAX_SIZE = 1000  # Max value of "limit" in the objects listing API
+CHANGES_PAGE_SIZE = 500  # Changes per batch of the changes feed API (default of "limit")
+CHANGES_PAGE_MAX_SIZE = 1000  # Max value of "limit" in the changes feed API
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024  # Request bytes allowed on top of the max upload size (multipart boundaries and fields)
+DB_POOL_RETRY_AFTER_SECONDS = 5  # Retry-After of the 503 replies when no database connection is available in time
+STORAGE_MIGRATION_BATCH_SIZE = 20  # Objects moved from the database to the blob store per transaction
+STORAGE_GC_GRACE_SECONDS = 3600  # Unreferenced blobs younger than this are kept (uploads in progress)
+EVENTS_QUEUE_SIZE = 100  # Live events waiting to be sent to a client, a slower client has to resync
+EVENTS_REPLAY_SIZE = 1000  # Last live events kept for the clients reconnecting with Last-Event-ID
+EVENTS_HEARTBEAT_SECONDS = 5  # Keep-alive comment sent on idle live events streams (a closed connection is noticed by waitress only on a write)
+EVENTS_RETRY_MS = 3000  # Reconnection delay of the browsers after a live events stream is closed
+HTTP_POOL_HOSTS = 32  # Hosts with a pool of keep-alive connections in the outbound HTTP client (least recently used are closed)
+HTTP_LATENCY_EWMA_ALPHA = 0.2  # Weight of the last request in the average latency of the outbound HTTP client
+WEBHOOK_BACKOFF_BASE_SECONDS = 10  # Delay before the first retry of a webhook, doubled at every attempt
+WEBHOOK_BACKOFF_MAX_SECONDS = 3600  # Max delay between two attempts of a webhook
+WEBHOOK_DISPATCH_INTERVAL_SECONDS = 5  # Interval of the check for webhooks to retry (new ones are sent right away)
+WEBHOOK_DEFAULT_EVENTS = ["object.updated"]  # Events sent to the webhook of a user without an events filter
+WEBHOOK_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failed deliveries to an endpoint that pause all its deliveries (circuit open)
+WEBHOOK_CIRCUIT_OPEN_SECONDS = 60  # Pause before a probe delivery to a failing endpoint, doubled at every failed probe (up to WEBHOOK_BACKOFF_MAX_SECONDS)
+WEBHOOK_HEALTH_EWMA_ALPHA = 0.2  # Weight of the last delivery in the success rate and latency of an endpoint
 
 # ------ Others ------ 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level=logging.DEBUG if DEBUG else logging.INFO, datefmt="%Y-%m-%d %H:%M:%S")
@@ -2,25 +2,88 @@ import hashlib
 import random
 import datetime
 import re
+import time
 from pathlib import Path
-from sqlite3 import connect, Cursor, Error
+from sqlite3 import Connection, Cursor, Error
+from . import queries
+from .pool import get_pool
+from .storage import blob_store
+from .folders import rebuild_folders
 from .config import (
     log, 
+    DEBUG,
+    DB_JOURNAL_MODE,
+    DB_SYNCHRONOUS,
+    DB_BUSY_TIMEOUT_MS,
+    DB_MMAP_SIZE,
+    DB_CACHE_SIZE,
+    DB_TEMP_STORE,
     USER_SYSTEM_ID,
     USER_SYSTEM_NAME,
     USER_SYSTEM_EMAIL,
     USER_ADMIN_NAME,
     USER_ADMIN_EMAIL,
     USER_DEFAULT_PASSWORD,
-    SYSTEM_MAX_UPLOAD_SIZE_MB
+    SYSTEM_MAX_UPLOAD_SIZE_MB,
+    SYSTEM_WEBHOOK_COALESCE_SECONDS,
+    STORAGE_MIGRATION_BATCH_SIZE,
+    STORAGE_GC_GRACE_SECONDS,
+    CHANGE_LOG_RETENTION_DAYS,
+    WEBHOOK_RETENTION_DAYS,
 )
 
 class Database:
+    """ Connection to the database, leased from the pool of its file (see pool.ConnectionPool).
+
+        A `Database()` opened while another one is open in the same thread (e.g. by a helper called
+        from a route) shares its connection, and so its transaction: a `commit()` of either one commits
+        the changes of both. Pass the open instance (or its cursor) to the helpers that must write in the
+        transaction of the caller, as `enqueue_webhook` does. """
+
+    JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+    SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+    TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+
+    # Queries of the routes hot paths that must be resolved with an index (see check_query_plans)
+    INDEXED_QUERIES = [
+        ("project membership", queries.PROJECT_MEMBER_ROLE),
+        ("projects of a user", queries.USER_PROJECTS),
+        ("project of a user", queries.USER_PROJECT),
+        ("project with role of a user", queries.USER_PROJECT_WITH_ROLE),
+        ("users of a project", queries.PROJECT_USERS),
+        ("user from api key", queries.USER_BY_API_KEY),
+        ("user properties", queries.USER_PROPERTIES),
+        ("project webhooks", queries.project_webhooks_query(keys=5)),
+        ("object", queries.OBJECT),
+        ("object of a project", queries.PROJECT_OBJECT),
+        ("status of an object of a project", queries.PROJECT_OBJECT_STATUS),
+        ("objects by content digest", queries.OBJECT_BY_CONTENT_DIGEST),
+        ("recent objects of a project", queries.RECENT_OBJECTS),
+        ("page of objects by update date", queries.objects_page_query(["id", "update_date", "name"], ["project_id = ?", "status IS NOT NULL", "(update_date, id) < (?, ?)"], "update_date", descending=True)),
+        ("page of objects by name", queries.objects_page_query(["id", "name", "update_date"], ["project_id = ?", "status IS NOT NULL", "(name, id) > (?, ?)"], "name", descending=False)),
+        ("folder of a project", queries.FOLDER),
+        ("subfolders of a folder", queries.SUBFOLDERS),
+        ("objects of a folder", queries.FOLDER_OBJECTS),
+        ("reviews of an object", queries.OBJECT_REVIEWS),
+        ("review of an object by user", queries.USER_OBJECT_REVIEW),
+        ("reviews of a user", queries.USER_REVIEWS),
+        ("comment of an object", queries.COMMENT),
+        ("comments of an object", queries.object_comments_query(page=False)),
+        ("comments of an object page", queries.object_comments_query(page=True)),
+        ("changes for a user", queries.USER_CHANGES),
+        ("webhook delivery to coalesce", queries.WEBHOOK_DELIVERY_TO_COALESCE),
+        ("due webhook deliveries", queries.DUE_WEBHOOK_DELIVERIES),
+        ("webhook endpoints to probe", queries.WEBHOOK_ENDPOINTS_TO_PROBE),
+        ("due webhook delivery of an endpoint", queries.DUE_WEBHOOK_ENDPOINT_DELIVERY),
+        ("webhook endpoint", queries.WEBHOOK_ENDPOINT),
+        ("logs of a user", queries.logs_query(action=False, user_id=True)),
+    ]
 
     def __init__(self, file_path:str="database/roundreview.db") -> None:
         self._file_path = file_path
+        self._pool = get_pool(self._file_path, on_connect=Database.configure)
         try:
-            self._client = connect(self._file_path)
+            self._client = self._pool.acquire()
         except Error as error:
             log.fatal(f"Unable to connect to DB: {error}")
             exit(1)
@@ -49,8 +112,24 @@ class Database:
         else: 
             log.info("Admin user: at least one already created!")
 
+        self.__migrate_object_blobs()
+        self.__build_folders()
+
+        log.info("Database storage profile: %s", ", ".join(f"{k}={v}" for k, v in self.storage_profile().items()))
+
+        if self.check_query_plans():
+            log.info("Database: all hot queries are resolved with indexes")
+        elif DEBUG:
+            log.fatal("Database: some hot queries fall back to a full table scan. Please check the logs.")
+            exit(1)
+
     def close(self) -> None:
-        self._client.close()
+        """ Give the connection back to the pool """
+        if self._client is None:
+            return
+        self._cursor.close()
+        self._pool.release(self._client)
+        self._client = None
 
     @property
     def c(self) -> Cursor:
@@ -59,6 +138,115 @@ class Database:
     def commit(self) -> None:
         return self._client.commit()
 
+    @staticmethod
+    def configure(connection:Connection) -> None:
+        """ Apply the storage profile (see config) to a new connection """
+        journal_mode = DB_JOURNAL_MODE if DB_JOURNAL_MODE in Database.JOURNAL_MODES else "WAL"
+        synchronous = DB_SYNCHRONOUS if DB_SYNCHRONOUS in Database.SYNCHRONOUS_LEVELS else "NORMAL"
+        temp_store = DB_TEMP_STORE if DB_TEMP_STORE in Database.TEMP_STORES else "MEMORY"
+        connection.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)};")
+        connection.execute(f"PRAGMA journal_mode = {journal_mode};")
+        connection.execute(f"PRAGMA synchronous = {synchronous};")
+        connection.execute(f"PRAGMA mmap_size = {int(DB_MMAP_SIZE)};")
+        connection.execute(f"PRAGMA cache_size = {int(DB_CACHE_SIZE)};")
+        connection.execute(f"PRAGMA temp_store = {temp_store};")
+
+    def storage_profile(self) -> dict:
+        """ Effective storage settings of the connection in use """
+        profile = {}
+        for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store"):
+            row = self.c.execute(f"PRAGMA {pragma};").fetchone()
+            profile[pragma] = row[0] if row else None
+        # Numeric levels are returned by SQLite, map them back to their names
+        profile["synchronous"] = Database.SYNCHRONOUS_LEVELS[profile["synchronous"]] if isinstance(profile["synchronous"], int) else profile["synchronous"]
+        profile["temp_store"] = Database.TEMP_STORES[profile["temp_store"]] if isinstance(profile["temp_store"], int) else profile["temp_store"]
+        return profile
+
+    def check_query_plans(self) -> bool:
+        """ Check with EXPLAIN QUERY PLAN that no hot query falls back to a full table scan
+            and that top-N queries (ORDER BY ... LIMIT) read the rows already sorted by an index """
+        valid = True
+        for name, sql in Database.INDEXED_QUERIES:
+            try:
+                plan = self.c.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?")).fetchall()
+            except Error as e:
+                log.warning("Database query plan: unable to explain '%s': %s", name, e)
+                valid = False
+                continue
+            scans = [row[3] for row in plan if re.match(r"^SCAN (?!CONSTANT ROW)", row[3])]
+            if "ORDER BY" in sql and "LIMIT" in sql:
+                scans += [row[3] for row in plan if row[3].startswith("USE TEMP B-TREE FOR ORDER BY")]
+            if scans:
+                log.warning("Database query plan: '%s' falls back to a full scan (%s)", name, "; ".join(scans))
+                valid = False
+        return valid
+
+    @staticmethod
+    def maintenance() -> None:
+        """ Periodic maintenance: refresh planner statistics and checkpoint the WAL file """
+        db = Database()
+        try:
+            db.c.execute("PRAGMA optimize;")
+            busy, wal_pages, checkpointed = db.c.execute("PRAGMA wal_checkpoint(PASSIVE);").fetchone()
+            log.info("Database maintenance: optimize done, wal checkpoint (busy=%s, wal_pages=%s, checkpointed=%s)", busy, wal_pages, checkpointed)
+        except Error as e:
+            log.error("Database maintenance failed: %s", e)
+        finally:
+            db.close()
+
+    @staticmethod
+    def collect_blob_garbage() -> None:
+        """ Delete the stored contents no longer referenced by any object """
+        db = Database()
+        deleted = 0
+        try:
+            threshold = time.time() - STORAGE_GC_GRACE_SECONDS
+            for digest, mtime in blob_store.list():
+                if mtime > threshold:
+                    continue
+                if db.c.execute(queries.OBJECT_BY_CONTENT_DIGEST, (digest,)).fetchone() is None:
+                    blob_store.delete(digest)
+                    deleted += 1
+            log.info("Storage garbage collection: %s unreferenced contents deleted", deleted)
+        except Exception as e:
+            log.error("Storage garbage collection failed: %s", e)
+        finally:
+            db.close()
+
+    @staticmethod
+    def purge_change_log() -> None:
+        """ Delete the changes older than the retention window, remembering the last token deleted """
+        db = Database()
+        try:
+            last_id = db.c.execute(
+                "SELECT MAX(id) FROM change_log WHERE created_at < datetime('now', ?)", (f"-{CHANGE_LOG_RETENTION_DAYS} days",)
+            ).fetchone()[0]
+            if last_id is not None:
+                db.c.execute("DELETE FROM change_log WHERE id <= ?", (last_id,))
+                db.c.execute("UPDATE rr_change_log_state SET purged_until = MAX(purged_until, ?) WHERE id = 1", (last_id,))
+                db.commit()
+            log.info("Change log retention: changes purged until token %s", last_id)
+        except Error as e:
+            log.error("Change log retention failed: %s", e)
+        finally:
+            db.close()
+
+    @staticmethod
+    def purge_webhook_deliveries() -> None:
+        """ Delete the delivered and dead webhooks older than the retention window """
+        db = Database()
+        try:
+            deleted = db.c.execute(
+                "DELETE FROM webhook_delivery WHERE status IN ('delivered', 'dead') AND updated_at < datetime('now', ?)",
+                (f"-{WEBHOOK_RETENTION_DAYS} days",)
+            ).rowcount
+            db.commit()
+            log.info("Webhook deliveries retention: %s deliveries purged", deleted)
+        except Error as e:
+            log.error("Webhook deliveries retention failed: %s", e)
+        finally:
+            db.close()
+
     @staticmethod
     def hash(password:str) -> str:
         """ Hashing function """
@@ -94,7 +282,8 @@ class Database:
             ("OBJECT_DELETE_DISABLED", "FALSE"),
             ("USER_LOGIN_DISABLED", "FALSE"),
             ("OBJECT_MAX_UPLOAD_SIZE_MB", SYSTEM_MAX_UPLOAD_SIZE_MB),
-            ("WEBHOOKS_DISABLED", "FALSE")
+            ("WEBHOOKS_DISABLED", "FALSE"),
+            ("WEBHOOK_COALESCE_SECONDS", SYSTEM_WEBHOOK_COALESCE_SECONDS),
         ]
         existing_props = {row[0] for row in self.c.execute("SELECT key FROM user_property WHERE user_id = ?;", (USER_SYSTEM_ID,)).fetchall()}
         props_to_add = [(k, v, USER_SYSTEM_ID) for k, v in expected_props if k not in existing_props]
@@ -106,6 +295,44 @@ class Database:
         else:
             log.info("System properties: all required properties already created!")
 
+    def __build_folders(self) -> None:
+        """ Fill the folders table from the objects (first start after the folders were introduced) """
+        if self.c.execute("SELECT 1 FROM folder LIMIT 1").fetchone() is not None:
+            return
+        if self.c.execute("SELECT 1 FROM object LIMIT 1").fetchone() is None:
+            return
+        log.warning("Database: building the folders of the projects from the objects...")
+        folders = rebuild_folders(self.c)
+        self.commit()
+        log.info("Database: %s folders built", folders)
+
+    def __migrate_object_blobs(self) -> None:
+        """ Move the contents still saved in object.raw to the blob store (resumable, in batches) """
+        remaining = self.c.execute("SELECT COUNT(*) FROM object WHERE raw IS NOT NULL").fetchone()[0]
+        if remaining == 0:
+            return
+        log.warning("Storage: moving %s object contents from the database to the blob store...", remaining)
+        moved = 0
+        while True:
+            rows = self.c.execute(
+                "SELECT rowid, id FROM object WHERE raw IS NOT NULL LIMIT ?", (STORAGE_MIGRATION_BATCH_SIZE,)
+            ).fetchall()
+            if not rows:
+                break
+            for rowid, object_id in rows:
+                # Stream the blob, so that only one chunk at a time is held in memory
+                with self._client.blobopen("object", "raw", rowid, readonly=True) as blob:
+                    digest, size = blob_store.put(blob)
+                self.c.execute(
+                    "UPDATE object SET raw_hash = ?, raw_size = ?, raw = NULL WHERE id = ?",
+                    (digest, size, object_id)
+                )
+            self.commit()
+            moved += len(rows)
+            log.info("Storage: moved %s/%s object contents", moved, remaining)
+        self.log(USER_SYSTEM_ID, f"storage migration (objects={moved})")
+        log.warning("Storage: migration completed. Run VACUUM on the database to reclaim the free space.")
+
     def __create_user_admin(self) -> None:
         self.c.execute(
             'INSERT INTO user (name, email, password, admin) VALUES (?, ?, ?, ?);', 
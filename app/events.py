@@ -0,0 +1,195 @@
+import json
+import time
+import queue
+import threading
+from enum import Enum
+from collections import deque
+from typing import Iterator
+from .config import (
+    log,
+    EVENTS_MAX_CLIENTS,
+    EVENTS_QUEUE_SIZE,
+    EVENTS_REPLAY_SIZE,
+    EVENTS_HEARTBEAT_SECONDS,
+    EVENTS_MAX_DURATION_SECONDS,
+    EVENTS_RETRY_MS,
+)
+
+
+class EventType(Enum):
+    """ Types of the events of the objects, sent to the live clients and to the webhooks """
+    OBJECT_CREATED = "object.created"
+    OBJECT_UPDATED = "object.updated"
+    OBJECT_DELETED = "object.deleted"
+    REVIEW_CREATED = "review.created"
+    REVIEW_DELETED = "review.deleted"
+    COMMENT_CREATED = "comment.created"
+    COMMENT_UPDATED = "comment.updated"
+    COMMENT_DELETED = "comment.deleted"
+
+    @staticmethod
+    def values() -> list:
+        return list(map(lambda t: t.value, EventType))
+
+
+class EventSubscription:
+    """ Events of some topics (("object", id) or ("project", id)) waiting to be sent to one client """
+
+    def __init__(self, topics:set[tuple[str, str]], queue_size:int) -> None:
+        self.topics = frozenset(topics)
+        self.lagged = False  # Events were dropped because the client was too slow, it must resync
+        self._queue:queue.Queue[dict] = queue.Queue(maxsize=max(1, queue_size))
+
+    def matches(self, event:dict) -> bool:
+        return ("object", event["object_id"]) in self.topics or ("project", event["project_id"]) in self.topics
+
+    def put(self, event:dict) -> bool:
+        """ Queue an event without blocking the publisher, False if the queue is full """
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.lagged = True
+            return False
+
+    def get(self, timeout:float) -> dict | None:
+        """ Next event, None if nothing happened within the timeout """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def clear(self) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class EventBroker:
+    """ In-process publish/subscribe of the live events of objects and projects (shared by all the server threads).
+
+        Every client has a bounded queue: a slow client loses its events and gets a `resync` event instead
+        of slowing down the publishers. The last events are kept to be replayed to reconnecting clients
+        (`Last-Event-ID`), the ids start from the boot time so they keep growing across restarts. """
+
+    def __init__(self, max_clients:int=EVENTS_MAX_CLIENTS, queue_size:int=EVENTS_QUEUE_SIZE,
+                 replay_size:int=EVENTS_REPLAY_SIZE) -> None:
+        self._max_clients = max(1, max_clients)
+        self._queue_size = queue_size
+        self._subscriptions:dict[tuple[str, str], set[EventSubscription]] = {}
+        self._clients = 0
+        self._last_id = time.time_ns() // 1000
+        self._replay:deque[dict] = deque(maxlen=max(1, replay_size))
+        self._lock = threading.Lock()
+        self._stats = {
+            "published": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "replayed": 0,
+            "rejected": 0,
+        }
+
+    def publish(self, event_type:str, project_id, object_id, data:dict|None=None) -> None:
+        """ Send an event to the clients of the object and of its project (call it after the commit) """
+        with self._lock:
+            self._last_id += 1
+            event = {
+                "id": self._last_id,
+                "type": event_type,
+                "project_id": str(project_id),
+                "object_id": str(object_id) if object_id is not None else None,
+                "data": data or {},
+            }
+            self._replay.append(event)
+            self._stats["published"] += 1
+            targets = self._subscriptions.get(("object", event["object_id"]), set()) | self._subscriptions.get(("project", event["project_id"]), set())
+            for subscription in targets:
+                if subscription.put(event):
+                    self._stats["delivered"] += 1
+                else:
+                    self._stats["dropped"] += 1
+
+    def subscribe(self, topics:set[tuple[str, str]], last_event_id:int|None=None) -> EventSubscription | None:
+        """ Register a client, None if there are already too many clients.
+            The events after `last_event_id` are queued again, or a resync is asked if they are not available anymore """
+        subscription = EventSubscription({(kind, str(key)) for kind, key in topics}, self._queue_size)
+        with self._lock:
+            if self._clients >= self._max_clients:
+                self._stats["rejected"] += 1
+                return None
+            self._clients += 1
+            for topic in subscription.topics:
+                self._subscriptions.setdefault(topic, set()).add(subscription)
+            if last_event_id is not None and last_event_id != self._last_id:
+                if last_event_id > self._last_id or not self._replay or last_event_id < self._replay[0]["id"] - 1:
+                    subscription.lagged = True
+                else:
+                    for event in self._replay:
+                        if event["id"] > last_event_id and subscription.matches(event) and subscription.put(event):
+                            self._stats["replayed"] += 1
+        return subscription
+
+    def unsubscribe(self, subscription:EventSubscription) -> None:
+        with self._lock:
+            removed = False
+            for topic in subscription.topics:
+                subscribers = self._subscriptions.get(topic)
+                if subscribers is not None and subscription in subscribers:
+                    subscribers.discard(subscription)
+                    removed = True
+                    if not subscribers:
+                        del self._subscriptions[topic]
+            if removed:
+                self._clients -= 1
+
+    def stats(self) -> dict:
+        """ Current clients and counters """
+        with self._lock:
+            return {
+                "max_clients": self._max_clients,
+                "clients": self._clients,
+                "topics": len(self._subscriptions),
+                "last_id": self._last_id,
+                **self._stats,
+            }
+
+
+def format_event(event:dict) -> str:
+    """ Event in the text/event-stream format """
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+def stream_events(broker:EventBroker, subscription:EventSubscription,
+                  heartbeat:float=EVENTS_HEARTBEAT_SECONDS, max_duration:float=EVENTS_MAX_DURATION_SECONDS) -> Iterator[str]:
+    """ Send the events of a subscription until the client goes away or the max duration is reached
+        (the browser reconnects by itself with Last-Event-ID, so a server thread is never held forever).
+        The heartbeat comments keep proxies from closing the connection and detect the clients gone away. """
+    deadline = time.monotonic() + max_duration
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n: connected\n\n"
+        while True:
+            if subscription.lagged:
+                subscription.lagged = False
+                subscription.clear()
+                yield "event: resync\ndata: {}\n\n"
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = subscription.get(min(heartbeat, remaining))
+            yield format_event(event) if event is not None else ": heartbeat\n\n"
+    except GeneratorExit:
+        pass
+    except Exception as e:
+        log.error(f"Error in the events stream: {e}")
+    finally:
+        broker.unsubscribe(subscription)
+
+
+event_broker = EventBroker()
+
+
+def publish_event(event_type:EventType, project_id, object_id, data:dict|None=None) -> None:
+    """ Publish a live event of an object (or of a project if object_id is None) """
+    event_broker.publish(event_type.value, project_id, object_id, data)
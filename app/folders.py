@@ -0,0 +1,83 @@
+from sqlite3 import Cursor
+
+# Folders of the projects are materialized in the "folder" table from the paths of the objects.
+# The counts are kept up to date by the writers of objects (create, update of the path, delete).
+
+ROOT_PATH = "/"
+
+
+def folder_path(path:str | None) -> str:
+    """ Normalized path of a folder ("/" for the root, "/a/b" without empty or trailing parts) """
+    return ROOT_PATH + "/".join(part for part in (path or "").split("/") if part)
+
+
+def folder_chain(path:str) -> list[str]:
+    """ Paths of the folder and of its ancestors, starting from the root """
+    parts = [part for part in path.split("/") if part]
+    return [ROOT_PATH] + [ROOT_PATH + "/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def folder_name(path:str) -> str:
+    """ Last part of the path of a folder (empty for the root) """
+    return path.rsplit("/", 1)[-1]
+
+
+def update_folder_counts(c:Cursor, project_id, path:str, delta:int) -> None:
+    """ Add (delta > 0) or remove (delta < 0) objects in a folder, creating or dropping the folders on the way """
+    chain = folder_chain(folder_path(path))
+    for i, current in enumerate(chain):
+        direct = delta if i == len(chain) - 1 else 0
+        c.execute(
+            "UPDATE folder SET object_count = object_count + ?, total_count = total_count + ? WHERE project_id = ? AND path = ?",
+            (direct, delta, project_id, current)
+        )
+        if c.rowcount == 0 and delta > 0:
+            parent = chain[i - 1] if i > 0 else None
+            c.execute(
+                "INSERT INTO folder (project_id, path, parent, name, object_count, folder_count, total_count) VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (project_id, current, parent, folder_name(current), direct, delta)
+            )
+            if parent is not None:
+                c.execute("UPDATE folder SET folder_count = folder_count + 1 WHERE project_id = ? AND path = ?", (project_id, parent))
+
+    if delta < 0:
+        # Drop the folders left empty, from the deepest one (the root is kept)
+        for i in range(len(chain) - 1, 0, -1):
+            c.execute("DELETE FROM folder WHERE project_id = ? AND path = ? AND total_count <= 0", (project_id, chain[i]))
+            if c.rowcount == 0:
+                break
+            c.execute("UPDATE folder SET folder_count = folder_count - 1 WHERE project_id = ? AND path = ?", (project_id, chain[i - 1]))
+
+
+def rebuild_folders(c:Cursor, project_id=None) -> int:
+    """ Rebuild the folders (of a project or of all of them) from the objects, return the number of folders """
+    where, params = ("WHERE project_id = ?", (project_id,)) if project_id is not None else ("", ())
+
+    # Normalize the stored paths first, the folders are matched on them
+    rows = c.execute(f"SELECT DISTINCT project_id, path FROM object {where}", params).fetchall()
+    for row_project_id, path in rows:
+        if path != folder_path(path):
+            c.execute("UPDATE object SET path = ? WHERE project_id = ? AND path = ?", (folder_path(path), row_project_id, path))
+
+    folders = {}
+    rows = c.execute(f"SELECT project_id, path, COUNT(*) FROM object {where} GROUP BY project_id, path", params).fetchall()
+    for row_project_id, path, count in rows:
+        chain = folder_chain(path)
+        for i, current in enumerate(chain):
+            key = (row_project_id, current)
+            if key not in folders:
+                folders[key] = [0, 0, 0]
+                if i > 0:
+                    folders[(row_project_id, chain[i - 1])][1] += 1
+            folders[key][2] += count
+        folders[(row_project_id, chain[-1])][0] += count
+
+    c.execute(f"DELETE FROM folder {where}", params)
+    c.executemany(
+        "INSERT INTO folder (project_id, path, parent, name, object_count, folder_count, total_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (key[0], key[1], None if key[1] == ROOT_PATH else folder_path(key[1].rsplit("/", 1)[0]), folder_name(key[1]), *counts)
+            for key, counts in folders.items()
+        ]
+    )
+    return len(folders)
@@ -0,0 +1,122 @@
+import time
+import threading
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .config import (
+    VERSION,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_READ_TIMEOUT_SECONDS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_POOL_HOSTS,
+    HTTP_LATENCY_EWMA_ALPHA,
+)
+
+
+class _PoolAdapter(HTTPAdapter):
+    """ HTTPAdapter telling the client when a new connection is opened (to measure the reuse of the pooled ones) """
+
+    def __init__(self, on_new_connection, **kwargs) -> None:
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        on_new_connection = self._on_new_connection
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                on_new_connection()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                on_new_connection()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+
+class HttpClient:
+    """ Outbound HTTP client shared by the whole application (webhooks, URL checks).
+
+        Connections are kept alive in a pool per host (up to `max_connections_per_host`, extra requests
+        to the same host wait for a free connection) and every request has a connect and read timeout.
+        Cookies are never stored: the receivers are unrelated to each other. """
+
+    def __init__(self, connect_timeout:float=HTTP_CONNECT_TIMEOUT_SECONDS, read_timeout:float=HTTP_READ_TIMEOUT_SECONDS,
+                 max_connections_per_host:int=HTTP_MAX_CONNECTIONS_PER_HOST, pool_hosts:int=HTTP_POOL_HOSTS) -> None:
+        self._timeout = (connect_timeout, read_timeout)
+        self._max_connections_per_host = max(1, max_connections_per_host)
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = f"RoundReview/{VERSION}"
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _PoolAdapter(
+            self._count_connection,
+            pool_connections=max(1, pool_hosts),
+            pool_maxsize=self._max_connections_per_host,
+            pool_block=True,
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency_ewma_ms:float|None = None
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "connections": 0,
+        }
+
+    def request(self, method:str, url:str, timeout:float|tuple[float, float]|None=None, **kwargs) -> requests.Response:
+        """ Send a request (as `requests.request`), the timeout is (connect, read) or one value for both """
+        if timeout is None:
+            timeout = self._timeout
+        with self._lock:
+            self._in_flight += 1
+        started = time.monotonic()
+        try:
+            return self._session.request(method, url, timeout=timeout, **kwargs)
+        except RequestException:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._lock:
+                self._in_flight -= 1
+                self._stats["requests"] += 1
+                if self._latency_ewma_ms is None:
+                    self._latency_ewma_ms = elapsed_ms
+                else:
+                    self._latency_ewma_ms += HTTP_LATENCY_EWMA_ALPHA * (elapsed_ms - self._latency_ewma_ms)
+
+    def post(self, url:str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url:str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def get(self, url:str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> dict:
+        """ Requests in progress, counters, reuse of the connections and latency """
+        with self._lock:
+            requests_count = self._stats["requests"]
+            return {
+                "max_connections_per_host": self._max_connections_per_host,
+                "in_flight": self._in_flight,
+                "reuse_ratio": round(max(0, requests_count - self._stats["connections"]) / requests_count, 3) if requests_count else None,
+                "latency_ewma_ms": round(self._latency_ewma_ms, 1) if self._latency_ewma_ms is not None else None,
+                **self._stats,
+            }
+
+    def _count_connection(self) -> None:
+        with self._lock:
+            self._stats["connections"] += 1
+
+
+http_client = HttpClient()
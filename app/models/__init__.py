@@ -6,3 +6,7 @@ from .role import Role
 from .user import User, Property, LoginProvider
 from .system_property import SystemProperty, SystemPropertyInfo
 from .review import Review
+from .folder import Folder
+from .change import Change
+from .comment import Comment
+from .webhook_endpoint import WebhookEndpoint
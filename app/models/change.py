@@ -0,0 +1,38 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class Change:
+    """ Change model (entry of the change log, the id is the sync token) """
+    id: int
+    project_id: Optional[int]
+    entity: str
+    entity_id: str
+    object_id: Optional[str]
+    action: str
+    created_at: str
+
+    @classmethod
+    def from_db_row(cls, db_row: tuple) -> "Change":
+        if len(db_row) != 7:
+            raise ValueError("Unable to unserialize db row into a Change instance")
+        return cls(
+            id=db_row[0],
+            project_id=db_row[1],
+            entity=db_row[2],
+            entity_id=db_row[3],
+            object_id=db_row[4],
+            action=db_row[5],
+            created_at=db_row[6],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "token": self.id,
+            "project_id": self.project_id,
+            "entity": self.entity,
+            "entity_id": self.entity_id,
+            "object_id": self.object_id,
+            "action": self.action,
+            "created_at": self.created_at,
+        }
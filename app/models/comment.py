@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class Comment:
+    """ Inline comment of an object (x and y are unscaled coordinates on the page) """
+    id: str
+    object_id: str
+    page: int
+    x: float
+    y: float
+    user_id: Optional[int]
+    text: str
+    resolved: bool = False
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    author_name: Optional[str] = None
+
+    @classmethod
+    def from_db_row(cls, db_row: tuple) -> "Comment":
+        if len(db_row) != 11:
+            raise ValueError("Unable to unserialize db row into a Comment instance")
+        return cls(
+            id=db_row[0],
+            object_id=db_row[1],
+            page=db_row[2],
+            x=db_row[3],
+            y=db_row[4],
+            user_id=db_row[5],
+            text=db_row[6],
+            resolved=bool(db_row[7]),
+            created_at=db_row[8],
+            updated_at=db_row[9],
+            author_name=db_row[10],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "object_id": self.object_id,
+            "page": self.page,
+            "x": self.x,
+            "y": self.y,
+            "user_id": self.user_id,
+            "author_name": self.author_name,
+            "text": self.text,
+            "resolved": self.resolved,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class Folder:
+    """ Folder model (materialized from the paths of the objects) """
+    project_id: int
+    path: str
+    parent: Optional[str]
+    name: str
+    object_count: int = 0
+    folder_count: int = 0
+    total_count: int = 0
+
+    @property
+    def items(self) -> int:
+        """ Objects and subfolders directly inside the folder """
+        return self.object_count + self.folder_count
+
+    @classmethod
+    def from_db_row(cls, db_row: tuple) -> "Folder":
+        if len(db_row) != 7:
+            raise ValueError("Unable to unserialize db row into a Folder instance")
+        return cls(
+            project_id=db_row[0],
+            path=db_row[1],
+            parent=db_row[2],
+            name=db_row[3],
+            object_count=db_row[4],
+            folder_count=db_row[5],
+            total_count=db_row[6],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "project_id": self.project_id,
+            "path": self.path,
+            "parent": self.parent,
+            "name": self.name,
+            "object_count": self.object_count,
+            "folder_count": self.folder_count,
+            "total_count": self.total_count,
+            "items": self.items,
+        }
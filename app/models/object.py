@@ -1,6 +1,8 @@
 from enum import Enum
 from .user import User
+from ..config import log
 from ..database import Database
+from ..storage import blob_store
 
 class ObjectStatus(Enum):
     """ Status enumerator for Objects """
@@ -31,7 +33,8 @@ class Object:
     DATE_FORMAT = "%Y-%m-%d, %H:%M"
 
     def __init__(self, id: str, path: int, user_id: int, project_id: int, name: str, 
-                 description: str, comments: str, version: str, status: str, upload_date:str, update_date:str, raw: bytes | None = None) -> None:
+                 description: str, comments: str, version: str, status: str, upload_date:str, update_date:str, raw: bytes | None = None,
+                 raw_hash: str | None = None, raw_size: int | None = None) -> None:
         self.id = id
         self.path = path
         self.user_id = user_id
@@ -44,11 +47,13 @@ class Object:
         self.upload_date = upload_date
         self.update_date = update_date
         self.raw:bytes|None = raw  # Placeholder for raw data, to be loaded separately if needed
+        self.raw_hash = raw_hash  # SHA-256 digest of the content in the blob store
+        self.raw_size = raw_size
         self.user:User = None
 
     @classmethod
     def from_db_row(cls, db_row: tuple) -> "Object":
-        if len(db_row) != 11:
+        if len(db_row) not in (11, 13):
             raise ValueError("Unable to unserialize db row into an Object instance")
         return cls(
             id=db_row[0],
@@ -62,6 +67,8 @@ class Object:
             status=db_row[8],
             upload_date=db_row[9],
             update_date=db_row[10],
+            raw_hash=db_row[11] if len(db_row) == 13 else None,
+            raw_size=db_row[12] if len(db_row) == 13 else None,
         )
     
     @classmethod
@@ -83,16 +90,28 @@ class Object:
             raw=data.get("raw", None), # Optional raw data in base64
             upload_date=data["upload_date"],
             update_date=data["update_date"],
+            raw_hash=data.get("raw_hash", None),
+            raw_size=data.get("raw_size", None),
         )
 
     def load_raw(self, db:Database) -> bool:
         result = db.c.execute(
-            "SELECT raw FROM object WHERE id = ?;",
+            "SELECT raw_hash, raw_size, raw FROM object WHERE id = ?;",
             (self.id,)
         ).fetchone()
         if result is None:
             return False
-        self.raw = result[0]
+        self.raw_hash, self.raw_size, raw = result
+        if self.raw_hash is None:
+            # Content not moved to the blob store yet
+            self.raw = raw
+            return True
+        try:
+            with blob_store.open(self.raw_hash) as f:
+                self.raw = f.read()
+        except FileNotFoundError:
+            log.error("Content %s of object %s not found in the blob store", self.raw_hash, self.id)
+            return False
         return True
     
     def load_user(self, db:Database) -> bool:
@@ -118,6 +137,8 @@ class Object:
             "status": self.status.value if self.status else None,
             "upload_date": self.upload_date,
             "update_date": self.update_date,
+            "raw_hash": self.raw_hash,
+            "raw_size": self.raw_size,
         }
         if self.raw is not None:
             output["raw"] = self.raw
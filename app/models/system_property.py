@@ -7,6 +7,7 @@ class SystemProperty(Enum):
     USER_LOGIN_DISABLED = "USER_LOGIN_DISABLED"
     OBJECT_MAX_UPLOAD_SIZE_MB = "OBJECT_MAX_UPLOAD_SIZE_MB"
     WEBHOOKS_DISABLED = "WEBHOOKS_DISABLED"
+    WEBHOOK_COALESCE_SECONDS = "WEBHOOK_COALESCE_SECONDS"
 
     def description(self) -> str:
         return SystemPropertyInfo[self.name].value
@@ -21,6 +22,12 @@ class SystemProperty(Enum):
                 return 0 <= size <= 16
             except ValueError:
                 return False
+        elif self == SystemProperty.WEBHOOK_COALESCE_SECONDS:
+            try:
+                seconds = int(value)
+                return 0 <= seconds <= 3600
+            except ValueError:
+                return False
         return False
 
 class SystemPropertyInfo(Enum):
@@ -30,3 +37,4 @@ class SystemPropertyInfo(Enum):
     USER_LOGIN_DISABLED = "If TRUE, only admins can sign in. FALSE by default"
     OBJECT_MAX_UPLOAD_SIZE_MB = "Set the max upload size for objects in Megabytes. Maximum size: 16 (MB)."
     WEBHOOKS_DISABLED = "If TRUE, webhooks are disabled for any user, FALSE by default."
+    WEBHOOK_COALESCE_SECONDS = "Seconds a status change webhook waits for other changes of the same document, sent together as one (with the list of the transitions). 0 (default) to send each change right away, max 3600."
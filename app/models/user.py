@@ -1,11 +1,16 @@
 from enum import Enum
 from ..database import Database
+from .. import queries
 from ..config import log
 
 class Property(Enum):
     """ User properties enumerators """
     API_KEY = "api_key"
     WEBHOOK_URL = "webhook_url"
+    WEBHOOK_EVENTS = "webhook_events"
+    WEBHOOK_PROJECTS = "webhook_projects"
+    WEBHOOK_STATUSES = "webhook_statuses"
+    WEBHOOK_FIELDS = "webhook_fields"
     GITHUB_USERNAME = "github_username"
 
 class LoginProvider(Enum):
@@ -58,9 +63,7 @@ class User:
 
     def load_properties_from_db(self, db:Database) -> None:
         """ Load user properties """
-        result = db.c.execute(
-            "SELECT key, value FROM user_property WHERE user_id = ?", (self.id,)
-        ).fetchall()
+        result = db.c.execute(queries.USER_PROPERTIES, (self.id,)).fetchall()
         self.properties = {row[0]: row[1] for row in result}
 
     def has_prop(self, key:Property|str) -> bool: 
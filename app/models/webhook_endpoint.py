@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class WebhookEndpoint:
+    """ Health of a webhook receiver (by URL), with the circuit breaker state and the last check of the URL """
+    url: str
+    state: str
+    requests: int = 0
+    errors: int = 0
+    success_rate: Optional[float] = None
+    latency_ms: Optional[float] = None
+    consecutive_failures: int = 0
+    retry_at: Optional[str] = None
+    last_error: Optional[str] = None
+    verification: Optional[str] = None
+    verification_error: Optional[str] = None
+    verified_at: Optional[str] = None
+
+    @classmethod
+    def from_db_row(cls, db_row: tuple) -> "WebhookEndpoint":
+        if len(db_row) != 12:
+            raise ValueError("Unable to unserialize db row into a WebhookEndpoint instance")
+        return cls(
+            url=db_row[0],
+            state=db_row[1],
+            requests=db_row[2],
+            errors=db_row[3],
+            success_rate=db_row[4],
+            latency_ms=db_row[5],
+            consecutive_failures=db_row[6],
+            retry_at=db_row[7],
+            last_error=db_row[8],
+            verification=db_row[9],
+            verification_error=db_row[10],
+            verified_at=db_row[11],
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "requests": self.requests,
+            "errors": self.errors,
+            "success_rate": round(self.success_rate, 3) if self.success_rate is not None else None,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_at": self.retry_at,
+            "last_error": self.last_error,
+            "verification": self.verification,
+            "verification_error": self.verification_error,
+            "verified_at": self.verified_at,
+        }
@@ -0,0 +1,187 @@
+import time
+import threading
+from collections import deque
+from typing import Callable
+from sqlite3 import connect, Connection, Error
+from .config import (
+    log,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_HEALTH_CHECK_SECONDS,
+)
+
+
+class PoolExhaustedError(Exception):
+    """ Raised when no connection becomes available within the pool timeout """
+
+
+class ConnectionPool:
+    """ Bounded pool of reusable SQLite connections.
+
+        A connection is leased to the calling thread: nested `Database()` instances
+        opened by the same thread share it and the connection goes back to the pool
+        only when the outermost one is closed. """
+
+    def __init__(self, file_path:str, max_size:int=DB_POOL_SIZE, timeout:float=DB_POOL_TIMEOUT_SECONDS,
+                 health_check_interval:int=DB_POOL_HEALTH_CHECK_SECONDS,
+                 on_connect:Callable[[Connection], None]|None=None) -> None:
+        self._file_path = file_path
+        self._on_connect = on_connect
+        self._max_size = max(1, max_size)
+        self._timeout = timeout
+        self._health_check_interval = health_check_interval
+        self._idle:deque[tuple[Connection, float]] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "nested": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "discarded": 0,
+        }
+
+    def acquire(self) -> Connection:
+        """ Lease a connection to the current thread (re-entrant) """
+        lease = getattr(self._local, "lease", None)
+        if lease is not None:
+            lease[1] += 1
+            with self._cond:
+                self._stats["nested"] += 1
+            return lease[0]
+        connection = self._checkout()
+        self._local.lease = [connection, 1]
+        return connection
+
+    def release(self, connection:Connection) -> None:
+        """ Release the lease of the current thread, returning the connection when unused """
+        lease = getattr(self._local, "lease", None)
+        if lease is None or lease[0] is not connection:
+            log.warning("Database pool: releasing a connection not leased by this thread, closing it")
+            self._discard(connection)
+            return
+        lease[1] -= 1
+        if lease[1] > 0:
+            return
+        self._local.lease = None
+        self._checkin(connection)
+
+    def stats(self) -> dict:
+        """ Current pool usage and counters """
+        with self._cond:
+            return {
+                "file_path": self._file_path,
+                "max_size": self._max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **self._stats,
+            }
+
+    def close_idle(self) -> None:
+        """ Close all the idle connections """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for connection, _ in idle:
+            connection.close()
+
+    def _connect(self) -> Connection:
+        connection = connect(self._file_path, check_same_thread=False)
+        if self._on_connect is not None:
+            try:
+                self._on_connect(connection)
+            except Exception:
+                connection.close()
+                raise
+        return connection
+
+    def _checkout(self) -> Connection:
+        deadline = time.monotonic() + self._timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self._max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolExhaustedError(f"No database connection available after {self._timeout}s (max_size={self._max_size})")
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                if self._idle:
+                    # LIFO: the most recently used connection has the warmest page cache
+                    connection, released_at = self._idle.pop()
+                    self._stats["reused"] += 1
+                else:
+                    connection, released_at = None, None
+                    self._size += 1
+                    self._stats["created"] += 1
+
+            if connection is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if time.monotonic() - released_at < self._health_check_interval or self._is_healthy(connection):
+                return connection
+            self._discard(connection)
+
+    def _checkin(self, connection:Connection) -> None:
+        try:
+            # Never hand over uncommitted work to the next lessee
+            if connection.in_transaction:
+                connection.rollback()
+        except Error as e:
+            log.warning("Database pool: discarding broken connection: %s", e)
+            self._discard(connection)
+            return
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, connection:Connection) -> None:
+        try:
+            connection.close()
+        except Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(connection:Connection) -> bool:
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except Error as e:
+            log.warning("Database pool: health check failed: %s", e)
+            return False
+
+
+_pools:dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(file_path:str, on_connect:Callable[[Connection], None]|None=None) -> ConnectionPool:
+    """ Get (or create) the pool for a database file """
+    with _pools_lock:
+        pool = _pools.get(file_path)
+        if pool is None:
+            pool = ConnectionPool(file_path, on_connect=on_connect)
+            _pools[file_path] = pool
+        return pool
+
+
+def pool_stats() -> list[dict]:
+    """ Stats of every pool in use """
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
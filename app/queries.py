@@ -0,0 +1,168 @@
+# SQL of the hot paths of the routes, shared by the code that runs it and by the query plan check
+# (see Database.INDEXED_QUERIES and tools/check_query_plans.py): every query listed there must be run from here.
+
+OBJECT_COLUMNS = "id, path, user_id, project_id, name, description, comments, version, status, upload_date, update_date, raw_hash, raw_size"
+REVIEW_COLUMNS = "id, name, icon, url, url_text, value, created_at, user_id, object_id"
+FOLDER_COLUMNS = "project_id, path, parent, name, object_count, folder_count, total_count"
+COMMENT_COLUMNS = "c.id, c.object_id, c.page, c.x, c.y, c.user_id, c.text, c.resolved, c.created_at, c.updated_at, u.name"
+WEBHOOK_ENDPOINT_COLUMNS = "url, state, requests, errors, success_rate, latency_ms, consecutive_failures, retry_at, last_error, verification, verification_error, verified_at"
+
+# ------ Users ------
+USER_BY_API_KEY = '''
+    SELECT *
+    FROM user
+    WHERE id IN (
+        SELECT user_id
+        FROM user_property
+        WHERE key = ? AND value = ?
+    ) AND deleted = 0
+    LIMIT 1
+'''
+USER_PROPERTIES = "SELECT key, value FROM user_property WHERE user_id = ?"
+
+# ------ Projects ------
+PROJECT_MEMBER_ROLE = "SELECT role FROM project_user WHERE project_id = ? AND user_id = ? LIMIT 1"
+USER_PROJECTS = '''
+    SELECT p.id, p.title, p.deleted
+    FROM project p
+    INNER JOIN project_user pu ON p.id = pu.project_id
+    WHERE pu.user_id = ? AND p.deleted = 0
+'''
+USER_PROJECT = '''
+    SELECT p.id, p.title, p.deleted
+    FROM project p
+    INNER JOIN project_user pu ON p.id = pu.project_id
+    WHERE p.id = ? AND pu.user_id = ? AND p.deleted = 0
+'''
+USER_PROJECT_WITH_ROLE = '''
+    SELECT p.id, p.title, p.deleted, pu.role
+    FROM project p
+    INNER JOIN project_user pu ON p.id = pu.project_id
+    WHERE p.id = ? AND pu.user_id = ? AND p.deleted = 0
+'''
+PROJECT_USERS = '''
+    SELECT u.id, u.name, u.email, pu.role
+    FROM user u
+    INNER JOIN project_user pu ON u.id = pu.user_id
+    WHERE pu.project_id = ? AND u.deleted = 0
+'''
+
+# ------ Objects and folders ------
+OBJECT = f"SELECT {OBJECT_COLUMNS} FROM object WHERE id = ?"
+PROJECT_OBJECT = f"SELECT {OBJECT_COLUMNS} FROM object WHERE id = ? AND project_id = ?"
+PROJECT_OBJECT_STATUS = "SELECT status FROM object WHERE project_id = ? AND id = ?"
+OBJECT_BY_CONTENT_DIGEST = "SELECT 1 FROM object WHERE raw_hash = ? LIMIT 1"
+# Read in (project_id, update_date) index order: only the first rows are visited
+RECENT_OBJECTS = f'''
+    SELECT {OBJECT_COLUMNS}
+    FROM object
+    WHERE project_id = ? AND status IS NOT NULL
+    ORDER BY update_date DESC
+    LIMIT ?
+'''
+FOLDER = f"SELECT {FOLDER_COLUMNS} FROM folder WHERE project_id = ? AND path = ?"
+SUBFOLDERS = f"SELECT {FOLDER_COLUMNS} FROM folder WHERE project_id = ? AND parent = ? ORDER BY name"
+FOLDER_OBJECTS = f'''
+    SELECT {OBJECT_COLUMNS}
+    FROM object
+    WHERE project_id = ? AND path = ? AND status IS NOT NULL
+    ORDER BY name
+'''
+
+
+def objects_page_query(columns:list[str], filters:list[str], sort:str, descending:bool) -> str:
+    """ Page of the objects of a project (the filters start with the project and the key of the previous page) """
+    direction = "DESC" if descending else "ASC"
+    return f'''
+        SELECT {", ".join(columns)}
+        FROM object
+        WHERE {" AND ".join(filters)}
+        ORDER BY {sort} {direction}, id {direction}
+        LIMIT ?
+    '''
+
+
+# ------ Reviews and comments ------
+OBJECT_REVIEWS = f'''
+    SELECT {REVIEW_COLUMNS}
+    FROM object_integration_review
+    WHERE object_id = ?
+    ORDER BY created_at DESC
+'''
+USER_OBJECT_REVIEW = "SELECT 1 FROM object_integration_review WHERE object_id = ? AND user_id = ?"
+USER_REVIEWS = f'''
+    SELECT {REVIEW_COLUMNS}
+    FROM object_integration_review
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+'''
+COMMENT = f"SELECT {COMMENT_COLUMNS} FROM comment c LEFT JOIN user u ON u.id = c.user_id WHERE c.id = ? AND c.object_id = ?"
+
+
+def object_comments_query(page:bool) -> str:
+    """ Inline comments of an object (of one page if `page`), in page and creation order """
+    return f'''
+        SELECT {COMMENT_COLUMNS}
+        FROM comment c
+        LEFT JOIN user u ON u.id = c.user_id
+        WHERE c.object_id = ? {"AND c.page = ?" if page else ""}
+        ORDER BY c.page, c.created_at
+    '''
+
+
+# ------ Changes feed ------
+USER_CHANGES = '''
+    SELECT id, project_id, entity, entity_id, object_id, action, created_at
+    FROM change_log
+    WHERE id > ? AND (
+        project_id IN (SELECT project_id FROM project_user WHERE user_id = ?)
+        OR (entity = 'member' AND entity_id = ?)
+    )
+    ORDER BY id
+    LIMIT ?
+'''
+
+# ------ Webhooks ------
+WEBHOOK_DELIVERY_TO_COALESCE = "SELECT id, payload FROM webhook_delivery WHERE coalesce_key = ? AND user_id = ? AND status = ? AND attempts = 0 LIMIT 1"
+DUE_WEBHOOK_DELIVERIES = '''
+    SELECT id FROM webhook_delivery
+    WHERE status = ? AND next_attempt_at <= datetime('now')
+    AND url NOT IN (SELECT url FROM webhook_endpoint WHERE state IN (?, ?))
+    ORDER BY next_attempt_at
+    LIMIT ?
+'''
+DUE_WEBHOOK_ENDPOINT_DELIVERY = "SELECT id FROM webhook_delivery WHERE url = ? AND status = ? AND next_attempt_at <= datetime('now') ORDER BY next_attempt_at LIMIT 1"
+WEBHOOK_ENDPOINTS_TO_PROBE = '''
+    SELECT e.url FROM webhook_endpoint e
+    WHERE e.state IN (?, ?) AND e.retry_at <= datetime('now')
+    AND EXISTS (
+        SELECT 1 FROM webhook_delivery d
+        WHERE d.url = e.url AND d.status = ? AND d.next_attempt_at <= datetime('now')
+    )
+    LIMIT ?
+'''
+WEBHOOK_ENDPOINT = f"SELECT {WEBHOOK_ENDPOINT_COLUMNS} FROM webhook_endpoint WHERE url = ?"
+
+
+def project_webhooks_query(keys:int) -> str:
+    """ Webhook properties (`keys` of them) of the members of a project with the given roles, except one user """
+    return f'''
+        SELECT up.user_id, up.key, up.value
+        FROM user_property up
+        WHERE up.key IN ({", ".join("?" * keys)}) AND up.user_id IN (
+            SELECT pu.user_id
+            FROM project_user pu
+            WHERE pu.project_id = ? AND pu.role IN (?, ?, ?)
+        ) AND up.user_id != ?
+    '''
+
+
+# ------ Logs ------
+def logs_query(action:bool, user_id:bool) -> str:
+    """ Logs, newest first (filtered by action text and by user if asked) """
+    where = "WHERE 1=1"
+    if action:
+        where += " AND action LIKE ?"
+    if user_id:
+        where += " AND user_id = ?"
+    return f"SELECT * FROM log {where} ORDER BY id DESC"
@@ -3,4 +3,4 @@ from .admin import admin_blueprint
 from .settings import settings_blueprint
 from .project import project_blueprint
 from .object import object_blueprint
-from .api import api_project_bp, api_object_bp, api_integration_bp
\ No newline at end of file
+from .api import api_project_bp, api_object_bp, api_integration_bp, api_change_bp, api_comment_bp, api_event_bp, api_webhook_bp
\ No newline at end of file
@@ -3,6 +3,12 @@ from flask import render_template, request, session, redirect, Blueprint
 from .utils import is_logged, is_logged_admin
 from ..config import VERSION, log, USER_DEFAULT_PASSWORD, USER_SYSTEM_ID
 from ..database import Database
+from .. import queries
+from ..pool import pool_stats
+from ..cache import api_key_cache, system_settings, cache_stats
+from ..events import event_broker
+from ..webhooks import webhook_dispatcher
+from ..http_client import http_client
 from ..models import User, Log, SystemPropertyInfo, SystemProperty, Property
 
 admin_blueprint = Blueprint('admin', __name__)
@@ -48,11 +54,13 @@ def users():
         elif target == "undelete" and user_id not in check_list:
             db.c.execute('UPDATE user SET deleted = ? WHERE id = ? LIMIT 1', (0,user_id))
             db.commit()
+            api_key_cache.invalidate_values(lambda cached: cached is None)
             output = ("success", f"User #{user_id} undeleted!")
             db.log(session["user"].id, f"user undeleted (user_id={user_id})")
         elif target == "delete" and user_id not in check_list:
             db.c.execute('UPDATE user SET deleted = ? WHERE id = ? LIMIT 1', (1,user_id))
             db.commit()
+            api_key_cache.invalidate_values(lambda cached: cached is not None and str(cached.id) == str(user_id))
             output = ("success", f"User #{user_id} deleted!")
             db.log(session["user"].id, f"user deleted (user_id={user_id})")
         elif target == "password" and user_id not in check_list:
@@ -101,16 +109,13 @@ def logs():
     db = Database()
     action = request.args.get("action")
     user_id = request.args.get("user_id")
-    start_query = "SELECT * FROM log "
+    by_action, by_user = action not in [None, ''], user_id not in [None, '']
     params = ()
-    where_query = "WHERE 1=1"
-    if action not in [None, '']:
-        where_query += " AND action LIKE ?"
+    if by_action:
         params += (f"%{action}%",)
-    if user_id not in [None, '']:
-        where_query += " AND user_id = ?"
+    if by_user:
         params += (user_id,)
-    res = db.c.execute(start_query + where_query + " ORDER BY id DESC", params).fetchall()
+    res = db.c.execute(queries.logs_query(action=by_action, user_id=by_user), params).fetchall()
     logs = [Log(row) for row in res]
     for log in logs:
         log.user = User(db.c.execute("SELECT * FROM user WHERE id = ? LIMIT 1", (log.user_id,)).fetchone())
@@ -158,6 +163,7 @@ def settings():
                 )
                 db.commit()
                 db.log(session["user"].id, f"system property update (key={key}, value={value})")
+        system_settings.invalidate()
         if not error:
             output = ("success", "Global settings updated!")
     db.close()
@@ -172,3 +178,17 @@ def settings():
         admin=is_logged_admin(),
         user=session["user"],
     )
+
+
+@admin_blueprint.route("/admin/stats", methods=["GET"])
+def stats():
+    """ Runtime stats of the application internals (JSON) """
+    if not is_logged_admin():
+        return {"error": "Unauthorized"}, 401
+    return {
+        "database_pools": pool_stats(),
+        "caches": cache_stats(),
+        "events": event_broker.stats(),
+        "webhooks": webhook_dispatcher.stats(),
+        "http_client": http_client.stats(),
+    }, 200
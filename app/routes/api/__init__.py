@@ -1,3 +1,7 @@
 from .api_project import *
 from .api_object import *
-from .api_integration import *
\ No newline at end of file
+from .api_integration import *
+from .api_change import *
+from .api_comment import *
+from .api_event import *
+from .api_webhook import *
\ No newline at end of file
@@ -0,0 +1,43 @@
+from flask import request, g, Blueprint
+from ..utils import auth_required, load_current_user, get_db
+from ...config import log, CHANGES_PAGE_SIZE, CHANGES_PAGE_MAX_SIZE
+from ...services import get_changes, get_change_token, get_change_purged_until
+
+api_change_bp = Blueprint('api_change', __name__)
+api_change_bp.before_request(load_current_user)
+
+@api_change_bp.route("/api/changes", methods=["GET"])
+@auth_required
+def change_list():
+    """ Changes of objects, reviews and members in the projects of the user after a token (?since=),
+        without a token only the current one is returned to start the sync from """
+    user_id = g.user.id
+
+    limit = request.args.get("limit", CHANGES_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= CHANGES_PAGE_MAX_SIZE:
+        return {"error": f"Invalid limit. It must be between 1 and {CHANGES_PAGE_MAX_SIZE}"}, 400
+
+    since = None
+    if "since" in request.args:
+        since = request.args.get("since", type=int)
+        if since is None or since < 0:
+            return {"error": "Invalid since. Use the next_token of the previous response"}, 400
+
+    db = get_db()
+    try:
+        # Read the current token first: the changes committed meanwhile are returned anyway
+        token = get_change_token(db)
+        if since is None:
+            return {"changes": [], "next_token": token, "has_more": False}, 200
+
+        if since < get_change_purged_until(db):
+            return {"error": "Gone: the changes after this token are no longer available, sync again from a full listing"}, 410
+
+        changes = get_changes(db, user_id, since, limit)
+        has_more = len(changes) == limit
+        next_token = changes[-1].id if has_more else max([token, since, *[change.id for change in changes]])
+        return {"changes": [change.to_dict() for change in changes], "next_token": next_token, "has_more": has_more}, 200
+
+    except Exception as e:
+        log.error(f"Error fetching changes for user {user_id}: {e}")
+        return {"error": "Internal server error"}, 500
@@ -0,0 +1,184 @@
+import math
+import uuid
+from flask import request, g, Blueprint
+from ..utils import auth_required, load_current_user, require_role, get_db
+from ...config import log
+from ...services import get_object, get_object_comments, get_comment
+from ...models import Role
+from ...events import EventType, publish_event
+from ...webhooks import enqueue_event_webhooks, webhook_dispatcher
+
+api_comment_bp = Blueprint('api_comment', __name__)
+api_comment_bp.before_request(load_current_user)
+
+def _comment_position(data) -> dict:
+    """ Page and coordinates of a comment in the request data (only the ones present), ValueError if not numbers or not finite """
+    position = {}
+    if "page" in data:
+        position["page"] = int(data["page"])
+    for key in ("x", "y"):
+        if key in data:
+            position[key] = float(data[key])
+            if not math.isfinite(position[key]):
+                raise ValueError(f"'{key}' is not a finite number")
+    return position
+
+@api_comment_bp.route("/api/objects/<object_id>/comments", methods=["GET"])
+@auth_required
+def object_comments_list(object_id:str):
+    """ List the inline comments of an object (only of one page with ?page=) """
+    page = None
+    if "page" in request.args:
+        page = request.args.get("page", type=int)
+        if page is None or page < 1:
+            return {"error": "Invalid page. It must be a positive number"}, 400
+
+    db = get_db()
+    try:
+        obj = get_object(db, object_id)
+        if obj is None:
+            return {"error": "Object not found"}, 404
+
+        # Check if the user is a member of the project associated with the object
+        if require_role(obj.project_id) is None:
+            return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
+
+        return {"comments": [comment.to_dict() for comment in get_object_comments(db, object_id, page)]}, 200
+
+    except Exception as e:
+        log.error(f"Error fetching comments of object {object_id}: {e}")
+        return {"error": "Internal server error"}, 500
+
+@api_comment_bp.route("/api/objects/<object_id>/comments", methods=["POST"])
+@auth_required
+def object_comment_create(object_id:str):
+    """ Add an inline comment to an object (only for project owners and reviewers) """
+    user_id = g.user.id
+
+    data = request.form or request.json
+    if not data or not all(key in data for key in ("page", "x", "y", "text")):
+        return {"error": "Missing required fields 'page', 'x', 'y' and 'text'"}, 400
+
+    try:
+        position = _comment_position(data)
+    except (TypeError, ValueError, OverflowError):
+        return {"error": "Invalid fields. 'page' must be a number, 'x' and 'y' coordinates"}, 400
+    page, x, y = position["page"], position["x"], position["y"]
+    text = str(data["text"]).strip()
+    if page < 1 or not text:
+        return {"error": "Invalid fields. 'page' must be positive and 'text' not empty"}, 400
+
+    db = get_db()
+    try:
+        obj = get_object(db, object_id)
+        if obj is None:
+            return {"error": "Object not found"}, 404
+
+        # Check if the user can review the object
+        if require_role(obj.project_id, {Role.OWNER, Role.REVIEWER}) is None:
+            return {"error": "Forbidden: Only project owners and reviewers can comment the object"}, 403
+
+        comment_id = str(uuid.uuid4())
+        db.c.execute(
+            '''
+            INSERT INTO comment (id, object_id, page, x, y, user_id, text)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (comment_id, object_id, page, x, y, user_id, text)
+        )
+        comment = get_comment(db, object_id, comment_id).to_dict()
+        webhooks = enqueue_event_webhooks(db.c, EventType.COMMENT_CREATED, obj.project_id, object_id, {"comment": comment}, status=obj.status.value if obj.status else None)
+        db.commit()
+        db.log(user_id, f"object comment add (object_id={object_id}, comment_id={comment_id})")
+        publish_event(EventType.COMMENT_CREATED, obj.project_id, object_id, {"comment": comment})
+        if webhooks:
+            webhook_dispatcher.wake()
+        return {"message": "Comment created successfully", "comment": comment}, 201
+
+    except Exception as e:
+        log.error(f"Error creating comment on object {object_id}: {e}")
+        return {"error": "Internal server error"}, 500
+
+@api_comment_bp.route("/api/objects/<object_id>/comments/<comment_id>", methods=["PATCH"])
+@auth_required
+def object_comment_update(object_id:str, comment_id:str):
+    """ Resolve (or reopen) an inline comment (project owners and reviewers) or change its text or position (only its author) """
+    user_id = g.user.id
+
+    data = request.form or request.json
+    if not data or not any(key in data for key in ("text", "resolved", "page", "x", "y")):
+        return {"error": "Missing fields to update: 'text', 'resolved', 'page', 'x' or 'y'"}, 400
+
+    try:
+        updates = _comment_position(data)
+    except (TypeError, ValueError, OverflowError):
+        return {"error": "Invalid fields. 'page' must be a number, 'x' and 'y' coordinates"}, 400
+    if updates.get("page", 1) < 1:
+        return {"error": "Invalid field 'page'. It must be positive"}, 400
+    if "text" in data:
+        updates["text"] = str(data["text"]).strip()
+        if not updates["text"]:
+            return {"error": "Invalid field 'text'. It cannot be empty"}, 400
+    if "resolved" in data:
+        if not isinstance(data["resolved"], bool) and str(data["resolved"]).lower() not in ("true", "false", "1", "0"):
+            return {"error": "Invalid field 'resolved'. It must be true or false"}, 400
+        updates["resolved"] = 1 if str(data["resolved"]).lower() in ("true", "1") else 0
+
+    db = get_db()
+    try:
+        obj = get_object(db, object_id)
+        comment = get_comment(db, object_id, comment_id) if obj is not None else None
+        if comment is None:
+            return {"error": "Comment not found"}, 404
+
+        # Check if the user can review the object, the text and the position can be changed only by the author
+        if require_role(obj.project_id, {Role.OWNER, Role.REVIEWER}) is None:
+            return {"error": "Forbidden: Only project owners and reviewers can update comments"}, 403
+        if updates.keys() - {"resolved"} and comment.user_id != user_id:
+            return {"error": "Forbidden: Only the author can change the text or the position of the comment"}, 403
+
+        db.c.execute(
+            "UPDATE comment SET updated_at = CURRENT_TIMESTAMP, " + ", ".join(f"{key} = ?" for key in updates.keys()) + " WHERE id = ?",
+            (*updates.values(), comment_id)
+        )
+        comment = get_comment(db, object_id, comment_id).to_dict()
+        webhooks = enqueue_event_webhooks(db.c, EventType.COMMENT_UPDATED, obj.project_id, object_id, {"comment": comment}, status=obj.status.value if obj.status else None)
+        db.commit()
+        db.log(user_id, f"object comment update (object_id={object_id}, comment_id={comment_id}, keys={"|".join(updates.keys())})")
+        publish_event(EventType.COMMENT_UPDATED, obj.project_id, object_id, {"comment": comment})
+        if webhooks:
+            webhook_dispatcher.wake()
+        return {"message": "Comment updated successfully", "comment": comment}, 200
+
+    except Exception as e:
+        log.error(f"Error updating comment {comment_id} of object {object_id}: {e}")
+        return {"error": "Internal server error"}, 500
+
+@api_comment_bp.route("/api/objects/<object_id>/comments/<comment_id>", methods=["DELETE"])
+@auth_required
+def object_comment_delete(object_id:str, comment_id:str):
+    """ Delete an inline comment (only for project owners and reviewers) """
+    user_id = g.user.id
+
+    db = get_db()
+    try:
+        obj = get_object(db, object_id)
+        comment = get_comment(db, object_id, comment_id) if obj is not None else None
+        if comment is None:
+            return {"error": "Comment not found"}, 404
+
+        if require_role(obj.project_id, {Role.OWNER, Role.REVIEWER}) is None:
+            return {"error": "Forbidden: Only project owners and reviewers can delete comments"}, 403
+
+        db.c.execute("DELETE FROM comment WHERE id = ?", (comment_id,))
+        webhooks = enqueue_event_webhooks(db.c, EventType.COMMENT_DELETED, obj.project_id, object_id, {"comment_id": comment_id}, status=obj.status.value if obj.status else None)
+        db.commit()
+        db.log(user_id, f"object comment delete (object_id={object_id}, comment_id={comment_id})")
+        publish_event(EventType.COMMENT_DELETED, obj.project_id, object_id, {"comment_id": comment_id})
+        if webhooks:
+            webhook_dispatcher.wake()
+        return {"message": "Comment deleted successfully"}, 200
+
+    except Exception as e:
+        log.error(f"Error deleting comment {comment_id} of object {object_id}: {e}")
+        return {"error": "Internal server error"}, 500
@@ -0,0 +1,58 @@
+from flask import request, Blueprint, Response
+from ..utils import auth_required, load_current_user, require_role
+from ...config import log, EVENTS_RETRY_MS
+from ...database import Database
+from ...services import get_object
+from ...events import event_broker, stream_events
+
+api_event_bp = Blueprint('api_event', __name__)
+api_event_bp.before_request(load_current_user)
+
+def _events_response(topics:set[tuple[str, str]]):
+    """ Open a live events stream (text/event-stream) of the topics, 503 if too many streams are open """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscription = event_broker.subscribe(topics, last_event_id)
+    if subscription is None:
+        return {"error": "Too many live events streams, try again later"}, 503, {"Retry-After": str(EVENTS_RETRY_MS // 1000)}
+
+    response = Response(
+        stream_events(event_broker, subscription),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Free the client slot even if the stream never started (client gone before the first write)
+    response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+    return response
+
+@api_event_bp.route("/api/objects/<object_id>/events", methods=["GET"])
+@auth_required
+def object_events(object_id:str):
+    """ Live events (comments, reviews and updates) of an object """
+    # Own connection, closed before the stream starts: an open stream must not hold it
+    db = Database()
+    try:
+        obj = get_object(db, object_id)
+    except Exception as e:
+        log.error(f"Error fetching object {object_id}: {e}")
+        return {"error": "Internal server error"}, 500
+    finally:
+        db.close()
+
+    if obj is None:
+        return {"error": "Object not found"}, 404
+    if require_role(obj.project_id) is None:
+        return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
+    return _events_response({("object", object_id)})
+
+@api_event_bp.route("/api/projects/<project_id>/events", methods=["GET"])
+@auth_required
+def project_events(project_id:str):
+    """ Live events of all the objects of a project """
+    if require_role(project_id) is None:
+        return {"error": "Forbidden: You are not a member of this project"}, 403
+    return _events_response({("project", project_id)})
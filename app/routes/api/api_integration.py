@@ -1,78 +1,47 @@
 import uuid
-from flask import request, session, Blueprint
-from ..utils import is_logged, check_authentication, get_user_from_api_key
+from flask import request, g, Blueprint
+from ..utils import auth_required, load_current_user, require_role, get_db
 from ...config import log
-from ...database import Database
+from ... import queries
+from ...services import get_object_reviews
 from ...models import Role, Review
+from ...events import EventType, publish_event
+from ...webhooks import enqueue_event_webhooks, webhook_dispatcher
 
 api_integration_bp = Blueprint('api_integration', __name__)
+api_integration_bp.before_request(load_current_user)
 
 @api_integration_bp.route("/api/projects/<project_id>/objects/<object_id>/integrations/reviews", methods=["GET"])
+@auth_required
 def object_review_get(project_id: str, object_id: str):
     """ Get all integration reviews for an object from a project """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-    
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
-
-    db = Database()
+    db = get_db()
     try:
         # Check if the user is a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT Role
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        if require_role(project_id) is None:
             return {"error": "Forbidden: You are not a member of this project"}, 403
 
         # Check if the object exists in the project
-        object_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM object
-            WHERE project_id = ? AND id = ?
-            ''',
-            (project_id, object_id)
-        ).fetchone()
+        object_check = db.c.execute(queries.PROJECT_OBJECT_STATUS, (project_id, object_id)).fetchone()
 
         if not object_check:
             return {"error": "Forbidden: This object does not exist in this project"}, 403
 
         # Fetch all reviews for the object
-        rows = db.c.execute(
-            '''
-            SELECT id, name, icon, url, url_text, value, created_at, user_id, object_id
-            FROM object_integration_review
-            WHERE object_id = ?
-            ORDER BY created_at DESC
-            ''',
-            (object_id,)
-        ).fetchall()
-
-        # Convert rows to Object instances and then to dictionaries
-        reviews = [Review.from_db_row(row).to_dict() for row in rows]
+        reviews = [review.to_dict() for review in get_object_reviews(db, object_id)]
         return {"reviews": reviews}, 200
 
     except Exception as e:
         log.error(f"Error fetching reviews for project {project_id} and object {object_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_integration_bp.route("/api/projects/<project_id>/objects/<object_id>/integrations/reviews", methods=["POST"])
+@auth_required
 def object_review_create(project_id:str, object_id: str):
     """ Create an integration review for an object """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
-    db = Database()
+    db = get_db()
     try:
 
         # Sanitize input
@@ -115,43 +84,21 @@ def object_review_create(project_id:str, object_id: str):
             return {"error": "Bad Request: 'value' exceeds maximum length of 8192 characters"}, 400
 
         # Check if the user is a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT Role
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        user_role = require_role(project_id)
+        if user_role is None:
             return {"error": "Forbidden: You are not a member of this project"}, 403
         
-        if member_check[0] not in [Role.OWNER.value, Role.REVIEWER.value]:
+        if user_role not in {Role.OWNER, Role.REVIEWER}:
             return {"error": "Forbidden: You do not have permission to create reviews"}, 403
 
         # Check if the object exists in the project
-        object_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM object
-            WHERE project_id = ? AND id = ?
-            ''',
-            (project_id, object_id)
-        ).fetchone()
+        object_check = db.c.execute(queries.PROJECT_OBJECT_STATUS, (project_id, object_id)).fetchone()
 
         if not object_check:
             return {"error": "Forbidden: This object does not belong to this project"}, 403
         
         # Check if a review has been already created by this user for this object
-        existing_review = db.c.execute(
-            '''
-            SELECT 1
-            FROM object_integration_review
-            WHERE object_id = ? AND user_id = ?
-            ''',
-            (object_id, user_id)
-        ).fetchone()
+        existing_review = db.c.execute(queries.USER_OBJECT_REVIEW, (object_id, user_id)).fetchone()
 
         if existing_review:
             return {"error": "Conflict: You have already created a review for this object. Remove or update the current review."}, 409
@@ -165,39 +112,32 @@ def object_review_create(project_id:str, object_id: str):
             ''',
             (review_id, name, icon, url, url_text, value, user_id, object_id)
         )
+        event = {"review_id": review_id, "name": name}
+        webhooks = enqueue_event_webhooks(db.c, EventType.REVIEW_CREATED, int(project_id), object_id, event, status=object_check[0])
         db.commit()
         db.log(user_id, f"project object review add (project_id={project_id}, object_id={object_id}, review_id={review_id})")
+        publish_event(EventType.REVIEW_CREATED, project_id, object_id, event)
+        if webhooks:
+            webhook_dispatcher.wake()
         return {"message": "Review created successfully", "review_id": review_id }, 201
 
     except Exception as e:
         log.error(f"Error fetching reviews for project {project_id} and object {object_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_integration_bp.route("/api/integrations/reviews", methods=["GET"])
+@auth_required
 def integration_review_read_all(load_values: bool=True):
     """ Read all the integration reviews of the current authenticated user """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
     if request.args.get("value", "0") == "1":
         load_values = True
 
-    db = Database()
+    db = get_db()
     try:
         # Fetch all reviews for the user
-        rows = db.c.execute(
-            '''
-            SELECT id, name, icon, url, url_text, value, created_at, user_id, object_id
-            FROM object_integration_review
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            ''',
-            (user_id,)
-        ).fetchall()
+        rows = db.c.execute(queries.USER_REVIEWS, (user_id,)).fetchall()
 
         # Convert rows to Object instances and then to dictionaries
         reviews = [Review.from_db_row(row).to_dict() for row in rows]
@@ -212,29 +152,26 @@ def integration_review_read_all(load_values: bool=True):
     except Exception as e:
         log.error(f"Error fetching reviews for user {user_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 
 @api_integration_bp.route("/api/integrations/reviews/<review_id>", methods=["DELETE"])
+@auth_required
 def integration_review_delete(review_id: str):
     """ Delete an integration review """
 
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
-    db = Database()
+    db = get_db()
     try:
         # Check if the review exists and belongs to the user or the user is a reviewer or a owner of the project
         review_check = db.c.execute(
             '''
-            SELECT 1
-            FROM object_integration_review
-            WHERE id = ? AND user_id = ?
+            SELECT oir.object_id, o.project_id, o.status
+            FROM object_integration_review oir
+            JOIN object o ON oir.object_id = o.id
+            WHERE oir.id = ? AND oir.user_id = ?
             UNION
-            SELECT 1
+            SELECT oir.object_id, o.project_id, o.status
             FROM object_integration_review oir
             JOIN object o ON oir.object_id = o.id
             JOIN project_user pu ON o.project_id = pu.project_id
@@ -254,11 +191,13 @@ def integration_review_delete(review_id: str):
             ''',
             (review_id,)
         )
+        webhooks = enqueue_event_webhooks(db.c, EventType.REVIEW_DELETED, review_check[1], review_check[0], {"review_id": review_id}, status=review_check[2])
         db.commit()
         db.log(user_id, f"object review delete (review_id={review_id})")
+        publish_event(EventType.REVIEW_DELETED, review_check[1], review_check[0], {"review_id": review_id})
+        if webhooks:
+            webhook_dispatcher.wake()
         return {"message": "Review deleted successfully"}, 200
     except Exception as e:
         log.error(f"Error deleting review {review_id} for user {user_id}: {e}")
-        return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
\ No newline at end of file
+        return {"error": "Internal server error"}, 500
\ No newline at end of file
@@ -1,67 +1,146 @@
-import uuid, json, datetime, base64
-from flask import request, session, Blueprint, current_app
-from ..utils import is_logged, get_system_property, get_user_from_api_key, check_authentication, get_user_webhooks, call_webhook
-from ...config import log, SYSTEM_MAX_UPLOAD_SIZE_MB, VERSION
-from ...database import Database
-from ...models import Project, Role, Object, ObjectStatus, SystemProperty
+import uuid, datetime, base64, hashlib
+from flask import request, g, Blueprint
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from ..utils import auth_required, load_current_user, require_role, api_cache_validators, send_object_content, parse_db_timestamp, to_db_timestamp, encode_cursor, decode_cursor, get_db
+from ...config import log, SYSTEM_MAX_UPLOAD_SIZE_MB, UPLOAD_FORM_OVERHEAD_BYTES, OBJECTS_PAGE_SIZE, OBJECTS_PAGE_MAX_SIZE
+from ...storage import blob_store, BlobTooLargeError
+from ...cache import system_settings
+from ...events import EventType, publish_event
+from ...webhooks import enqueue_event_webhooks, webhook_dispatcher, check_content_signature
+from ...folders import ROOT_PATH, folder_path, update_folder_counts
+from ...services import get_object, get_project_objects_page, get_folder, get_subfolders, get_folder_objects, ObjectQuery, OBJECT_FIELDS, OBJECT_SORTS
+from ...models import Project, Role, Object, ObjectStatus, SystemProperty, Folder
 
 api_object_bp = Blueprint('api_object', __name__)
+api_object_bp.before_request(load_current_user)
 
 @api_object_bp.route("/api/projects/<project_id>/objects", methods=["GET"])
+@auth_required
 def project_objects_list(project_id:str):
-    """ List all the objects inside the project """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    """ List the objects inside the project, a page at a time (filters: status, path, updated_since, author;
+        sort: update_date or name, "-" for descending; sparse fields: fields=id,name,...) """
+    query = ObjectQuery()
+    sort = request.args.get("sort", "-update_date")
+    query.sort, query.descending = sort.lstrip("-"), sort.startswith("-")
+    if query.sort not in OBJECT_SORTS:
+        return {"error": f"Invalid sort. Valid sorts are: {', '.join(OBJECT_SORTS)} (prefixed with '-' for descending order)"}, 400
+
+    query.limit = request.args.get("limit", OBJECTS_PAGE_SIZE, type=int)
+    if query.limit is None or not 1 <= query.limit <= OBJECTS_PAGE_MAX_SIZE:
+        return {"error": f"Invalid limit. It must be between 1 and {OBJECTS_PAGE_MAX_SIZE}"}, 400
+
+    if "fields" in request.args:
+        query.fields = [name.strip() for name in request.args["fields"].split(",") if name.strip()]
+        if not query.fields or any(name not in OBJECT_FIELDS for name in query.fields):
+            return {"error": f"Invalid fields. Valid fields are: {', '.join(OBJECT_FIELDS)}"}, 400
+
+    query.statuses = request.args.getlist("status")
+    if any(status not in ObjectStatus.values() for status in query.statuses):
+        return {"error": f"Invalid status. Valid statuses are: {', '.join(ObjectStatus.values())}"}, 400
 
-    db = Database()
+    if "path" in request.args:
+        if not request.args["path"].startswith("/"):
+            return {"error": "Invalid path. Path must start with '/'."}, 400
+        query.path = folder_path(request.args["path"])
+
+    if "updated_since" in request.args:
+        try:
+            query.updated_since = to_db_timestamp(request.args["updated_since"])
+        except ValueError:
+            return {"error": "Invalid updated_since. Use an ISO 8601 date/time (e.g. 2024-05-01T10:00:00Z)"}, 400
+
+    if "author" in request.args:
+        query.author = request.args.get("author", type=int)
+        if query.author is None:
+            return {"error": "Invalid author. Use the id of a user"}, 400
+
+    if "cursor" in request.args:
+        try:
+            query.after = decode_cursor(request.args["cursor"], sort)
+        except ValueError as e:
+            return {"error": f"{e}. Start again from the first page"}, 400
+
+    db = get_db()
     try:
         # Check if the user is a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        if require_role(project_id) is None:
             return {"error": "Forbidden: You are not a member of this project"}, 403
 
-        # Fetch all objects inside the project
-        rows = db.c.execute(
-            '''
-            SELECT id, path, user_id, project_id, name, description, comments, version, status, upload_date, update_date
-            FROM object
-            WHERE project_id = ? AND status IS NOT NULL
-            ''',
-            (project_id,)
-        ).fetchall()
+        # Skip the listing if the objects did not change since the copy of the client
+        revision = db.c.execute("SELECT revision, revised_at FROM project WHERE id = ?", (project_id,)).fetchone()
+        if revision is not None:
+            query_check = hashlib.sha256(request.query_string).hexdigest()[:8]
+            if api_cache_validators(f"p{project_id}-r{revision[0]}-{query_check}", parse_db_timestamp(revision[1])):
+                return "", 304
 
-        # Convert rows to Object instances and then to dictionaries
-        objects = [Object.from_db_row(row).to_dict() for row in rows]
-        return {"objects": objects}, 200
+        objects, last = get_project_objects_page(db, project_id, query)
+        return {"objects": objects, "next_cursor": encode_cursor(sort, last) if last else None}, 200
 
     except Exception as e:
         log.error(f"Error fetching objects for project {project_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
+
+@api_object_bp.route("/api/projects/<project_id>/folders", methods=["GET"])
+@auth_required
+def project_folder_list(project_id:str):
+    """ List the subfolders and the objects directly inside a folder of the project (?path=/a/b, root by default) """
+    path = folder_path(request.args.get("path", ROOT_PATH))
+
+    db = get_db()
+    try:
+        # Check if the user is a member of the project
+        if require_role(project_id) is None:
+            return {"error": "Forbidden: You are not a member of this project"}, 403
+
+        # Skip the listing if the objects did not change since the copy of the client
+        revision = db.c.execute("SELECT revision, revised_at FROM project WHERE id = ?", (project_id,)).fetchone()
+        if revision is not None:
+            query_check = hashlib.sha256(path.encode()).hexdigest()[:8]
+            if api_cache_validators(f"p{project_id}-r{revision[0]}-f{query_check}", parse_db_timestamp(revision[1])):
+                return "", 304
+
+        folder = get_folder(db, project_id, path)
+        if folder is None:
+            if path != ROOT_PATH:
+                return {"error": "Folder not found"}, 404
+            # Projects without objects have no root folder yet
+            folder = Folder(project_id=int(project_id), path=ROOT_PATH, parent=None, name="")
+
+        return {
+            "folder": folder.to_dict(),
+            "folders": [subfolder.to_dict() for subfolder in get_subfolders(db, project_id, path)],
+            "objects": [obj.to_dict() for obj in get_folder_objects(db, project_id, path)],
+        }, 200
+
+    except Exception as e:
+        log.error(f"Error fetching folder '{path}' for project {project_id}: {e}")
+        return {"error": "Internal server error"}, 500
 
 @api_object_bp.route("/api/projects/<project_id>/objects", methods=["POST"])
+@auth_required
 def project_objects_create(project_id: str):
-    """ Create a new object inside the project, accepting application/pdf and storing file as blob """
+    """ Create a new object inside the project, accepting application/pdf and streaming the file to the blob store """
 
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
+    user_id = g.user.id
 
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    # Max file size across the system
+    max_file_size = system_settings.get_int(SystemProperty.OBJECT_MAX_UPLOAD_SIZE_MB, SYSTEM_MAX_UPLOAD_SIZE_MB)
+    max_file_bytes = max_file_size * 1024 * 1024
+    size_error = {"error": f"File size exceeds the maximum allowed limit of {max_file_size} MB"}, 400
+
+    # Reject oversized uploads before reading the body, then cap the body while it is parsed
+    # (the multipart parser spools files to temporary files instead of keeping them in memory)
+    max_request_bytes = max_file_bytes + UPLOAD_FORM_OVERHEAD_BYTES
+    if request.content_length is not None and request.content_length > max_request_bytes:
+        return size_error
+    request.max_content_length = max_request_bytes
 
     # Check if the request contains a file
-    if "file" not in request.files:
-        return {"error": "Missing required file 'file'"}, 400
+    try:
+        if "file" not in request.files:
+            return {"error": "Missing required file 'file'"}, 400
+    except RequestEntityTooLarge:
+        return size_error
 
     file = request.files["file"]
 
@@ -74,17 +153,6 @@ def project_objects_create(project_id: str):
         return {"error": "Invalid file content. The file is not a valid PDF."}, 400
     file.seek(0)  # Reset file pointer after reading
 
-    # Read the file content as blob
-    file_blob = file.read()
-
-    # Block if max file size across the system exceeded
-    max_file_size = SYSTEM_MAX_UPLOAD_SIZE_MB
-    system_max_file_size = get_system_property(SystemProperty.OBJECT_MAX_UPLOAD_SIZE_MB)
-    if system_max_file_size is not None:
-        max_file_size = int(system_max_file_size)
-    if len(file_blob) is not None and len(file_blob) > max_file_size * 1024 * 1024: 
-        return {"error": f"File size exceeds the maximum allowed limit of {max_file_size} MB"}, 400
-
     # Extract metadata from the request
     data = request.form or request.json
     name = data.get("name")
@@ -95,6 +163,7 @@ def project_objects_create(project_id: str):
 
     if not path.startswith("/"):
         return {"error": "Invalid path. Path must start with '/'."}, 400
+    path = folder_path(path)
 
     if not name:
         return {"error": "Missing required field 'name'"}, 400
@@ -102,95 +171,57 @@ def project_objects_create(project_id: str):
     if status not in ObjectStatus.values():
         return {"error": f"Invalid status. Valid statuses are: {', '.join(ObjectStatus.values())}"}, 400
 
-    db = Database()
+    db = get_db()
     try:
         # Check if the user is a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        if require_role(project_id) is None:
             return {"error": "Forbidden: You are not a member of this project"}, 403
 
-        # Insert the new object into the database
+        # Stream the file to the blob store (hashed while copied), then insert the new object into the database
+        try:
+            raw_hash, raw_size = blob_store.put(file.stream, max_size=max_file_bytes)
+        except BlobTooLargeError:
+            return size_error
         object_id = str(uuid.uuid4())
         db.c.execute(
             '''
-            INSERT INTO object (id, path, user_id, project_id, name, description, version, status, raw)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO object (id, path, user_id, project_id, name, description, version, status, raw_hash, raw_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''',
-            (object_id, path, user_id, project_id, name, description, version, status, file_blob)
+            (object_id, path, user_id, project_id, name, description, version, status, raw_hash, raw_size)
         )
+        update_folder_counts(db.c, project_id, path, 1)
+        event = {"name": name, "path": path, "status": status}
+        webhooks = enqueue_event_webhooks(db.c, EventType.OBJECT_CREATED, int(project_id), object_id, event, status=status)
         db.commit()
         db.log(user_id, f"project object add (project_id={project_id}, object_id={object_id})")
+        publish_event(EventType.OBJECT_CREATED, project_id, object_id, event)
+        if webhooks:
+            webhook_dispatcher.wake()
         return {"message": "Object created successfully", "object_id": object_id}, 201
 
     except Exception as e:
         log.error(f"Error creating object in project {project_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_object_bp.route("/api/objects/<object_id>", methods=["GET"])
+@auth_required
 def object_get(object_id: str, load_raw: bool=False):
     """ Get detail information of the object """
 
     if request.args.get("raw", "0") == "1":
         load_raw = True
 
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
-
-    db = Database()
+    db = get_db()
     try:
-        # Check if the user is a member of the project associated with the object
-        project_check = db.c.execute(
-            '''
-            SELECT project_id
-            FROM object
-            WHERE id = ?
-            ''',
-            (object_id,)
-        ).fetchone()
-
-        if not project_check:
-            return {"error": "Object not found"}, 404
-
-        project_id = project_check[0]
-
-        member_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
-            return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
-
         # Fetch the object details
-        object_row = db.c.execute(
-            '''
-            SELECT id, path, user_id, project_id, name, description, comments, version, status, upload_date, update_date
-            FROM object
-            WHERE id = ?
-            ''',
-            (object_id,)
-        ).fetchone()
-
-        if not object_row:
+        obj = get_object(db, object_id)
+        if obj is None:
             return {"error": "Object not found"}, 404
 
-        obj = Object.from_db_row(object_row)
+        # Check if the user is a member of the project associated with the object
+        if require_role(obj.project_id) is None:
+            return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
 
         # Load raw data if available
         if load_raw:
@@ -204,27 +235,77 @@ def object_get(object_id: str, load_raw: bool=False):
     except Exception as e:
         log.error(f"Error fetching object {object_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
+
+@api_object_bp.route("/api/objects/<object_id>/content", methods=["GET", "HEAD"])
+@auth_required
+def object_content(object_id: str):
+    """ Stream the PDF content of the object (HEAD: size, hash and update time only) """
+
+    db = get_db()
+    try:
+        obj = get_object(db, object_id)
+        if obj is None:
+            return {"error": "Object not found"}, 404
+
+        # Check if the user is a member of the project associated with the object
+        if require_role(obj.project_id) is None:
+            return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
+
+        response = send_object_content(obj, db)
+        if response is None:
+            return {"error": "Object content not found"}, 404
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error fetching content of object {object_id}: {e}")
+        return {"error": "Internal server error"}, 500
+
+@api_object_bp.route("/api/objects/<object_id>/content/signed", methods=["GET", "HEAD"])
+def object_content_signed(object_id: str):
+    """ Stream the PDF content of the object with a signed link, sent with the webhooks (no authentication) """
+    content_hash = request.args.get("hash", "")
+    if not check_content_signature(object_id, content_hash, request.args.get("expires"), request.args.get("signature", "")):
+        return {"error": "Forbidden: The link is not valid or it is expired"}, 403
+
+    db = get_db()
+    try:
+        obj = get_object(db, object_id)
+        if obj is None:
+            return {"error": "Object not found"}, 404
+
+        # The link is valid only for the content it was made for
+        if (obj.raw_hash or "") != content_hash:
+            return {"error": "Gone: The content of the object changed"}, 410
+
+        response = send_object_content(obj, db)
+        if response is None:
+            return {"error": "Object content not found"}, 404
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error fetching content of object {object_id} with a signed link: {e}")
+        return {"error": "Internal server error"}, 500
 
 @api_object_bp.route("/api/objects/<object_id>", methods=["DELETE"])
+@auth_required
 def object_delete(object_id: str):
     """ Delete an object """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
-    db = Database()
+    db = get_db()
     try:
         # Check if object delete is disabled across the system
-        if get_system_property(SystemProperty.OBJECT_DELETE_DISABLED) == "TRUE":
+        if system_settings.get_bool(SystemProperty.OBJECT_DELETE_DISABLED):
             return {"error": "Object deletion is disabled across the system"}, 403
 
         # Check if the object exists
         object_row = db.c.execute(
             '''
-            SELECT id, user_id, project_id
+            SELECT id, user_id, project_id, path, status
             FROM object
             WHERE id = ?
             ''',
@@ -238,25 +319,16 @@ def object_delete(object_id: str):
         project_id = object_row[2]
 
         # Check if the user is a member of the project associated with the object
-        member_check = db.c.execute(
-            '''
-            SELECT role
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        user_role = require_role(project_id)
+        if user_role is None:
             return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
 
-        user_role = member_check[0]
-
         # Only the object owner or a project owner can delete the object
-        if user_id != object_user_id and user_role != Role.OWNER.value:
+        if user_id != object_user_id and user_role != Role.OWNER:
             return {"error": "Forbidden: Only the object author or a project owner can delete the object"}, 403
 
-        # Delete the object
+        # Delete the object with its comments
+        db.c.execute("DELETE FROM comment WHERE object_id = ?", (object_id,))
         db.c.execute(
             '''
             DELETE FROM object
@@ -264,23 +336,24 @@ def object_delete(object_id: str):
             ''',
             (object_id,)
         )
+        update_folder_counts(db.c, project_id, object_row[3], -1)
+        webhooks = enqueue_event_webhooks(db.c, EventType.OBJECT_DELETED, project_id, object_id, {"status": object_row[4]}, status=object_row[4])
         db.commit()
         db.log(user_id, f"project object delete (project_id={project_id}, object_id={object_id})")
+        publish_event(EventType.OBJECT_DELETED, project_id, object_id)
+        if webhooks:
+            webhook_dispatcher.wake()
         return {"message": "Object deleted successfully"}, 200
 
     except Exception as e:
         log.error(f"Error deleting object {object_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_object_bp.route("/api/objects/<object_id>", methods=["PUT"])
+@auth_required
 def object_update(object_id: str):
     """ Update an object """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
     data = request.form or request.json
     if not data:
@@ -288,26 +361,36 @@ def object_update(object_id: str):
 
     log.debug(data.items())
 
-    allowed_fields = {"name", "description", "comments", "version", "status", "path"}
+    allowed_fields = {"name", "description", "version", "status", "path"}
     allowed_fields_for_member  = {"name", "description", "version", "path"}
-    allowed_fields_for_reviewer = {"name", "description", "comments", "version", "status", "path"}
+    allowed_fields_for_reviewer = {"name", "description", "version", "status", "path"}
     updates = {key: value for key, value in data.items() if key in allowed_fields}
 
-    if "comments" in updates.keys():
-        updates["comments"] = json.dumps(updates["comments"])
+    # Deprecated: the comments have their own endpoints, the field is ignored until the next version (then rejected)
+    headers = {}
+    if "comments" in data:
+        headers = {
+            "Deprecation": "true",
+            "Warning": f'299 - "The comments field is ignored, use /api/objects/{object_id}/comments"',
+        }
 
     if "status" in updates and updates["status"] not in ObjectStatus.values():
         return {"error": f"Invalid status. Valid statuses are: {', '.join(ObjectStatus.values())}"}, 400
 
-    if not updates:
+    if "path" in updates:
+        if not str(updates["path"]).startswith("/"):
+            return {"error": "Invalid path. Path must start with '/'."}, 400
+        updates["path"] = folder_path(updates["path"])
+
+    if not updates and not headers:
         return {"error": "No valid fields to update"}, 400
 
-    db = Database()
+    db = get_db()
     try:
         # Check if the object exists
         object_row = db.c.execute(
             '''
-            SELECT id, user_id, project_id
+            SELECT id, user_id, project_id, path
             FROM object
             WHERE id = ?
             ''',
@@ -321,65 +404,50 @@ def object_update(object_id: str):
         project_id = object_row[2]
 
         # Check if the user is a member of the project associated with the object
-        member_check = db.c.execute(
-            '''
-            SELECT role
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        user_role = require_role(project_id)
+        if user_role is None:
             return {"error": "Forbidden: You are not a member of the project associated with this object"}, 403
 
-        user_role = member_check[0]
-
         # Allowed fields update for member
-        if user_role == Role.MEMBER.value and not all([key in allowed_fields_for_member for key in updates.keys()]):
+        if user_role == Role.MEMBER and not all([key in allowed_fields_for_member for key in updates.keys()]):
             return {"error": "Forbidden: Only the project owner or reviewer can update those fields"}, 403
         
         # Allowed fields update for reviewer
-        if user_role == Role.REVIEWER.value and not all([key in allowed_fields_for_reviewer for key in updates.keys()]):
+        if user_role == Role.REVIEWER and not all([key in allowed_fields_for_reviewer for key in updates.keys()]):
             return {"error": "Forbidden: Only the project owner can update those object fields"}, 403
         
         # Allowed fields update for owner
-        if user_role == Role.OWNER.value and not all([key in allowed_fields for key in updates.keys()]):
+        if user_role == Role.OWNER and not all([key in allowed_fields for key in updates.keys()]):
             return {"error": "Forbidden: You cannot update those object fields"}, 403
 
+        if not updates:
+            return {"message": "Object not updated: the comments field is ignored"}, 200, headers
+
         # Build the update query dynamically
         update_query = "UPDATE object SET update_date = CURRENT_TIMESTAMP, " + ", ".join(f"{key} = ?" for key in updates.keys()) + " WHERE id = ?"
         db.c.execute(update_query, (*updates.values(), object_id))
+        if "path" in updates and updates["path"] != folder_path(object_row[3]):
+            update_folder_counts(db.c, project_id, object_row[3], -1)
+            update_folder_counts(db.c, project_id, updates["path"], 1)
+
+        # Webhook: if status changed, notify the subscribed members (queued with the update, sent by the dispatcher,
+        # the changes of the same object within the coalescing window are sent as one)
+        webhooks = 0
+        if "status" in updates.keys():
+            updated_at = datetime.datetime.now().isoformat() + "Z"
+            webhooks = enqueue_event_webhooks(db.c, EventType.OBJECT_UPDATED, project_id, object_id, {
+                "updated_fields": {"status" : updates["status"]},
+                "updated_at": updated_at,
+                "transitions": [{"status": updates["status"], "updated_at": updated_at}],
+            }, status=updates["status"])
         db.commit()
         db.log(user_id, f"project object update (project_id={project_id}, keys={"|".join(f"{key}" for key in updates.keys())})")
+        publish_event(EventType.OBJECT_UPDATED, project_id, object_id, {"updated_fields": updates})
+        if webhooks:
+            webhook_dispatcher.wake()
 
-        # Webhook: if status changed, trigger notification for reviewers and owners
-        if get_system_property(SystemProperty.WEBHOOKS_DISABLED) != "TRUE" and "status" in updates.keys():
-            webhooks = get_user_webhooks(project_id)
-            seconds = 1
-            for wh_user_id, wh_url in webhooks.items():
-                current_app.scheduler.add_job(
-                    func=call_webhook,
-                    args=(wh_url, {
-                        "event": "object.updated",
-                        "object_id": object_id,
-                        "project_id": project_id,
-                        "updated_fields": {"status" : updates["status"]},
-                        "updated_at": datetime.datetime.now().isoformat() + "Z",
-                    }, {"Content-Type": "application/json", "User-Agent": f"RoundReview/{VERSION}"}),
-                    name=f"webhook_object_updated_{object_id}_user_{wh_user_id}",
-                    replace_existing=False,
-                    max_instances=1,
-                    misfire_grace_time=300,
-                    trigger='date',
-                    run_date=datetime.datetime.now() + datetime.timedelta(seconds=seconds)
-                )
-                seconds += 2 
-
-        return {"message": "Object updated successfully"}, 200
+        return {"message": "Object updated successfully"}, 200, headers
 
     except Exception as e:
         log.error(f"Error updating object {object_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
@@ -1,49 +1,35 @@
 import uuid, json
-from flask import request, session, Blueprint
-from ..utils import is_logged, get_system_property, get_user_from_api_key, check_authentication
+from flask import request, g, Blueprint
+from ..utils import auth_required, load_current_user, require_role, forget_project_role, get_db
 from ...config import log
-from ...database import Database
+from ... import queries
+from ...cache import system_settings
+from ...services import get_user_projects, get_project_users
 from ...models import Project, Role, SystemProperty
 
 api_project_bp = Blueprint('api_project', __name__)
+api_project_bp.before_request(load_current_user)
 
 @api_project_bp.route("/api/projects", methods=["GET"])
+@auth_required
 def project_list():
     """ List of the projects (where the user is involved)"""
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
+    user_id = g.user.id
 
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
-
-    db = Database()
+    db = get_db()
     try:
         # Fetch projects where the user is involved
-        rows = db.c.execute(
-            '''
-            SELECT p.id, p.title, p.deleted
-            FROM project p
-            INNER JOIN project_user pu ON p.id = pu.project_id
-            WHERE pu.user_id = ? AND p.deleted = 0
-            ''',
-            (user_id,)
-        ).fetchall()
-
-        # Convert rows to Project instances and then to dictionaries
-        projects = [Project.from_db_row(row).to_dict() for row in rows]
+        projects = [project.to_dict() for project in get_user_projects(db, user_id)]
         return {"projects": projects}, 200
     except Exception as e:
         log.error(f"Error fetching projects: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_project_bp.route("/api/projects", methods=["POST"])
+@auth_required
 def project_create():
     """ Create a new project """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
     data = request.form or request.json
     log.debug(data)
@@ -52,10 +38,10 @@ def project_create():
 
     title = data["title"]
 
-    db = Database()
+    db = get_db()
     try:
         # Check if project creation is disabled across the system
-        if get_system_property(SystemProperty.PROJECT_CREATE_DISABLED) == "TRUE":
+        if system_settings.get_bool(SystemProperty.PROJECT_CREATE_DISABLED):
             return {"error": "Project creation is disabled across the system"}, 403
 
         # Create the new project
@@ -71,22 +57,19 @@ def project_create():
             (project_id, user_id, Role.OWNER.value)
         )
         db.commit()
+        forget_project_role(project_id)
         db.log(user_id, f"project user add (project_id={project_id}, user_id={user_id}, role={Role.OWNER.value})")
         return {"message": "Project created successfully", "project_id": project_id}, 201
     except Exception as e:
         log.error(f"Error creating project: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_project_bp.route("/api/projects/<project_id>", methods=["PUT"])
+@auth_required
 def project_update(project_id:str):
     """ Update an existing project (only for project owners) """
 
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
     data = request.form or request.json
     if not data or "title" not in data:
@@ -94,19 +77,10 @@ def project_update(project_id:str):
 
     title = data["title"]
 
-    db = Database()
+    db = get_db()
     try:
         # Check if the user is the owner of the project
-        owner_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ? AND role = ?
-            ''',
-            (project_id, user_id, Role.OWNER.value)
-        ).fetchone()
-
-        if not owner_check:
+        if require_role(project_id, {Role.OWNER}) is None:
             return {"error": "Forbidden: Only project owners can update the project"}, 403
 
         # Update the project title
@@ -125,61 +99,30 @@ def project_update(project_id:str):
     except Exception as e:
         log.error(f"Error updating project: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_project_bp.route("/api/projects/<project_id>/users", methods=["GET"])
+@auth_required
 def project_users_list(project_id:str):
     """ Retrieve a list of all users who are members of the project """
 
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
-
-    db = Database()
+    db = get_db()
     try:
         # Check if the user is a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, user_id)
-        ).fetchone()
-
-        if not member_check:
+        if require_role(project_id) is None:
             return {"error": "Forbidden: You are not a member of this project"}, 403
 
         # Fetch all users in the project
-        rows = db.c.execute(
-            '''
-            SELECT u.id, u.name, u.email, pu.role
-            FROM user u
-            INNER JOIN project_user pu ON u.id = pu.user_id
-            WHERE pu.project_id = ? AND u.deleted = 0
-            ''',
-            (project_id,)
-        ).fetchall()
-
-        # Convert rows to dictionaries
-        users = [{"id": row[0], "name": row[1], "role": row[3]} for row in rows]
-        return {"users": users}, 200
+        return {"users": get_project_users(db, project_id)}, 200
 
     except Exception as e:
         log.error(f"Error fetching users for project {project_id}: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_project_bp.route("/api/projects/<project_id>/join", methods=["POST"])
+@auth_required
 def project_join(project_id:str):
     """ Add a new member using their username to a project (only for project owners) """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
     data = request.form or request.json
     if not data or "username" not in data or "role" not in data:
@@ -191,19 +134,10 @@ def project_join(project_id:str):
     if role not in Role.values():
         return {"error": f"Invalid role. Valid roles are: {', '.join(Role.values())}"}, 400
 
-    db = Database()
+    db = get_db()
     try:
         # Check if the user is the owner of the project
-        owner_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ? AND role = ?
-            ''',
-            (project_id, user_id, Role.OWNER.value)
-        ).fetchone()
-
-        if not owner_check:
+        if require_role(project_id, {Role.OWNER}) is None:
             return {"error": "Forbidden: Only project owners can add members"}, 403
 
         # Check if the user with the given username exists
@@ -222,14 +156,7 @@ def project_join(project_id:str):
         new_user_id = user_row[0]
 
         # Check if the user is already a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT 1
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, new_user_id)
-        ).fetchone()
+        member_check = db.c.execute(queries.PROJECT_MEMBER_ROLE, (project_id, new_user_id)).fetchone()
 
         if member_check:
             return {"error": "User is already a member of the project"}, 400
@@ -243,22 +170,19 @@ def project_join(project_id:str):
             (project_id, new_user_id, role)
         )
         db.commit()
+        forget_project_role(project_id)
         db.log(user_id, f"project user join (project_id={project_id}, user_id={new_user_id}, role={role})")
         return {"message": "User added to the project successfully"}, 201
 
     except Exception as e:
         log.error(f"Error adding user to project: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
 @api_project_bp.route("/api/projects/<project_id>/unjoin", methods=["DELETE"])
+@auth_required
 def project_unjoin(project_id:str):
     """ Remove a member using their username from a project (only for project owners or the member themselves) """
-    if not check_authentication():
-        return {"error": "Unauthorized"}, 401
-
-    user_id = session["user"].id if is_logged() else get_user_from_api_key(request.headers.get("x-api-key")).id
+    user_id = g.user.id
 
     data = request.form or request.json
     if not data or "username" not in data:
@@ -266,7 +190,7 @@ def project_unjoin(project_id:str):
 
     username = data["username"]
 
-    db = Database()
+    db = get_db()
     try:
         # Check if the user with the given username exists
         user_row = db.c.execute(
@@ -284,14 +208,7 @@ def project_unjoin(project_id:str):
         target_user_id = user_row[0]
 
         # Check if the target user is a member of the project
-        member_check = db.c.execute(
-            '''
-            SELECT role
-            FROM project_user
-            WHERE project_id = ? AND user_id = ?
-            ''',
-            (project_id, target_user_id)
-        ).fetchone()
+        member_check = db.c.execute(queries.PROJECT_MEMBER_ROLE, (project_id, target_user_id)).fetchone()
 
         if not member_check:
             return {"error": "User is not a member of the project"}, 400
@@ -300,16 +217,7 @@ def project_unjoin(project_id:str):
 
         # Check if the requester is the owner or the target user themselves
         if target_user_id != user_id:
-            owner_check = db.c.execute(
-                '''
-                SELECT 1
-                FROM project_user
-                WHERE project_id = ? AND user_id = ? AND role = ?
-                ''',
-                (project_id, user_id, Role.OWNER.value)
-            ).fetchone()
-
-            if not owner_check:
+            if require_role(project_id, {Role.OWNER}) is None:
                 return {"error": "Forbidden: Only project owners can remove other members"}, 403
 
         # Prevent owners from removing themselves if they are the only owner
@@ -335,12 +243,11 @@ def project_unjoin(project_id:str):
             (project_id, target_user_id)
         )
         db.commit()
+        forget_project_role(project_id)
         db.log(user_id, f"project user join (project_id={project_id}, user_id={target_user_id})")
         return {"message": "User removed from the project successfully"}, 200
 
     except Exception as e:
         log.error(f"Error removing user from project: {e}")
         return {"error": "Internal server error"}, 500
-    finally:
-        db.close()
 
@@ -0,0 +1,63 @@
+from flask import request, g, Blueprint
+from ..utils import auth_required, load_current_user, get_db
+from ...config import log
+from ...database import Database
+from ... import queries
+from ...webhooks import WebhookSubscription
+
+api_webhook_bp = Blueprint('api_webhook', __name__)
+api_webhook_bp.before_request(load_current_user)
+
+def _load_subscription(db:Database, user_id:int) -> WebhookSubscription:
+    properties = dict(db.c.execute(queries.USER_PROPERTIES, (user_id,)).fetchall())
+    return WebhookSubscription.from_properties(user_id, properties)
+
+@api_webhook_bp.route("/api/webhooks/subscription", methods=["GET"])
+@auth_required
+def webhook_subscription_get():
+    """ Webhook URL of the current user with the filters of the events sent to it """
+    db = get_db()
+    try:
+        return {"subscription": _load_subscription(db, g.user.id).to_dict()}, 200
+
+    except Exception as e:
+        log.error(f"Error fetching the webhook subscription of user {g.user.id}: {e}")
+        return {"error": "Internal server error"}, 500
+
+@api_webhook_bp.route("/api/webhooks/subscription", methods=["PUT"])
+@auth_required
+def webhook_subscription_update():
+    """ Change the filters of the events sent to the webhook of the current user and the object fields
+        embedded in them (events, project_ids, statuses, fields: a missing or null filter is reset to its default) """
+    user_id = g.user.id
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"error": "Missing request body"}, 400
+
+    events, project_ids, statuses, fields = data.get("events"), data.get("project_ids"), data.get("statuses"), data.get("fields")
+    if any(value is not None and not isinstance(value, list) for value in (events, project_ids, statuses, fields)):
+        return {"error": "Invalid filters. 'events', 'project_ids', 'statuses' and 'fields' must be lists or null"}, 400
+    error = WebhookSubscription.check_filters(events, project_ids, statuses, fields)
+    if error is not None:
+        return {"error": error}, 400
+
+    db = get_db()
+    try:
+        subscription = _load_subscription(db, user_id)
+        subscription = WebhookSubscription(
+            user_id,
+            subscription.url,
+            events=events,
+            project_ids=[int(project_id) for project_id in project_ids] if project_ids else None,
+            statuses=statuses,
+            fields=fields,
+        )
+        subscription.save_filters(db.c)
+        db.commit()
+        db.log(user_id, f"webhook subscription update (events={"|".join(subscription.events)})")
+        return {"message": "Webhook subscription updated successfully", "subscription": subscription.to_dict()}, 200
+
+    except Exception as e:
+        log.error(f"Error updating the webhook subscription of user {user_id}: {e}")
+        return {"error": "Internal server error"}, 500
@@ -2,8 +2,8 @@ from flask import render_template, request, session, redirect, Blueprint, url_fo
 from .utils import is_logged, is_logged_admin
 from ..config import VERSION, log, GITHUB_OAUTH_ENABLED, APP_NAME
 from ..database import Database
+from ..cache import system_settings
 from ..models import User, Log, SystemProperty, Property, LoginProvider
-from .utils import get_system_property
 
 
 basic_blueprint = Blueprint('basic', __name__)
@@ -38,11 +38,12 @@ def login():
             )
         ).fetchone()
         if not res:
+            db.close()
             output = ("error", "Wrong email or password")
         else:
             user = User(res)
             # Check if user login is disabled across the system, but allow admin
-            if get_system_property(SystemProperty.USER_LOGIN_DISABLED) == "TRUE":
+            if system_settings.get_bool(SystemProperty.USER_LOGIN_DISABLED):
                 db.close()
                 output = ("error", "User login is disabled across the system")
             else:
@@ -95,7 +96,7 @@ def login_callback_github():
         else:
             user = User(res)
             # Check if user login is disabled across the system, but allow admin
-            if get_system_property(SystemProperty.USER_LOGIN_DISABLED) == "TRUE":
+            if system_settings.get_bool(SystemProperty.USER_LOGIN_DISABLED):
                 db.close()
                 output = ("error", "User login is disabled across the system")
             else:
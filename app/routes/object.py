@@ -1,12 +1,10 @@
-import base64
 from types import SimpleNamespace
 from flask import render_template, request, session, Blueprint, redirect
-from .utils import is_logged, is_logged_admin
+from .utils import is_logged, is_logged_admin, send_object_content, get_project_role, require_role, get_db
 from ..config import VERSION, log
-from ..database import Database
-from ..models import Project, Object, ObjectStatus, Role, Review
-from .api import project_list, object_get, object_update, object_review_get
-from .project import get_user_role_in_project
+from ..models import ObjectStatus, Role
+from ..services import get_user_project, get_object, get_object_reviews
+from .api import object_update
 
 
 object_blueprint = Blueprint('object', __name__)
@@ -18,32 +16,19 @@ def view_object(project_id: str, object_id: str):
     if not is_logged():
         return redirect("/")
     output = ()
-    project:Project = None
-    obj:Object = None
-    can_edit = True if get_user_role_in_project(project_id) in [Role.OWNER, Role.REVIEWER, Role.MEMBER] else False
-    can_review = True if get_user_role_in_project(project_id) in [Role.OWNER, Role.REVIEWER] else False
-
-    res, status = project_list()
-    if status == 200:
-        project = next((Project.from_dict(elem) for elem in res["projects"] if elem["id"] == int(project_id)), None)
-        
-    res, status = object_get(object_id, load_raw=False)
-    if status == 200:
-        obj = Object.from_dict(res["object"])
-    else:
-        output = ("error", res["error"])
-
-    res, status = object_review_get(project_id=project_id, object_id=object_id)
-    reviews = []
-    if status == 200:
-        reviews = [Review.from_dict(data=review) for review in res["reviews"]] 
-    else:
-        output = ("error", res["error"])
-
-    db = Database()
+    project_role = get_project_role(project_id)
+    can_edit = project_role in [Role.OWNER, Role.REVIEWER, Role.MEMBER]
+    can_review = project_role in [Role.OWNER, Role.REVIEWER]
+
+    db = get_db()
+    project = get_user_project(db, project_id, session["user"].id)
+    obj = get_object(db, object_id, project_id=project_id)
+    if project is None or obj is None:
+        return redirect(f"/projects/{project_id}/")
+
+    reviews = get_object_reviews(db, object_id)
     res = obj.load_user(db=db)
     log.debug("User loading in object: %s", res)
-    db.close()
 
     return render_template(
         "project/object/view.html",
@@ -57,7 +42,7 @@ def view_object(project_id: str, object_id: str):
         admin=is_logged_admin(),
         can_edit=can_edit,
         can_review=can_review,
-        project_role=get_user_role_in_project(project_id),
+        project_role=project_role,
         object_statuses=ObjectStatus,
         reviews=reviews,
     )
@@ -65,26 +50,21 @@ def view_object(project_id: str, object_id: str):
 
 @object_blueprint.route('/projects/<project_id>/objects/<object_id>/file', methods=["GET"])
 def get_file(project_id: str, object_id: str):
-    """ Serve the file associated with the object """
+    """ Serve the file associated with the object (streamed, with Range support) """
     if not is_logged():
         return redirect("/")
-    res, status = object_get(object_id, load_raw=True)
-    if status == 200:
-        obj = Object.from_dict(res["object"])
-        if obj.raw is not None:
-            raw_object = base64.b64decode(obj.raw)
-            return (
-                raw_object,
-                200,
-                {
-                    "Content-Type": "application/pdf",
-                    "Content-Disposition": f"inline; filename={obj.name}.pdf"
-                }
-            )
-        else:
-            return {"error": "PDF content not found"}, 404
-    else:
-        return {"error": f"Error fetching object: {res['error']}"}, status
+    db = get_db()
+    obj = get_object(db, object_id, project_id=project_id)
+    if obj is None:
+        return {"error": "Error fetching object: Object not found"}, 404
+
+    if require_role(project_id) is None:
+        return {"error": "Error fetching object: Forbidden: You are not a member of the project associated with this object"}, 403
+
+    response = send_object_content(obj, db)
+    if response is None:
+        return {"error": "PDF content not found"}, 404
+    return response
 
 
 @object_blueprint.route('/projects/<project_id>/objects/<object_id>/edit', methods=["GET", "POST"])
@@ -93,22 +73,20 @@ def edit_object(project_id: str, object_id: str):
     if not is_logged():
         return redirect("/")
     output = ()
-    obj:Object = None
-    can_edit = True if get_user_role_in_project(project_id) in [Role.OWNER, Role.REVIEWER, Role.MEMBER] else False
+    project_role = get_project_role(project_id)
+    can_edit = project_role in [Role.OWNER, Role.REVIEWER, Role.MEMBER]
 
     # Update documentation
     if request.method == "POST":
-        res, status = object_update(request.form.get('object_id', None))
+        res, status, *_ = object_update(request.form.get('object_id', None))
         if status == 200:
             output = ("success", "Document information updated successfully!")
         else:
             output = ("error", res["error"])
 
-    res, status = object_get(object_id, load_raw=False)
-    if status == 200:
-        obj = Object.from_dict(res["object"])
-    else:
-        output = ("error", res["error"])
+    obj = get_object(get_db(), object_id, project_id=project_id)
+    if obj is None or require_role(project_id) is None:
+        return redirect(f"/projects/{project_id}/")
 
     return render_template(
         "project/object/edit.html",
@@ -121,6 +99,6 @@ def edit_object(project_id: str, object_id: str):
         logged=is_logged(),
         admin=is_logged_admin(),
         can_edit=can_edit,
-        project_role=get_user_role_in_project(project_id),
+        project_role=project_role,
         object_statuses=ObjectStatus,
     )
\ No newline at end of file
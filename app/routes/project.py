@@ -1,36 +1,21 @@
 from datetime import datetime
 from types import SimpleNamespace
 from flask import render_template, request, session, redirect, Blueprint
-from .utils import is_logged, is_logged_admin, build_object_tree
+from .utils import is_logged, is_logged_admin, get_project_role, remember_project_role, get_db
 from ..config import VERSION, log
 from ..database import Database
 from ..models import Project, Object, ObjectStatus, Role, ProjectUser
+from ..folders import ROOT_PATH
+from ..services import get_user_projects, get_user_project, get_project_users, get_project_dashboard, get_folder_objects
 from .api import (
-    project_list, 
     project_update,
     project_create, 
-    project_objects_list, 
     project_objects_create, 
-    project_users_list,
     project_join,
     project_unjoin,
     object_delete,
 )
 
-def get_user_role_in_project(project_id:str) -> Role:
-    """ Get the role of the current logged user in a specific project """
-    if not is_logged():
-        return Role.NO_ROLE
-    res, status = project_users_list(project_id)
-    if status != 200:
-        return Role.NO_ROLE
-    user_id = session["user"].id
-    for user in res["users"]:
-        if user["id"] == user_id:
-            return Role(user["role"]) if user["role"] in Role.values() else Role.NO_ROLE
-    return Role.NO_ROLE
-
-
 project_blueprint = Blueprint('project', __name__)
 
 
@@ -40,12 +25,7 @@ def list():
     if not is_logged():
         return redirect("/")
     output = ()
-    projects = {}
-    res, status = project_list()
-    if status == 200:
-        projects = [Project.from_dict(elem) for elem in res["projects"]]
-    else:
-        output = ("error", res["error"])
+    projects = get_user_projects(get_db(), session["user"].id)
     return render_template(
         "project/list.html",
         title="Your Projects",
@@ -91,10 +71,8 @@ def view_objects(project_id:str):
     path = request.args.get('path', '/') # Default to root if no path is provided
     object_id = request.form.get("object_id", None)
     output = ()
-    objects = {}
-    project = None
 
-    # Object deletion
+    # Object deletion (the permissions are checked by the API)
     if request.method == "POST" and request.args.get("delete", None) == "1" and object_id is not None:
         res, status = object_delete(object_id)
         if status == 200:
@@ -102,32 +80,33 @@ def view_objects(project_id:str):
         else:
             output = ("error", res["error"])
 
-    # Project Objects
-    res, status = project_list()
-    if status == 200:
-        project = [Project.from_dict(elem) for elem in res["projects"] if elem["id"] == int(project_id)][0]
-    res, status = project_objects_list(project_id)
-    if status == 200:
-        objects = [Object.from_dict(elem) for elem in res["objects"]]
-        tree = build_object_tree(objects)
-        last_objects = sorted(objects, key=lambda obj: obj.update_date, reverse=True)[:5]
-    else:
-        output = ("error", res["error"])
+    db = get_db()
+    dashboard = get_project_dashboard(db, project_id, session["user"].id)
+    if dashboard is None:
+        return redirect("/projects")
+    remember_project_role(project_id, dashboard.role)
+
+    # Top-level folders and objects, the subfolders are loaded on demand (see api_object.project_folder_list)
+    root_folder = {
+        "folders": [folder.to_dict() for folder in dashboard.folders],
+        "objects": [obj.to_dict() for obj in get_folder_objects(db, project_id, ROOT_PATH)],
+    }
 
     return render_template(
         "project/view.html",
-        title=project.title,
+        title=dashboard.project.title,
         user=session["user"],
-        last_objects=last_objects,
-        tree=tree,
+        last_objects=dashboard.recent_objects,
+        root_folder=root_folder,
+        status_colors={status.value: ObjectStatus.get_color(status) for status in ObjectStatus},
         path=path,
-        project=project,
+        project=dashboard.project,
         output=output,
         version=VERSION,
         logged=is_logged(),
         admin=is_logged_admin(),
         role=Role,
-        project_role=get_user_role_in_project(project_id),
+        project_role=dashboard.role,
     )
 
 
@@ -159,7 +138,7 @@ def create_object(project_id:str):
         data=data,
         logged=is_logged(),
         admin=is_logged_admin(),
-        project_role=get_user_role_in_project(project_id),
+        project_role=get_project_role(project_id),
     )
 
 
@@ -169,7 +148,6 @@ def manage_project(project_id:str):
     if not is_logged():
         return redirect("/")    
     output = ()
-    users = []
     action = request.args.get("action", None)
     if request.method == "POST":
         if action == "join":
@@ -195,15 +173,11 @@ def manage_project(project_id:str):
             res, status = {"error": "Wrong action"}, 400
             output = ("error", res["error"])
 
-    res, status = project_users_list(project_id)
-    if status == 200:
-        users = [elem for elem in res["users"]]
-    else:
-        output = ("error", res["error"])
-
-    res, status = project_list()
-    if status == 200:
-        project = [Project.from_dict(elem) for elem in res["projects"] if elem["id"] == int(project_id)][0]
+    db = get_db()
+    project = get_user_project(db, project_id, session["user"].id)
+    if project is None:
+        return redirect("/projects")
+    users = get_project_users(db, project_id)
 
     return render_template(
         "project/manage.html",
@@ -216,6 +190,6 @@ def manage_project(project_id:str):
         logged=is_logged(),
         admin=is_logged_admin(),
         role=Role,
-        project_role=get_user_role_in_project(project_id),
+        project_role=get_project_role(project_id),
     )
 
@@ -1,14 +1,22 @@
-import requests
 from uuid import uuid4
 from enum import Enum
 from flask import render_template, request, session, redirect, Blueprint
-from .utils import is_logged, is_logged_admin, log
+from .utils import is_logged, is_logged_admin
 from ..config import VERSION
 from ..database import Database
-from ..models import User, Property, LoginProvider
+from ..cache import api_key_cache
+from ..events import EventType
+from ..models import User, Property, LoginProvider, ObjectStatus, WebhookEndpoint
+from ..services import get_webhook_endpoint
+from ..webhooks import WebhookSubscription, WEBHOOK_OBJECT_FIELDS, schedule_endpoint_verification, webhook_dispatcher
 
 settings_blueprint = Blueprint('settings', __name__)
 
+def _webhook_endpoint(db:Database, user:User) -> WebhookEndpoint | None:
+    """ Health and last check of the webhook URL of the user """
+    url = user.properties.get(Property.WEBHOOK_URL.value)
+    return get_webhook_endpoint(db, url) if url else None
+
 class ResultMessage(Enum): 
     NO_ACTION_WARNING = ("warning", "Nothing to do, the settings remain the same.")
     OLD_PSW_ERROR = ("error", "Old password wrong")
@@ -16,7 +24,8 @@ class ResultMessage(Enum):
     SESSION_RELOAD_ERROR = ("error", "Unable to re-load session, please logout.")
     PASSWORD_UPDATE_SUCCESS = ("success", "Password changed successfully.")
     DEVELOPER_UPDATE_SUCCESS = ("success", "Developer settings updated successfully.")
-    DEVELOPER_WEBHOOK_ERROR = ("error", "The URL is not reachable correctly. Make sure the URL returns an http status code.")
+    DEVELOPER_WEBHOOK_ERROR = ("error", "Invalid webhook URL. It must start with http:// or https://.")
+    DEVELOPER_WEBHOOK_FILTERS_ERROR = ("error", "Invalid webhook filters. Choose at least one event and use the ids of your projects (\"content_url\" needs RR_BASE_URL).")
 
 
 @settings_blueprint.route("/settings", methods=["GET"])
@@ -25,6 +34,11 @@ def settings():
     if not is_logged():
         return redirect("/")
 
+    db = Database()
+    try:
+        endpoint = _webhook_endpoint(db, session["user"])
+    finally:
+        db.close()
     return render_template(
         "settings.html",
         user=session["user"],
@@ -34,6 +48,11 @@ def settings():
         version=VERSION,
         logged=is_logged(),
         admin=is_logged_admin(),
+        subscription=WebhookSubscription.from_properties(session["user"].id, session["user"].properties),
+        event_types=EventType.values(),
+        statuses=ObjectStatus.values(),
+        object_fields=WEBHOOK_OBJECT_FIELDS,
+        endpoint=endpoint,
     )
 
 
@@ -49,6 +68,12 @@ def update_properties():
 
     enable_api_key = request.form.get('enable_api_key', False)
     webhook_url = request.form.get('webhook_url', None)
+    webhook_url = webhook_url.strip() if webhook_url is not None else None
+    webhook_filters = request.form.get('webhook_filters', None) is not None
+    webhook_events = request.form.getlist('webhook_events')
+    webhook_projects = [project_id.strip() for project_id in request.form.get('webhook_projects', "").split(",") if project_id.strip()]
+    webhook_statuses = request.form.getlist('webhook_statuses')
+    webhook_fields = request.form.getlist('webhook_fields')
     
     # Enable API Key
     if not user.has_prop(Property.API_KEY) and enable_api_key:
@@ -58,6 +83,7 @@ def update_properties():
                 (Property.API_KEY.value, value, session['user'].id)
             )
         db.commit()
+        api_key_cache.invalidate(value)
         db.log(session["user"].id, f"settings update (target={Property.API_KEY.value}, action=enable, value={value})")
         if not user.reload_from_db(db):
             output = ResultMessage.SESSION_RELOAD_ERROR
@@ -71,6 +97,8 @@ def update_properties():
             (Property.API_KEY.value, session['user'].id)
         )
         db.commit()
+        # After the commit: a lookup in between would cache the key again from the database
+        api_key_cache.invalidate(user.prop(Property.API_KEY))
         db.log(session["user"].id, f"settings update (target={Property.API_KEY.value}, action=disable)")
         if not user.reload_from_db(db):
             output = ResultMessage.SESSION_RELOAD_ERROR
@@ -91,40 +119,46 @@ def update_properties():
                 output = ResultMessage.SESSION_RELOAD_ERROR
             else:
                 output = ResultMessage.DEVELOPER_UPDATE_SUCCESS
+        elif webhook_filters and WebhookSubscription.check_filters(webhook_events, webhook_projects, webhook_statuses, webhook_fields) is not None:
+            output = ResultMessage.DEVELOPER_WEBHOOK_FILTERS_ERROR
+        elif not webhook_url.startswith(("http://", "https://")):
+            output = ResultMessage.DEVELOPER_WEBHOOK_ERROR
         else:
-            # Try to reach the webhook URL
-            status_code = None
-            try:
-                req = requests.head(webhook_url, timeout=5)
-                status_code = req.status_code
-            except Exception as e:
-                log.error(f"Webhook URL validation error: {e}")
-
-            if status_code is None or status_code < 200:
-                output = ResultMessage.DEVELOPER_WEBHOOK_ERROR
+            # The URL is checked in the background, its result is shown with the health of the endpoint
+            if user.has_prop(Property.WEBHOOK_URL):
+                db.c.execute(
+                    'UPDATE user_property SET value = ? WHERE key = ? AND user_id = ?', 
+                    (webhook_url, Property.WEBHOOK_URL.value, session['user'].id)
+                )
+                action = "update"
             else:
-                if user.has_prop(Property.WEBHOOK_URL):
-                    db.c.execute(
-                        'UPDATE user_property SET value = ? WHERE key = ? AND user_id = ?', 
-                        (webhook_url, Property.WEBHOOK_URL.value, session['user'].id)
-                    )
-                    action = "update"
-                else:
-                    db.c.execute(
-                        'INSERT INTO user_property (key, value, user_id) VALUES (?,?,?)', 
-                        (Property.WEBHOOK_URL.value, webhook_url, session['user'].id)
-                    )
-                    action = "enable"
-                db.commit()
-                db.log(session["user"].id, f"settings update (target={Property.WEBHOOK_URL.value}, action={action}, value={webhook_url})")
+                db.c.execute(
+                    'INSERT INTO user_property (key, value, user_id) VALUES (?,?,?)', 
+                    (Property.WEBHOOK_URL.value, webhook_url, session['user'].id)
+                )
+                action = "enable"
+            if webhook_filters:
+                WebhookSubscription(
+                    user.id,
+                    webhook_url,
+                    events=webhook_events,
+                    project_ids=[int(project_id) for project_id in webhook_projects],
+                    statuses=webhook_statuses,
+                    fields=webhook_fields,
+                ).save_filters(db.c)
+            schedule_endpoint_verification(db.c, webhook_url)
+            db.commit()
+            webhook_dispatcher.verify(webhook_url)
+            db.log(session["user"].id, f"settings update (target={Property.WEBHOOK_URL.value}, action={action}, value={webhook_url})")
 
-                if not user.reload_from_db(db):
-                    output = ResultMessage.SESSION_RELOAD_ERROR
-                else:
-                    output = ResultMessage.DEVELOPER_UPDATE_SUCCESS
+            if not user.reload_from_db(db):
+                output = ResultMessage.SESSION_RELOAD_ERROR
+            else:
+                output = ResultMessage.DEVELOPER_UPDATE_SUCCESS
     else:
         output = ResultMessage.NO_ACTION_WARNING
 
+    endpoint = _webhook_endpoint(db, session["user"])
     db.close()
     return render_template(
         "settings.html",
@@ -136,6 +170,11 @@ def update_properties():
         version=VERSION,
         logged=is_logged(),
         admin=is_logged_admin(),
+        subscription=WebhookSubscription.from_properties(session["user"].id, session["user"].properties),
+        event_types=EventType.values(),
+        statuses=ObjectStatus.values(),
+        object_fields=WEBHOOK_OBJECT_FIELDS,
+        endpoint=endpoint,
     )
 
 @settings_blueprint.route("/settings/password", methods=["POST"])
@@ -164,6 +203,7 @@ def update_password():
             else:
                 db.log(session["user"].id, "settings update (target=password)")
                 output = ResultMessage.PASSWORD_UPDATE_SUCCESS
+    endpoint = _webhook_endpoint(db, session["user"])
     db.close()
     return render_template(
         "settings.html",
@@ -175,4 +215,9 @@ def update_password():
         version=VERSION,
         logged=is_logged(),
         admin=is_logged_admin(),
+        subscription=WebhookSubscription.from_properties(session["user"].id, session["user"].properties),
+        event_types=EventType.values(),
+        statuses=ObjectStatus.values(),
+        object_fields=WEBHOOK_OBJECT_FIELDS,
+        endpoint=endpoint,
     )
\ No newline at end of file
@@ -1,8 +1,18 @@
-import requests
-from flask import session, request
+import io
+import json
+import base64
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import session, request, g, send_file, after_this_request, Response
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
 from ..models import Object, User, Property, SystemProperty, Role
-from ..config import USER_SYSTEM_ID, log
+from ..config import log, DB_POOL_RETRY_AFTER_SECONDS
 from ..database import Database
+from ..pool import PoolExhaustedError
+from .. import queries
+from ..storage import blob_store
+from ..cache import api_key_cache, system_settings, MISSING
 
 # TODO: future improvement - this should be refactored
 
@@ -12,119 +22,204 @@ def is_logged():
 def is_logged_admin():
     return is_logged() and session["user"].admin
 
-def build_object_tree(objects:list[Object]) -> dict:
-    tree = {'root': {'_objects': []}}
-    for obj in objects:
-        path_parts = obj.path.strip('/').split('/')
-        current_level = tree['root']
-        if path_parts == ['']:
-            current_level['_objects'].append(obj)
-            continue
-        for part in path_parts:
-            if part not in current_level:
-                current_level[part] = {'_objects': []}
-            current_level = current_level[part]
-        current_level['_objects'].append(obj)
-    return tree
+def get_db() -> Database:
+    """ Database connection of the current request, closed when the request ends (see close_db) """
+    if "db" not in g:
+        g.db = Database()
+    return g.db
+
+def close_db(exception:BaseException|None=None) -> None:
+    """ Release the database connection of the request (app context teardown) """
+    db = g.pop("db", None)
+    if db is not None:
+        db.close()
+
+def handle_pool_exhausted(error:PoolExhaustedError):
+    """ No database connection available in time (app error handler): the server is busy, not broken """
+    log.warning(f"Request {request.method} {request.path} rejected: {error}")
+    headers = {"Retry-After": str(DB_POOL_RETRY_AFTER_SECONDS)}
+    if request.path.startswith("/api/"):
+        return {"error": "Service busy, try again later"}, 503, headers
+    return "Service busy, try again later", 503, headers
+
+def parse_db_timestamp(value:str|None) -> datetime | None:
+    """ Parse a CURRENT_TIMESTAMP value of the database (UTC) """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def to_db_timestamp(value:str) -> str:
+    """ Convert an ISO 8601 date/time (UTC if without offset) to a timestamp comparable with the database ones """
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+def encode_cursor(sort:str, key:tuple) -> str:
+    """ Opaque cursor of a page listing (the sort and the key of the last item returned) """
+    data = json.dumps({"sort": sort, "key": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor:str, sort:str) -> tuple:
+    """ Key of a cursor created with encode_cursor for the same sort, ValueError if it is not valid """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key = tuple(data["key"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if data.get("sort") != sort or len(key) != 2:
+        raise ValueError("Invalid cursor for this sort")
+    return key
+
+def api_cache_validators(etag:str, last_modified:datetime|None=None, cache_control:str="private, no-cache") -> bool:
+    """ Add the validators (ETag, Last-Modified if known) to the response of the current request and
+        return True if the copy of the client is still valid (If-None-Match, else If-Modified-Since) """
+    # Last-Modified has a resolution of one second: not sent for a change in the current second,
+    # otherwise a later change in the same second would look older than the copy of the client
+    if last_modified is not None and last_modified >= datetime.now(timezone.utc).replace(microsecond=0):
+        last_modified = None
+
+    @after_this_request
+    def add_validators(response:Response) -> Response:
+        if response.status_code in (200, 304):
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = cache_control
+        return response
+
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if_modified_since = request.if_modified_since
+    return last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+
+def send_object_content(obj:Object, db:Database) -> Response | None:
+    """ Stream the PDF content of an object in chunks, honouring Range and conditional
+        requests (strong ETag from the content digest, Last-Modified from the update date).
+        Return None if the content is not available. """
+    if obj.raw_hash is None or obj.raw_size is None:
+        # Content not moved to the blob store yet
+        if not obj.load_raw(db) or obj.raw is None:
+            return None
+        file, size = io.BytesIO(obj.raw), len(obj.raw)
+        digest = hashlib.sha256(obj.raw).hexdigest()
+    else:
+        try:
+            file, size, digest = blob_store.open(obj.raw_hash), obj.raw_size, obj.raw_hash
+        except FileNotFoundError:
+            log.error("Content %s of object %s not found in the blob store", obj.raw_hash, obj.id)
+            return None
+
+    response = send_file(
+        file,
+        mimetype="application/pdf",
+        download_name=f"{obj.name}.pdf",
+        conditional=False,
+        etag=digest,
+        last_modified=parse_db_timestamp(obj.update_date),
+    )
+    response.content_length = size
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["X-Content-Hash"] = f"sha256={digest}"
+    try:
+        return response.make_conditional(request, accept_ranges=True, complete_length=size)
+    except RequestedRangeNotSatisfiable:
+        file.close()
+        raise
 
 def get_user_from_api_key(api_key:str) -> User:
-    """ Get user from API key """
-    db = Database()
+    """ Get user from API key (cached, unknown keys included) """
+    user = api_key_cache.get(api_key)
+    if user is not MISSING:
+        return user
+
     try:
         # Fetch the user associated with the given API key
-        user_row = db.c.execute(
-            '''
-            SELECT *
-            FROM user
-            WHERE id IN (
-                SELECT user_id
-                FROM user_property
-                WHERE key = ? AND value = ?
-            ) AND deleted = 0
-            LIMIT 1
-            ''',
-            (Property.API_KEY.value, api_key)
-        ).fetchone()
-        if user_row:
-            return User(user_row)
-        return None
+        user_row = get_db().c.execute(queries.USER_BY_API_KEY, (Property.API_KEY.value, api_key)).fetchone()
+        user = User(user_row) if user_row else None
+        api_key_cache.set(api_key, user)
+        return user
     except Exception as e:
         log.error(f"Error fetching user by API key: {e}")
         return None
-    finally:
-        db.close()
+
+def current_user() -> User | None:
+    """ Get the authenticated user of the current request, resolved once and kept in `g.user`.
+        Could be flask session or via API Key in header x-api-key """
+    if "user" not in g:
+        user = None
+        if is_logged() and session["user"].id is not None:
+            user = session["user"]
+        elif api_key := request.headers.get("x-api-key"):
+            user = get_user_from_api_key(api_key)
+            if user is not None:
+                log.debug(f"API Key authentication successful for user ID {user.id}")
+        g.user = user
+    return g.user
+
+def load_current_user() -> None:
+    """ Resolve the user of the request before the API handlers run """
+    current_user()
 
 def check_authentication() -> bool:
-    """ Check the authentication of the user.
-        Could be flask session or via API Key in header x-api-key"""
-
-    api_key = request.headers.get("x-api-key")
-    if api_key:
-        # Validate the API key by checking user properties in the database
-        db = Database()
-        user_row = db.c.execute(
-            'SELECT id, name, email, password, admin, deleted FROM user WHERE id IN (SELECT user_id FROM user_property WHERE key = ? AND value = ?) AND deleted = 0 LIMIT 1',
-            (Property.API_KEY.value, api_key)
-        ).fetchone()
-        db.close()
-        if user_row:
-            user = User(user_row)
-            log.debug(f"API Key authentication successful for user ID {user.id}")
-            return True
-        
-    # Check if the user is logged in via session
-    if is_logged() and session["user"].id is not None:
-        return True
-    return False
+    """ Check the authentication of the user (session or API key) """
+    return current_user() is not None
 
-def get_system_property(key: SystemProperty) -> str | None:
-    """ Get a system property value by key """
-    db = Database()
-    try:
-        row = db.c.execute(
-            'SELECT value FROM user_property WHERE user_id = ? AND key = ? LIMIT 1',
-            (USER_SYSTEM_ID, key.value)
-        ).fetchone()
-        if row:
-            return row[0]
+def auth_required(func):
+    """ Decorator for API handlers: reply 401 unless the request is authenticated (user in `g.user`) """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not check_authentication():
+            return {"error": "Unauthorized"}, 401
+        return func(*args, **kwargs)
+    return wrapper
+
+def _project_membership(project_id) -> Role | None:
+    """ Role of the current user in the project (None if not a member), queried once per request """
+    user = current_user()
+    if user is None:
         return None
-    except Exception as e:
-        log.error(f"Error fetching system property {key}: {e}")
+    if "project_roles" not in g:
+        g.project_roles = {}
+    key = (user.id, str(project_id))
+    if key not in g.project_roles:
+        row = get_db().c.execute(queries.PROJECT_MEMBER_ROLE, (project_id, user.id)).fetchone()
+        if row is None:
+            g.project_roles[key] = None
+        else:
+            g.project_roles[key] = Role(row[0]) if row[0] in Role.values() else Role.NO_ROLE
+    return g.project_roles[key]
+
+def get_project_role(project_id) -> Role:
+    """ Get the role of the current user in a specific project (NO_ROLE if not a member) """
+    return _project_membership(project_id) or Role.NO_ROLE
+
+def require_role(project_id, roles:set[Role]|None=None) -> Role | None:
+    """ Get the role of the current user in the project if it is one of the roles
+        (any role of a member by default), None otherwise """
+    role = _project_membership(project_id)
+    if role is None or (roles is not None and role not in roles):
         return None
-    finally:
-        db.close()
+    return role
 
-def call_webhook(url, payload=None, headers=None) -> None:
-    """ Function to call external webhooks """
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-        log.info(f"Webhook sent to {url} | Status: {response.status_code}")
-    except Exception as e:
-        log.error(f"Webhook error: {e}")
-
-def get_user_webhooks(project_id:int) -> dict:
-    """ Get all webhooks (user property) from reviewers and owners of a specific project """
-    db = Database()
-    webhooks = db.c.execute(
-        '''
-        SELECT up.user_id, up.value
-        FROM user_property up
-        WHERE up.key = ? AND up.user_id IN (
-            SELECT pu.user_id
-            FROM project_user pu
-            WHERE pu.project_id = ? AND pu.role IN (?, ?, ?)
-        ) AND up.user_id != ?
-        ''',
-        (
-            Property.WEBHOOK_URL.value,
-            project_id,
-            Role.OWNER.value,
-            Role.REVIEWER.value,
-            Role.MEMBER.value,
-            USER_SYSTEM_ID
-        )
-    ).fetchall()
-    result = {row[0]: row[1] for row in webhooks}
-    db.close()
-    return result
+def remember_project_role(project_id, role:Role) -> None:
+    """ Store the role of the current user in a project already read by the caller """
+    user = current_user()
+    if user is None:
+        return
+    if "project_roles" not in g:
+        g.project_roles = {}
+    g.project_roles[(user.id, str(project_id))] = role
 
+def forget_project_role(project_id) -> None:
+    """ Drop the roles of a project resolved in this request (after a membership change) """
+    if "project_roles" in g:
+        for key in [key for key in g.project_roles if key[1] == str(project_id)]:
+            del g.project_roles[key]
+
+def get_system_property(key: SystemProperty) -> str | None:
+    """ Get a system property value by key (cached, see `system_settings` for typed values) """
+    return system_settings.get(key)
@@ -0,0 +1,80 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Inline comments of the objects, one row per comment (x and y are unscaled coordinates on the page) */
+CREATE TABLE IF NOT EXISTS "comment" (
+    "id" CHAR(36),
+    "object_id" CHAR(36) NOT NULL REFERENCES object(id),
+    "page" INTEGER NOT NULL,
+    "x" REAL NOT NULL,
+    "y" REAL NOT NULL,
+    "user_id" INTEGER REFERENCES user(id),
+    "text" TEXT NOT NULL,
+    "resolved" INTEGER NOT NULL DEFAULT 0,
+    "created_at" TEXT DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY("id")
+);
+
+/* Comments of an object, all or of one page, in creation order */
+CREATE INDEX IF NOT EXISTS "idx_comment_object_page" ON "comment" ("object_id", "page", "created_at");
+
+/* Move the comments out of the JSON documents of object.comments ({"inlineComments": [...]}), 
+   the creation date comes from the old ids ("comment-<epoch ms>").
+   The documents were free-form: the elements without a numeric page, x and y are not migrated */
+INSERT INTO "comment" (id, object_id, page, x, y, user_id, text, resolved, created_at, updated_at)
+SELECT
+    lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-' || hex(randomblob(2)) || '-' || hex(randomblob(2)) || '-' || hex(randomblob(6))),
+    o.id,
+    CAST(json_extract(c.value, '$.page') AS INTEGER),
+    CAST(json_extract(c.value, '$.x') AS REAL),
+    CAST(json_extract(c.value, '$.y') AS REAL),
+    CAST(json_extract(c.value, '$.authorId') AS INTEGER),
+    COALESCE(json_extract(c.value, '$.text'), ''),
+    CASE WHEN json_extract(c.value, '$.resolved') THEN 1 ELSE 0 END,
+    CASE WHEN json_extract(c.value, '$.id') GLOB 'comment-[0-9]*'
+        THEN datetime(CAST(substr(json_extract(c.value, '$.id'), 9) AS INTEGER) / 1000, 'unixepoch')
+        ELSE o.update_date END,
+    o.update_date
+FROM "object" o, json_each(o.comments, '$.inlineComments') c
+WHERE json_valid(o.comments) AND json_type(o.comments, '$.inlineComments') = 'array'
+AND c.type = 'object'
+AND json_type(c.value, '$.page') IN ('integer', 'real')
+AND json_type(c.value, '$.x') IN ('integer', 'real')
+AND json_type(c.value, '$.y') IN ('integer', 'real');
+
+/* Clear only the documents fully migrated: the other ones (other JSON, skipped elements) are kept as they are */
+UPDATE "object" SET comments = NULL
+WHERE json_valid(comments) AND json_type(comments, '$.inlineComments') = 'array'
+AND NOT EXISTS (
+    SELECT 1 FROM json_each(comments, '$.inlineComments') c
+    WHERE c.type != 'object' OR COALESCE(json_type(c.value, '$.page'), '') NOT IN ('integer', 'real')
+    OR COALESCE(json_type(c.value, '$.x'), '') NOT IN ('integer', 'real')
+    OR COALESCE(json_type(c.value, '$.y'), '') NOT IN ('integer', 'real')
+);
+
+/* Changes feed (see 9-db_change-log.sql) */
+CREATE TRIGGER IF NOT EXISTS "trg_comment_insert_change_log" AFTER INSERT ON "comment"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES ((SELECT project_id FROM "object" WHERE id = NEW.object_id), 'comment', NEW.id, NEW.object_id, 'create');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_comment_update_change_log" AFTER UPDATE ON "comment"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES ((SELECT project_id FROM "object" WHERE id = NEW.object_id), 'comment', NEW.id, NEW.object_id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_comment_delete_change_log" AFTER DELETE ON "comment"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES ((SELECT project_id FROM "object" WHERE id = OLD.object_id), 'comment', OLD.id, OLD.object_id, 'delete');
+END;
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(10, "Move the comments of objects to their own table");
@@ -0,0 +1,32 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Outbox of the webhooks: added in the same transaction of the change, sent (and retried) by the webhook dispatcher.
+   "status" is 'pending' (to send at "next_attempt_at", also while an attempt is in progress), 'delivered' or 'dead' (attempts exhausted) */
+CREATE TABLE IF NOT EXISTS "webhook_delivery" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "user_id" INTEGER REFERENCES user(id),
+    "url" TEXT NOT NULL,
+    "event" TEXT NOT NULL,
+    "payload" TEXT NOT NULL,
+    "status" TEXT NOT NULL DEFAULT 'pending',
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "next_attempt_at" TEXT DEFAULT CURRENT_TIMESTAMP,
+    "last_status_code" INTEGER,
+    "last_error" TEXT,
+    "created_at" TEXT DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+/* Deliveries due, oldest first */
+CREATE INDEX IF NOT EXISTS "idx_webhook_delivery_due" ON "webhook_delivery" ("status", "next_attempt_at");
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(11, "Add the webhook deliveries outbox");
@@ -0,0 +1,17 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Deliveries with the same key (e.g. the status changes of an object) for the same user are merged while waiting to be sent */
+ALTER TABLE "webhook_delivery" ADD COLUMN "coalesce_key" TEXT;
+
+CREATE INDEX IF NOT EXISTS "idx_webhook_delivery_coalesce" ON "webhook_delivery" ("coalesce_key", "user_id") WHERE "coalesce_key" IS NOT NULL;
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(12, "Add the coalescing key of the webhook deliveries");
@@ -0,0 +1,38 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Health of the webhook receivers (by URL): success rate and latency (moving averages) of the deliveries,
+   circuit breaker "state" ('closed': deliveries sent, 'open': paused until "retry_at", 'half_open': one probe delivery in progress)
+   and result of the last check of the URL ("verification": 'pending', 'ok' or 'failed') */
+CREATE TABLE IF NOT EXISTS "webhook_endpoint" (
+    "url" TEXT PRIMARY KEY,
+    "state" TEXT NOT NULL DEFAULT 'closed',
+    "requests" INTEGER NOT NULL DEFAULT 0,
+    "errors" INTEGER NOT NULL DEFAULT 0,
+    "success_rate" REAL,
+    "latency_ms" REAL,
+    "consecutive_failures" INTEGER NOT NULL DEFAULT 0,
+    "trips" INTEGER NOT NULL DEFAULT 0,
+    "retry_at" TEXT,
+    "last_error" TEXT,
+    "verification" TEXT,
+    "verification_error" TEXT,
+    "verified_at" TEXT,
+    "updated_at" TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+/* Paused endpoints, to skip their deliveries and to probe them when the pause is over */
+CREATE INDEX IF NOT EXISTS "idx_webhook_endpoint_state" ON "webhook_endpoint" ("state", "retry_at");
+
+/* Due deliveries of an endpoint (probes of the paused endpoints) */
+CREATE INDEX IF NOT EXISTS "idx_webhook_delivery_url" ON "webhook_delivery" ("url", "status", "next_attempt_at");
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(13, "Add the health of the webhook endpoints");
@@ -0,0 +1,38 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Date of the last change of the objects of a project, used as Last-Modified of the listings (see 4-db_project-revision.sql) */
+ALTER TABLE "project" ADD COLUMN "revised_at" TEXT DEFAULT NULL;
+
+UPDATE "project" SET revised_at = CURRENT_TIMESTAMP WHERE revision > 0;
+
+DROP TRIGGER IF EXISTS "trg_object_insert_project_revision";
+DROP TRIGGER IF EXISTS "trg_object_update_project_revision";
+DROP TRIGGER IF EXISTS "trg_object_delete_project_revision";
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_insert_project_revision" AFTER INSERT ON "object"
+BEGIN
+    UPDATE "project" SET revision = revision + 1, revised_at = CURRENT_TIMESTAMP WHERE id = NEW.project_id;
+END;
+
+/* Only the columns returned by the listings: updates of the legacy content (raw) keep the copies of the clients valid */
+CREATE TRIGGER IF NOT EXISTS "trg_object_update_project_revision"
+AFTER UPDATE OF path, user_id, project_id, name, description, comments, version, status, upload_date, update_date, raw_hash, raw_size ON "object"
+BEGIN
+    UPDATE "project" SET revision = revision + 1, revised_at = CURRENT_TIMESTAMP WHERE id IN (OLD.project_id, NEW.project_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_delete_project_revision" AFTER DELETE ON "object"
+BEGIN
+    UPDATE "project" SET revision = revision + 1, revised_at = CURRENT_TIMESTAMP WHERE id = OLD.project_id;
+END;
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(14, "Update the change counter of projects only for the columns of the listings");
@@ -0,0 +1,39 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Remove duplicated memberships and reviews before adding the unique indexes */
+DELETE FROM "project_user" WHERE rowid NOT IN (
+    SELECT MIN(rowid) FROM "project_user" GROUP BY project_id, user_id
+);
+
+DELETE FROM "object_integration_review" WHERE rowid NOT IN (
+    SELECT MIN(rowid) FROM "object_integration_review" GROUP BY object_id, user_id
+);
+
+/* Membership and role checks (project_id, user_id) and projects of a user (user_id) */
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_project_user_project_user" ON "project_user" ("project_id", "user_id");
+CREATE INDEX IF NOT EXISTS "idx_project_user_user" ON "project_user" ("user_id", "project_id");
+
+/* API key / GitHub username lookups (key, value) and properties of a user (user_id, key) */
+CREATE INDEX IF NOT EXISTS "idx_user_property_key_value" ON "user_property" ("key", "value", "user_id");
+CREATE INDEX IF NOT EXISTS "idx_user_property_user_key" ON "user_property" ("user_id", "key");
+
+/* Objects of a project */
+CREATE INDEX IF NOT EXISTS "idx_object_project" ON "object" ("project_id");
+
+/* Reviews of an object (one per user) and reviews of a user */
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_object_integration_review_object_user" ON "object_integration_review" ("object_id", "user_id");
+CREATE INDEX IF NOT EXISTS "idx_object_integration_review_user" ON "object_integration_review" ("user_id", "created_at");
+
+/* Logs of a user */
+CREATE INDEX IF NOT EXISTS "idx_log_user" ON "log" ("user_id");
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(2, "Add indexes for the lookups of routes");
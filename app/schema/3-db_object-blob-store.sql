@@ -0,0 +1,18 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Object contents are moved to the blob store, the table keeps their SHA-256 digest and size */
+ALTER TABLE "object" ADD COLUMN "raw_hash" CHAR(64) DEFAULT NULL;
+ALTER TABLE "object" ADD COLUMN "raw_size" INTEGER DEFAULT NULL;
+
+CREATE INDEX IF NOT EXISTS "idx_object_raw_hash" ON "object" ("raw_hash");
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(3, "Add content digest and size of objects for the blob store");
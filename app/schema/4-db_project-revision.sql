@@ -0,0 +1,30 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Change counter of the objects of a project, used as validator (ETag) of the listings */
+ALTER TABLE "project" ADD COLUMN "revision" INTEGER NOT NULL DEFAULT 0;
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_insert_project_revision" AFTER INSERT ON "object"
+BEGIN
+    UPDATE "project" SET revision = revision + 1 WHERE id = NEW.project_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_update_project_revision" AFTER UPDATE ON "object"
+BEGIN
+    UPDATE "project" SET revision = revision + 1 WHERE id IN (OLD.project_id, NEW.project_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_delete_project_revision" AFTER DELETE ON "object"
+BEGIN
+    UPDATE "project" SET revision = revision + 1 WHERE id = OLD.project_id;
+END;
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(4, "Add change counter of projects objects");
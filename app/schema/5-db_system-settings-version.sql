@@ -0,0 +1,38 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Change counter of the system properties (properties of the system user, id = 1), checked by the settings cache */
+CREATE TABLE IF NOT EXISTS "rr_settings_version" (
+    "id" INTEGER PRIMARY KEY CHECK ("id" = 1),
+    "version" INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO "rr_settings_version" (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS "trg_user_property_insert_settings_version" AFTER INSERT ON "user_property"
+WHEN NEW.user_id = 1
+BEGIN
+    UPDATE "rr_settings_version" SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_user_property_update_settings_version" AFTER UPDATE ON "user_property"
+WHEN OLD.user_id = 1 OR NEW.user_id = 1
+BEGIN
+    UPDATE "rr_settings_version" SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_user_property_delete_settings_version" AFTER DELETE ON "user_property"
+WHEN OLD.user_id = 1
+BEGIN
+    UPDATE "rr_settings_version" SET version = version + 1 WHERE id = 1;
+END;
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(5, "Add change counter of system properties");
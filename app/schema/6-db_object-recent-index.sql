@@ -0,0 +1,16 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Recent objects of a project (ORDER BY update_date DESC LIMIT n), also covers the lookups by project_id */
+CREATE INDEX IF NOT EXISTS "idx_object_project_update" ON "object" ("project_id", "update_date");
+DROP INDEX IF EXISTS "idx_object_project";
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(6, "Add index for the recent objects of a project");
@@ -0,0 +1,31 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Folders of the projects, materialized from the paths of the objects ("/" is the root, "/a/b" a subfolder) */
+CREATE TABLE IF NOT EXISTS "folder" (
+    "project_id" INTEGER NOT NULL,
+    "path" TEXT NOT NULL,
+    "parent" TEXT,
+    "name" TEXT NOT NULL,
+    "object_count" INTEGER NOT NULL DEFAULT 0,
+    "folder_count" INTEGER NOT NULL DEFAULT 0,
+    "total_count" INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY("project_id", "path"),
+    FOREIGN KEY("project_id") REFERENCES "project"("id")
+);
+
+/* Subfolders of a folder */
+CREATE INDEX IF NOT EXISTS "idx_folder_project_parent" ON "folder" ("project_id", "parent", "name");
+
+/* Objects of a folder */
+CREATE INDEX IF NOT EXISTS "idx_object_project_path" ON "object" ("project_id", "path");
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(7, "Add materialized folders of projects");
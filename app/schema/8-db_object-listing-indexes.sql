@@ -0,0 +1,17 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Pages of the objects of a project sorted by last update or by name, "id" breaks the ties of the cursors */
+CREATE INDEX IF NOT EXISTS "idx_object_project_update_id" ON "object" ("project_id", "update_date", "id");
+CREATE INDEX IF NOT EXISTS "idx_object_project_name_id" ON "object" ("project_id", "name", "id");
+DROP INDEX IF EXISTS "idx_object_project_update";
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(8, "Add indexes for the pages of objects");
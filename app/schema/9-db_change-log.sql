@@ -0,0 +1,79 @@
+/*
+    =======================================
+    SQLite updates
+    =======================================
+*/
+
+/* Append-only log of the changes of objects, reviews and members, "id" is the sync token of the changes feed */
+CREATE TABLE IF NOT EXISTS "change_log" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "project_id" INTEGER,
+    "entity" TEXT NOT NULL,
+    "entity_id" TEXT NOT NULL,
+    "object_id" TEXT,
+    "action" TEXT NOT NULL,
+    "created_at" TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+/* Last token removed by the retention job: older tokens can't be resumed */
+CREATE TABLE IF NOT EXISTS "rr_change_log_state" (
+    "id" INTEGER PRIMARY KEY CHECK ("id" = 1),
+    "purged_until" INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO "rr_change_log_state" (id, purged_until) VALUES (1, 0);
+
+/* Objects (the moves of the content to the blob store are not changes for the clients) */
+CREATE TRIGGER IF NOT EXISTS "trg_object_insert_change_log" AFTER INSERT ON "object"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES (NEW.project_id, 'object', NEW.id, NEW.id, 'create');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_update_change_log" AFTER UPDATE OF "path", "name", "description", "comments", "version", "status", "update_date", "project_id" ON "object"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES (NEW.project_id, 'object', NEW.id, NEW.id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_object_delete_change_log" AFTER DELETE ON "object"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES (OLD.project_id, 'object', OLD.id, OLD.id, 'delete');
+END;
+
+/* Integration reviews */
+CREATE TRIGGER IF NOT EXISTS "trg_review_insert_change_log" AFTER INSERT ON "object_integration_review"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES ((SELECT project_id FROM "object" WHERE id = NEW.object_id), 'review', NEW.id, NEW.object_id, 'create');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_review_update_change_log" AFTER UPDATE ON "object_integration_review"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES ((SELECT project_id FROM "object" WHERE id = NEW.object_id), 'review', NEW.id, NEW.object_id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_review_delete_change_log" AFTER DELETE ON "object_integration_review"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, object_id, action) VALUES ((SELECT project_id FROM "object" WHERE id = OLD.object_id), 'review', OLD.id, OLD.object_id, 'delete');
+END;
+
+/* Members of the projects (entity_id is the user id) */
+CREATE TRIGGER IF NOT EXISTS "trg_project_user_insert_change_log" AFTER INSERT ON "project_user"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, action) VALUES (NEW.project_id, 'member', NEW.user_id, 'create');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_project_user_update_change_log" AFTER UPDATE ON "project_user"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, action) VALUES (NEW.project_id, 'member', NEW.user_id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS "trg_project_user_delete_change_log" AFTER DELETE ON "project_user"
+BEGIN
+    INSERT INTO "change_log" (project_id, entity, entity_id, action) VALUES (OLD.project_id, 'member', OLD.user_id, 'delete');
+END;
+
+/*
+    Log schema updates
+    =======================================
+*/
+
+INSERT INTO "rr_db_version" (id, description) VALUES(9, "Add change log of objects, reviews and members");
@@ -3,6 +3,8 @@ from flask import Flask
 from flask_session import Session
 from .scheduler import scheduler
 from .oauth import oauth
+from .pool import PoolExhaustedError
+from .routes.utils import close_db, handle_pool_exhausted
 from .routes import (
     admin_blueprint,
     basic_blueprint, 
@@ -11,7 +13,11 @@ from .routes import (
     object_blueprint, 
     api_project_bp, 
     api_integration_bp, 
-    api_object_bp
+    api_object_bp,
+    api_change_bp,
+    api_comment_bp,
+    api_event_bp,
+    api_webhook_bp
 )
 
 app = Flask(__name__, template_folder='template')
@@ -25,6 +31,12 @@ app.register_blueprint(object_blueprint)
 app.register_blueprint(api_project_bp)
 app.register_blueprint(api_object_bp)
 app.register_blueprint(api_integration_bp)
+app.register_blueprint(api_change_bp)
+app.register_blueprint(api_comment_bp)
+app.register_blueprint(api_event_bp)
+app.register_blueprint(api_webhook_bp)
+app.teardown_appcontext(close_db)
+app.register_error_handler(PoolExhaustedError, handle_pool_exhausted)
 app.scheduler = scheduler
 app.oauth = oauth
 oauth.init_app(app)
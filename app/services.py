@@ -0,0 +1,181 @@
+from dataclasses import dataclass, field
+from .config import PROJECT_RECENT_OBJECTS_LIMIT, OBJECTS_PAGE_SIZE
+from .database import Database
+from .folders import ROOT_PATH, folder_path
+from .models import Project, Object, Review, Role, Folder, Change, Comment, WebhookEndpoint
+from . import queries
+from .queries import OBJECT_COLUMNS
+
+# Read queries shared by the API and the HTML routes, returning model instances.
+# Permission checks are up to the caller (see routes/utils: require_role).
+
+OBJECT_FIELDS = OBJECT_COLUMNS.split(", ")
+OBJECT_SORTS = ("update_date", "name")  # Both backed by an index (project_id, <sort>, id)
+
+
+def get_user_projects(db:Database, user_id:int) -> list[Project]:
+    """ Projects where the user is involved """
+    rows = db.c.execute(queries.USER_PROJECTS, (user_id,)).fetchall()
+    return [Project.from_db_row(row) for row in rows]
+
+
+def get_user_project(db:Database, project_id, user_id:int) -> Project | None:
+    """ Project by id, if the user is involved """
+    row = db.c.execute(queries.USER_PROJECT, (project_id, user_id)).fetchone()
+    return Project.from_db_row(row) if row else None
+
+
+def get_project_users(db:Database, project_id) -> list[dict]:
+    """ Members of the project (id, name and role) """
+    rows = db.c.execute(queries.PROJECT_USERS, (project_id,)).fetchall()
+    return [{"id": row[0], "name": row[1], "role": row[3]} for row in rows]
+
+
+@dataclass
+class ObjectQuery:
+    """ Filters, sorting and page of a listing of the objects of a project """
+    statuses: list[str] = field(default_factory=list)
+    path: str | None = None  # The folder and its subfolders
+    updated_since: str | None = None  # Database timestamp (UTC)
+    author: int | None = None
+    sort: str = "update_date"
+    descending: bool = True
+    after: tuple | None = None  # (sort value, id) of the last object of the previous page
+    limit: int = OBJECTS_PAGE_SIZE
+    fields: list[str] = field(default_factory=lambda: list(OBJECT_FIELDS))
+
+
+def get_project_objects_page(db:Database, project_id, query:ObjectQuery) -> tuple[list[dict], tuple | None]:
+    """ Page of the objects of the project (only the requested fields) and the key of the last one if more follow """
+    if query.sort not in OBJECT_SORTS:
+        raise ValueError(f"Unsupported sort '{query.sort}'")
+    if any(name not in OBJECT_FIELDS for name in query.fields):
+        raise ValueError("Unsupported fields")
+    columns = list(dict.fromkeys(["id", query.sort, *query.fields]))
+
+    where, params = ["project_id = ?", "status IS NOT NULL"], [project_id]
+    if query.statuses:
+        where.append(f"status IN ({", ".join("?" * len(query.statuses))})")
+        params.extend(query.statuses)
+    if query.path is not None and query.path != ROOT_PATH:
+        # Normalized paths: the subfolders of "/a" are in ["/a/", "/a0"), "0" being the character after "/"
+        path = folder_path(query.path)
+        where.append("(path = ? OR (path >= ? AND path < ?))")
+        params.extend((path, path + "/", path + "0"))
+    if query.updated_since is not None:
+        where.append("update_date >= ?")
+        params.append(query.updated_since)
+    if query.author is not None:
+        where.append("user_id = ?")
+        params.append(query.author)
+    if query.after is not None:
+        where.append(f"({query.sort}, id) {"<" if query.descending else ">"} (?, ?)")
+        params.extend(query.after)
+
+    rows = db.c.execute(
+        queries.objects_page_query(columns, where, query.sort, query.descending),
+        (*params, query.limit + 1)
+    ).fetchall()
+
+    more = len(rows) > query.limit
+    rows = rows[:query.limit]
+    objects = [{name: row[columns.index(name)] for name in ["id", *query.fields]} for row in rows]
+    last = (rows[-1][1], rows[-1][0]) if more else None
+    return objects, last
+
+
+@dataclass
+class ProjectDashboard:
+    """ Data of the project page: the project, the role of the user, the recent objects and the top-level folders """
+    project: Project
+    role: Role
+    recent_objects: list[Object] = field(default_factory=list)
+    folders: list[Folder] = field(default_factory=list)
+
+
+def get_project_dashboard(db:Database, project_id, user_id:int, recent_limit:int=PROJECT_RECENT_OBJECTS_LIMIT) -> ProjectDashboard | None:
+    """ Project page data (None if the user is not involved), each query is resolved with an index """
+    row = db.c.execute(queries.USER_PROJECT_WITH_ROLE, (project_id, user_id)).fetchone()
+    if row is None:
+        return None
+    dashboard = ProjectDashboard(
+        project=Project.from_db_row(row[:3]),
+        role=Role(row[3]) if row[3] in Role.values() else Role.NO_ROLE,
+    )
+
+    rows = db.c.execute(queries.RECENT_OBJECTS, (project_id, recent_limit)).fetchall()
+    dashboard.recent_objects = [Object.from_db_row(row) for row in rows]
+
+    dashboard.folders = get_subfolders(db, project_id, ROOT_PATH)
+    return dashboard
+
+
+def get_folder(db:Database, project_id, path:str) -> Folder | None:
+    """ Folder of the project by path """
+    row = db.c.execute(queries.FOLDER, (project_id, folder_path(path))).fetchone()
+    return Folder.from_db_row(row) if row else None
+
+
+def get_subfolders(db:Database, project_id, path:str) -> list[Folder]:
+    """ Folders directly inside a folder of the project, by name """
+    rows = db.c.execute(queries.SUBFOLDERS, (project_id, folder_path(path))).fetchall()
+    return [Folder.from_db_row(row) for row in rows]
+
+
+def get_folder_objects(db:Database, project_id, path:str) -> list[Object]:
+    """ Objects directly inside a folder of the project, by name """
+    rows = db.c.execute(queries.FOLDER_OBJECTS, (project_id, folder_path(path))).fetchall()
+    return [Object.from_db_row(row) for row in rows]
+
+
+def get_object(db:Database, object_id:str, project_id=None) -> Object | None:
+    """ Object by id (optionally only inside a project) """
+    if project_id is None:
+        row = db.c.execute(queries.OBJECT, (object_id,)).fetchone()
+    else:
+        row = db.c.execute(queries.PROJECT_OBJECT, (object_id, project_id)).fetchone()
+    return Object.from_db_row(row) if row else None
+
+
+def get_object_reviews(db:Database, object_id:str) -> list[Review]:
+    """ Integration reviews of the object, newest first """
+    rows = db.c.execute(queries.OBJECT_REVIEWS, (object_id,)).fetchall()
+    return [Review.from_db_row(row) for row in rows]
+
+
+def get_object_comments(db:Database, object_id:str, page:int | None=None) -> list[Comment]:
+    """ Inline comments of the object (optionally of one page), in page and creation order """
+    rows = db.c.execute(
+        queries.object_comments_query(page=page is not None),
+        (object_id,) if page is None else (object_id, page)
+    ).fetchall()
+    return [Comment.from_db_row(row) for row in rows]
+
+
+def get_comment(db:Database, object_id:str, comment_id:str) -> Comment | None:
+    """ Inline comment of the object by id """
+    row = db.c.execute(queries.COMMENT, (comment_id, object_id)).fetchone()
+    return Comment.from_db_row(row) if row else None
+
+
+def get_change_token(db:Database) -> int:
+    """ Token of the last change (the feed resumes after it) """
+    last_id = db.c.execute("SELECT MAX(id) FROM change_log").fetchone()[0]
+    return max(last_id or 0, get_change_purged_until(db))
+
+
+def get_change_purged_until(db:Database) -> int:
+    """ Last token deleted by the retention job, the feed can't resume before it """
+    return db.c.execute("SELECT purged_until FROM rr_change_log_state WHERE id = 1").fetchone()[0]
+
+
+def get_changes(db:Database, user_id:int, since:int, limit:int) -> list[Change]:
+    """ Changes after a token in the projects of the user (and the changes of their own memberships), oldest first """
+    rows = db.c.execute(queries.USER_CHANGES, (since, user_id, str(user_id), limit)).fetchall()
+    return [Change.from_db_row(row) for row in rows]
+
+
+def get_webhook_endpoint(db:Database, url:str) -> WebhookEndpoint | None:
+    """ Health of a webhook receiver, None if nothing was sent to it nor checked yet """
+    row = db.c.execute(queries.WEBHOOK_ENDPOINT, (url,)).fetchone()
+    return WebhookEndpoint.from_db_row(row) if row else None
@@ -1,19 +1,14 @@
 
 
 // Save new comment
-export function saveComment(getFunction, putFunction, pdfObjectId, pdfCurrentScale, text, x, y, page) {
-    getFunction("/api/objects/" + pdfObjectId, function (err, res) {
-        if (res || res == null) {
-            let data = JSON.parse(res || '{"inlineComments": []}')
-            const id = `comment-${Date.now()}`;
-            const authorName = document.getElementById("author-info").getAttribute("data-author-name");
-            const authorId = document.getElementById("author-info").getAttribute("data-author-id");
-            const resolved = false;
-            x = x / pdfCurrentScale;
-            y = y / pdfCurrentScale;
-            data.inlineComments.push({ id, text, x, y, page, authorName, authorId, resolved });
-            putFunction("/api/objects/" + pdfObjectId, {"comments": data}, () => {});
+export function saveComment(postFunction, pdfObjectId, pdfCurrentScale, text, x, y, page, callback) {
+    x = x / pdfCurrentScale;
+    y = y / pdfCurrentScale;
+    postFunction("/api/objects/" + pdfObjectId + "/comments", { text, x, y, page }, (err, res) => {
+        if (err) {
+            alert("Error saving comment: " + err);
         }
+        callback();
     });
 }
 
@@ -1,6 +1,29 @@
 
+// Get Object (without content)
+export function getObject(url, callback) {
+    const xhttp = new XMLHttpRequest();
+    xhttp.open("GET", url, true);
+    xhttp.setRequestHeader("Accept", "application/json");
+    xhttp.onreadystatechange = function () {
+        if (xhttp.readyState === 4) {
+            if (xhttp.status === 200) {
+                try {
+                    const responseJson = JSON.parse(xhttp.responseText);
+                    callback(null, responseJson["object"]);
+                } catch (e) {
+                    console.error("Error in JSON: ", e);
+                    callback(e, null);
+                }
+            } else {
+                callback(new Error(xhttp.status), null);
+            }
+        }
+    };
+    xhttp.send();
+}
+
 // Get Object Comments
-export function getObjectComments(url, callback) {
+export function getComments(url, callback) {
     const xhttp = new XMLHttpRequest();
     xhttp.open("GET", url, true);
     xhttp.setRequestHeader("Accept", "application/json");
@@ -9,7 +32,7 @@ export function getObjectComments(url, callback) {
             if (xhttp.status === 200) {
                 try {
                     const responseJson = JSON.parse(xhttp.responseText);
-                    callback(null, responseJson["object"]["comments"]);
+                    callback(null, responseJson["comments"]);
                 } catch (e) {
                     console.error("Error in JSON: ", e);
                     callback(e, null);
@@ -22,6 +45,40 @@ export function getObjectComments(url, callback) {
     xhttp.send();
 }
 
+// Add Object Comment
+export function postComment(url, data, callback) {
+    const xhttp = new XMLHttpRequest();
+    xhttp.open("POST", url, true);
+    xhttp.setRequestHeader("Content-Type", "application/json;charset=UTF-8");
+    xhttp.onreadystatechange = function () {
+        if (xhttp.readyState === 4) {
+            if (xhttp.status === 201) {
+                callback(null, xhttp.responseText);
+            } else {
+                callback(new Error(xhttp.status), null);
+            }
+        }
+    };
+    xhttp.send(JSON.stringify(data));
+}
+
+// Update Object Comment
+export function patchComment(url, data, callback) {
+    const xhttp = new XMLHttpRequest();
+    xhttp.open("PATCH", url, true);
+    xhttp.setRequestHeader("Content-Type", "application/json;charset=UTF-8");
+    xhttp.onreadystatechange = function () {
+        if (xhttp.readyState === 4) {
+            if (xhttp.status === 200) {
+                callback(null, xhttp.responseText);
+            } else {
+                callback(new Error(xhttp.status), null);
+            }
+        }
+    };
+    xhttp.send(JSON.stringify(data));
+}
+
 // Update Object
 export function putObject(url, data, callback) {
     const xhttp = new XMLHttpRequest();
@@ -55,4 +112,20 @@ export function deleteReview(url, callback) {
         }
     };
     xhttp.send();
-}
\ No newline at end of file
+}
+
+// Delete Object Comment
+export function deleteComment(objectId, commentId, callback) {
+    const xhttp = new XMLHttpRequest();
+    xhttp.open("DELETE", `/api/objects/${encodeURIComponent(objectId)}/comments/${encodeURIComponent(commentId)}`, true);
+    xhttp.onreadystatechange = function () {
+        if (xhttp.readyState === 4) {
+            if (xhttp.status === 200) {
+                callback(null, xhttp.responseText);
+            } else {
+                callback(new Error(xhttp.status), null);
+            }
+        }
+    };
+    xhttp.send();
+}
@@ -4,7 +4,7 @@
 import { marked } from "https://cdn.jsdelivr.net/npm/marked/lib/marked.esm.js";
 import { renderText } from "./utils/text.js";
 import { buildOutlineList } from "./object/viewer.js";
-import { getObjectComments, putObject, deleteReview } from "./object/xhttp.js";
+import { getObject, getComments, postComment, patchComment, deleteComment, putObject, deleteReview } from "./object/xhttp.js";
 import { saveComment, focusCommentFromSidebarToPdf, focusCommentFromPdfToSidebar } from "./object/comments.js"
 import { saveLocalSettings } from "./object/storage.js";
 
@@ -17,6 +17,10 @@ let lastClick = { x: 0, y: 0 };
 let objectCurrentStatusIndex;
 let commentsModePerPage = true;
 let nightModeEnabled = false;
+let liveEvents = null;
+let liveEventsRetryDelay = 3000;
+let liveEventsPolling = null;
+let commentsReloadTimeout = null;
 
 
 const pdfDefaultScale = 1.20;
@@ -80,8 +84,8 @@ function renderPage(pageNumber, scale = pdfCurrentScale) {
     });
 }
 
-// Get document and render PDF
-pdfjsLib.getDocument(pdfUrl).promise.then(pdf => {
+// Get document and render PDF (pages are fetched on demand with range requests)
+pdfjsLib.getDocument({ url: pdfUrl, disableAutoFetch: true, disableStream: true }).promise.then(pdf => {
     pdfInstance = pdf;
     totalPageNumDisplay.textContent = pdfInstance.numPages;
     pageScaleDisplay.textContent = (pdfCurrentScale * 100).toFixed(0) + "%";
@@ -257,13 +261,12 @@ document.getElementById("pdf-canvas").addEventListener("click", event => {
         if (e.key === 'Enter' && e.shiftKey) {
             return;
         } else if (e.key === "Enter" && commentTextarea.value !== "") {
-            saveComment(getObjectComments, putObject, pdfObjectId, pdfCurrentScale, commentTextarea.value, lastClick.x, lastClick.y, pdfCurrentPage);
+            saveComment(postComment, pdfObjectId, pdfCurrentScale, commentTextarea.value, lastClick.x, lastClick.y, pdfCurrentPage, () => {
+                loadComments(commentsModePerPage);
+            });
             commentTextarea.value = "";
             commentTextarea.style.display = "none";
             commentTextarea.removeEventListener("keydown", onKeyDown);
-            setTimeout(() => {
-                loadComments(commentsModePerPage);
-            }, 100);
         } else if (e.key === "Escape") {
             commentTextarea.value = "";
             commentTextarea.style.display = "none";
@@ -292,24 +295,17 @@ function loadComments(per_page = true) {
     let commentPageId = 1;
     let totalComments = 0;
 
-    getObjectComments("/api/objects/" + pdfObjectId, function (err, res) {
+    const commentsUrl = "/api/objects/" + pdfObjectId + "/comments";
+    getComments(per_page ? `${commentsUrl}?page=${pdfCurrentPage}` : commentsUrl, function (err, comments) {
         
         if (err) {
             commentsList.innerHTML = "<p class='danger'>Error loading comments, please try again</p>";
             return;
         }
 
-        if (res || res == null) {
-
-            let data = JSON.parse(res || '{"inlineComments": []}');
-            let clearData;
-            
-            if (per_page)
-                clearData = data.inlineComments.filter(a => a.page === pdfCurrentPage);
-            else 
-                clearData = data.inlineComments;
+        if (comments) {
 
-            clearData.forEach(({ id, text, x, y, page, authorName, authorId, resolved }) => {
+            comments.forEach(({ id, text, x, y, page, author_name, resolved }) => {
             
                 if (per_page || page == pdfCurrentPage) {
                     // Yellow sphere marker on document
@@ -330,7 +326,7 @@ function loadComments(per_page = true) {
                 const comment = document.createElement("div");
                 comment.className = "comment";
                 comment.id = id;
-                comment.innerHTML = "<span class='comment-number'>("+commentPageId+")</span> <span class='comment-author'>" + authorName + ":</span> " + renderText(text);
+                comment.innerHTML = "<span class='comment-number'>("+commentPageId+")</span> <span class='comment-author'>" + renderText(author_name || "Unknown") + ":</span> " + renderText(text);
 
                 const commentControl = document.createElement("div");
                 commentControl.className = "comment-control";
@@ -349,16 +345,12 @@ function loadComments(per_page = true) {
                 // Event listener for comment delete
                 deleteBtn.addEventListener("click", () => {
                     if (confirm("Are you sure to delete this comment?")) {
-                        clearData = data.inlineComments.filter(a => a.id !== id);
-                        data.inlineComments = clearData;
-                        putObject("/api/objects/" + pdfObjectId, {"comments": data}, (err, res) => {
+                        deleteComment(pdfObjectId, id, (err, res) => {
                             if (err) {
                                 alert("Error removing comment: " + err);
                             }
+                            loadComments(per_page);
                         });
-                        setTimeout(() => {
-                            return loadComments(per_page);
-                        }, 100); 
                     }
                 });
 
@@ -375,21 +367,12 @@ function loadComments(per_page = true) {
                 // Event listener for comment resolve
                 resolveBtn.addEventListener("click", () => {
                     if (!resolved || (resolved && confirm("Are you sure to UNDO resolving this comment?"))) {
-                        clearData = data.inlineComments.map(a => {
-                            if (a.id === id) {
-                                a.resolved = !resolved;
-                            }
-                            return a;
-                        });
-                        data.inlineComments = clearData;
-                        putObject("/api/objects/" + pdfObjectId, {"comments": data}, (err, res) => {
+                        patchComment(`${commentsUrl}/${id}`, {"resolved": !resolved}, (err, res) => {
                             if (err) {
                                 alert("Error resolving comment: " + err);
                             }
+                            loadComments(per_page);
                         });
-                        setTimeout(() => {
-                            return loadComments(per_page);
-                        }, 100); 
                     }
                 });
                 
@@ -436,12 +419,91 @@ if (buttonsDeleteReview.length > 0) {
     });
 }
 
+// ======================= Live Events =======================
+
+// Follow the changes of the other users (comments, reviews and status) without reloading the page
+function connectLiveEvents() {
+    liveEvents = new EventSource("/api/objects/" + pdfObjectId + "/events");
+
+    liveEvents.addEventListener("open", () => {
+        liveEventsRetryDelay = 3000;
+        clearInterval(liveEventsPolling);
+        liveEventsPolling = null;
+    });
+
+    ["comment.created", "comment.updated", "comment.deleted"].forEach(type => {
+        liveEvents.addEventListener(type, () => scheduleCommentsReload());
+    });
+
+    liveEvents.addEventListener("object.updated", event => {
+        const fields = JSON.parse(event.data).data.updated_fields;
+        if (fields.status !== undefined) {
+            showStatus(fields.status);
+        }
+    });
+
+    liveEvents.addEventListener("object.deleted", () => {
+        liveEvents.close();
+        alert("This document has been deleted");
+    });
+
+    liveEvents.addEventListener("review.created", () => {
+        document.getElementById("reviews-updated").classList.remove("hidden");
+    });
+
+    liveEvents.addEventListener("review.deleted", event => {
+        const review = document.getElementById("review-" + JSON.parse(event.data).data.review_id);
+        if (review) {
+            review.remove();
+        }
+    });
+
+    // Some events were lost (slow connection or server restarted): reload the current state
+    liveEvents.addEventListener("resync", () => reloadLiveState());
+
+    // The browser reconnects by itself, unless the server refused the stream (e.g. too many streams open):
+    // poll the current state until a stream is accepted again
+    liveEvents.addEventListener("error", () => {
+        if (liveEvents.readyState === EventSource.CLOSED) {
+            if (liveEventsPolling === null) {
+                liveEventsPolling = setInterval(reloadLiveState, 30000);
+            }
+            setTimeout(connectLiveEvents, liveEventsRetryDelay);
+            liveEventsRetryDelay = Math.min(liveEventsRetryDelay * 2, 60000);
+        }
+    });
+}
+
+// Reload the comments and the status of the document
+function reloadLiveState() {
+    scheduleCommentsReload();
+    getObject("/api/objects/" + pdfObjectId, (err, obj) => {
+        if (obj) {
+            showStatus(obj.status);
+        }
+    });
+}
+
+// Reload the comments once for a burst of events
+function scheduleCommentsReload() {
+    clearTimeout(commentsReloadTimeout);
+    commentsReloadTimeout = setTimeout(() => loadComments(commentsModePerPage), 200);
+}
+
+function showStatus(status) {
+    selectStatusElement.value = status;
+    updateStatusColor();
+}
+
 // ======================= On Load =======================
 
 document.addEventListener('DOMContentLoaded', function () {
     
     // Update color of status
     updateStatusColor();
+
+    // Follow the changes of the other users
+    connectLiveEvents();
     
     // Check permissions
     if (!reviewEnabled){
@@ -3,8 +3,111 @@
 
 import { formatRelativeDate } from "./utils/date.js"
 
+// ======================= Variables and Constants =======================
+
+const resourceTable = document.getElementById('resource-table');
+const projectUrl = resourceTable.getAttribute('data-project-url');
+const foldersUrl = resourceTable.getAttribute('data-folders-url');
+const openPath = resourceTable.getAttribute('data-open-path');
+const statusColors = JSON.parse(resourceTable.getAttribute('data-status-colors'));
+
+const folderRowTemplate = document.getElementById('folder-row-template');
+const objectRowTemplate = document.getElementById('object-row-template');
+
+// ======================= Folders =======================
+
+// Get the subfolders and the objects of a folder
+function getFolder(path, callback) {
+    const xhttp = new XMLHttpRequest();
+    xhttp.open("GET", `${foldersUrl}?path=${encodeURIComponent(path)}`, true);
+    xhttp.setRequestHeader("Accept", "application/json");
+    xhttp.onreadystatechange = function () {
+        if (xhttp.readyState === 4) {
+            if (xhttp.status === 200) {
+                try {
+                    callback(null, JSON.parse(xhttp.responseText));
+                } catch (e) {
+                    console.error("Error in JSON: ", e);
+                    callback(e, null);
+                }
+            } else {
+                callback(new Error(xhttp.status), null);
+            }
+        }
+    };
+    xhttp.send();
+}
+
+// Append the rows of a folder listing (subfolders first, then objects) to a table
+function renderFolder(table, listing) {
+    listing.folders.forEach(folder => {
+        const rows = folderRowTemplate.content.cloneNode(true);
+        const folderRow = rows.querySelector('.folder-row');
+        folderRow.dataset.folderPath = folder.path;
+        rows.querySelector('.folder-file').dataset.folderPath = folder.path;
+        rows.querySelector('.folder-link-key').textContent = folder.name;
+        rows.querySelector('.folder-items').textContent = `${folder.items} items`;
+        rows.querySelector('.folder-create-link').href = `${projectUrl}create?folder_path=${encodeURIComponent(folder.path)}`;
+        rows.querySelector('.folder-copy-link').href = `${projectUrl}?path=${encodeURIComponent(folder.path)}`;
+        rows.querySelector('.folder-link').addEventListener('click', function (event) {
+            event.preventDefault();
+            toggleFolder(folderRow, folderRow.dataset.open !== 'true');
+        });
+        table.appendChild(rows);
+    });
+
+    listing.objects.forEach(obj => {
+        const rows = objectRowTemplate.content.cloneNode(true);
+        rows.querySelector('tr').id = `file-${obj.id}`;
+        const link = rows.querySelector('.resource-link');
+        link.href = `${projectUrl}objects/${obj.id}`;
+        link.textContent = obj.name;
+        const lastUpdate = rows.querySelector('.object-last-update');
+        lastUpdate.title = `Last update: ${obj.update_date}`;
+        lastUpdate.textContent = formatRelativeDate(obj.update_date);
+        const status = rows.querySelector('.status-label');
+        status.style.backgroundColor = statusColors[obj.status] || '';
+        status.textContent = obj.status;
+        rows.querySelector('.object-version').textContent = `v${obj.version}`;
+        table.appendChild(rows);
+    });
+}
+
+// Open or close a folder, loading its content the first time it is opened
+function toggleFolder(folderRow, open, done) {
+    const folderContent = folderRow.nextElementSibling;
+    if (open && folderRow.dataset.loaded !== 'true') {
+        getFolder(folderRow.dataset.folderPath, function (error, listing) {
+            if (error) {
+                console.error("Unable to load the folder: ", error);
+                return;
+            }
+            folderRow.dataset.loaded = 'true';
+            renderFolder(folderContent.querySelector('.nested-table'), listing);
+            toggleFolder(folderRow, open, done);
+        });
+        return;
+    }
+    folderContent.style.display = open ? '' : 'none';
+    folderRow.dataset.open = open;
+    if (done) done();
+}
+
+// Open the folders of a path one level at a time ("/a/b" opens "/a" then "/a/b")
+function openFolderPath(table, parts, depth = 1) {
+    if (depth > parts.length) return;
+    const path = '/' + parts.slice(0, depth).join('/');
+    const folderRow = table.querySelector(`.folder-row[data-folder-path="${CSS.escape(path)}"]`);
+    if (!folderRow) return;
+    toggleFolder(folderRow, true, () => openFolderPath(folderRow.nextElementSibling.querySelector('.nested-table'), parts, depth + 1));
+}
+
+// ======================= Page =======================
+
 document.addEventListener('DOMContentLoaded', function () {
-    
+
+    renderFolder(resourceTable, JSON.parse(document.getElementById('root-folder').textContent));
+
     const allObjectLastUpdates = document.querySelectorAll('.object-last-update');
     allObjectLastUpdates.forEach(el => {
         const isoTimestamp = el.getAttribute('data-timestamp');
@@ -13,18 +116,7 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
-    const folderLinks = document.querySelectorAll('.folder-link');
-    folderLinks.forEach(link => {
-        link.addEventListener('click', function (event) {
-            event.preventDefault();
-            const folderPath = this.closest('.folder-row').dataset.folderPath;
-            const folderContent = document.querySelector(`.folder-file[data-folder-path="${folderPath}"]`);
-            if (folderContent) {
-                const isOpen = folderContent.style.display !== 'none';
-                folderContent.style.display = isOpen ? 'none' : '';
-                this.closest('.folder-row').dataset.open = !isOpen;
-            }
-        });
-    });
+    if (openPath) {
+        openFolderPath(resourceTable, openPath.split('/').filter(part => part));
+    }
 });
-
@@ -0,0 +1,149 @@
+import os
+import hashlib
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from .config import log, STORAGE_BACKEND, STORAGE_PATH
+
+CHUNK_SIZE = 1024 * 1024  # Bytes read/written at once when streaming contents
+
+
+class BlobTooLargeError(Exception):
+    """ Raised when a content read from a stream exceeds the maximum size allowed """
+
+
+class BlobStore(ABC):
+    """ Base class of the stores for objects contents, addressed by their SHA-256 digest """
+
+    @abstractmethod
+    def put(self, stream:BinaryIO, max_size:int|None=None) -> tuple[str, int]:
+        """ Store the content read from the stream, return its digest and size.
+            Raise BlobTooLargeError (nothing stored) if the content exceeds max_size bytes. """
+
+    @abstractmethod
+    def put_bytes(self, data:bytes) -> tuple[str, int]:
+        """ Store a content already in memory, return its digest and size """
+
+    @abstractmethod
+    def open(self, digest:str) -> BinaryIO:
+        """ Open a stored content for reading """
+
+    @abstractmethod
+    def exists(self, digest:str) -> bool:
+        """ Check if a content is stored """
+
+    @abstractmethod
+    def delete(self, digest:str) -> None:
+        """ Delete a stored content (nothing if missing) """
+
+    @abstractmethod
+    def list(self) -> Iterator[tuple[str, float]]:
+        """ List all the stored digests with their last write time """
+
+
+class FileBlobStore(BlobStore):
+    """ Blob store on the local filesystem.
+
+        Contents are saved in fan-out directories (`ab/cd/abcd...`) and written to a
+        temporary file first, then atomically renamed, so a reader never sees a partial
+        file. Identical contents are stored once. """
+
+    def __init__(self, root:str) -> None:
+        self._root = Path(root)
+        self._tmp = self._root / "tmp"
+        self._tmp.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest:str) -> Path:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest}")
+        return self._root / digest[0:2] / digest[2:4] / digest
+
+    def put(self, stream:BinaryIO, max_size:int|None=None) -> tuple[str, int]:
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                while chunk := stream.read(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise BlobTooLargeError(f"Content exceeds the maximum size of {max_size} bytes")
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            digest = hasher.hexdigest()
+            self._commit(tmp_path, digest)
+            return digest, size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_bytes(self, data:bytes) -> tuple[str, int]:
+        digest = hashlib.sha256(data).hexdigest()
+        if self._touch(digest):
+            return digest, len(data)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            self._commit(tmp_path, digest)
+            return digest, len(data)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def open(self, digest:str) -> BinaryIO:
+        return open(self.path(digest), "rb")
+
+    def exists(self, digest:str) -> bool:
+        return self.path(digest).is_file()
+
+    def delete(self, digest:str) -> None:
+        try:
+            self.path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def list(self) -> Iterator[tuple[str, float]]:
+        for first in self._root.iterdir():
+            if first == self._tmp or not first.is_dir():
+                continue
+            for second in first.iterdir():
+                for blob in second.iterdir():
+                    yield blob.name, blob.stat().st_mtime
+
+    def _commit(self, tmp_path:str, digest:str) -> None:
+        """ Move a fully written temporary file to its final location (dedup) """
+        if self._touch(digest):
+            return
+        target = self.path(digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+
+    def _touch(self, digest:str) -> bool:
+        """ Refresh the write time of an existing content (protects it from garbage collection) """
+        try:
+            os.utime(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+BLOB_STORES:dict[str, type[BlobStore]] = {
+    "filesystem": FileBlobStore,
+}
+
+
+def create_blob_store() -> BlobStore:
+    """ Create the blob store configured in the environment """
+    if STORAGE_BACKEND not in BLOB_STORES:
+        log.fatal("Storage backend not supported: %s (available: %s)", STORAGE_BACKEND, ", ".join(BLOB_STORES))
+        exit(1)
+    return BLOB_STORES[STORAGE_BACKEND](STORAGE_PATH)
+
+
+blob_store = create_blob_store()
@@ -0,0 +1,547 @@
+import json
+import hmac
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlite3 import Cursor
+from urllib.parse import urlencode
+from .config import (
+    log,
+    SECRET_KEY,
+    BASE_URL,
+    WEBHOOK_WORKERS,
+    WEBHOOK_TIMEOUT_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_BACKOFF_BASE_SECONDS,
+    WEBHOOK_BACKOFF_MAX_SECONDS,
+    WEBHOOK_DEFAULT_EVENTS,
+    SYSTEM_WEBHOOK_COALESCE_SECONDS,
+    USER_SYSTEM_ID,
+    WEBHOOK_CONTENT_URL_TTL_SECONDS,
+    WEBHOOK_CIRCUIT_FAILURE_THRESHOLD,
+    WEBHOOK_CIRCUIT_OPEN_SECONDS,
+    WEBHOOK_HEALTH_EWMA_ALPHA,
+)
+from .database import Database
+from .cache import system_settings
+from .events import EventType
+from .http_client import http_client, RequestException
+from .models import Object, ObjectStatus, Property, Role, SystemProperty
+from .services import OBJECT_FIELDS
+from . import queries
+
+# Fields of the object that can be embedded in the webhooks (content_url: signed link to download the content)
+WEBHOOK_OBJECT_FIELDS = [*OBJECT_FIELDS, "content_url"]
+
+
+class DeliveryStatus:
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    DEAD = "dead"
+
+
+class CircuitState:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def merge_payloads(pending:dict, new:dict) -> dict:
+    """ Payload of two coalesced webhooks: the last values, with the updated fields and the transitions of both """
+    merged = {**pending, **new}
+    merged["updated_fields"] = {**pending.get("updated_fields", {}), **new.get("updated_fields", {})}
+    merged["transitions"] = pending.get("transitions", []) + new.get("transitions", [])
+    return merged
+
+
+def enqueue_webhook(c:Cursor, user_id:int, url:str, event:str, payload:dict, coalesce_key:str|None=None, coalesce_seconds:int=0) -> int:
+    """ Add a webhook to the outbox, in the transaction of the change that triggers it
+        (call `webhook_dispatcher.wake()` after the commit to send it right away).
+
+        With a coalescing window the webhook is sent after `coalesce_seconds`: meanwhile the webhooks
+        with the same `coalesce_key` for the same user are merged into it (see merge_payloads) """
+    if coalesce_key is not None and coalesce_seconds > 0:
+        pending = c.execute(queries.WEBHOOK_DELIVERY_TO_COALESCE, (coalesce_key, user_id, DeliveryStatus.PENDING)).fetchone()
+        if pending is not None:
+            # Not claimed by the dispatcher meanwhile (attempts = 0), otherwise a new delivery is added
+            c.execute(
+                'UPDATE webhook_delivery SET url = ?, payload = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND attempts = 0',
+                (url, json.dumps(merge_payloads(json.loads(pending[1]), payload)), pending[0])
+            )
+            if c.rowcount == 1:
+                return pending[0]
+    c.execute(
+        'INSERT INTO webhook_delivery (user_id, url, event, payload, coalesce_key, next_attempt_at) VALUES (?, ?, ?, ?, ?, datetime(\'now\', ?))',
+        (user_id, url, event, json.dumps(payload), coalesce_key, f"+{max(0, coalesce_seconds)} seconds")
+    )
+    return c.lastrowid
+
+
+class WebhookSubscription:
+    """ Webhook of a user with the filters of the events to send (stored as user properties).
+
+        A delivery is queued only if the event type, the project and the status of the object match:
+        no projects or statuses filter means any, the events filter defaults to WEBHOOK_DEFAULT_EVENTS.
+        For `object.updated` the status is the new one, so a statuses filter matches only status changes.
+
+        With a fields filter (opt-in) the payload embeds the `object` with these fields (see WEBHOOK_OBJECT_FIELDS),
+        taken when the event happens, so the receiver does not need to ask for it. """
+
+    FILTER_PROPERTIES = (Property.WEBHOOK_EVENTS, Property.WEBHOOK_PROJECTS, Property.WEBHOOK_STATUSES, Property.WEBHOOK_FIELDS)
+
+    def __init__(self, user_id:int, url:str|None, events:list[str]|None=None, project_ids:list[int]|None=None,
+                 statuses:list[str]|None=None, fields:list[str]|None=None) -> None:
+        self.user_id = user_id
+        self.url = url
+        self.events = events if events is not None else list(WEBHOOK_DEFAULT_EVENTS)
+        self.project_ids = project_ids or None
+        self.statuses = statuses or None
+        self.fields = fields or None
+
+    @staticmethod
+    def from_properties(user_id:int, properties:dict) -> 'WebhookSubscription':
+        """ Subscription from the user properties (key -> value) """
+        def split(key:Property) -> list[str] | None:
+            value = properties.get(key.value)
+            return [item for item in value.split(",") if item] if value is not None else None
+        project_ids = split(Property.WEBHOOK_PROJECTS)
+        return WebhookSubscription(
+            user_id,
+            properties.get(Property.WEBHOOK_URL.value),
+            events=split(Property.WEBHOOK_EVENTS),
+            project_ids=[int(project_id) for project_id in project_ids if project_id.isdigit()] if project_ids else None,
+            statuses=split(Property.WEBHOOK_STATUSES),
+            fields=split(Property.WEBHOOK_FIELDS),
+        )
+
+    @staticmethod
+    def check_filters(events:list|None, project_ids:list|None, statuses:list|None, fields:list|None=None) -> str | None:
+        """ Check the filters, returns the error (None if valid) """
+        if events is not None and (not events or any(event not in EventType.values() for event in events)):
+            return f"Invalid events. Choose at least one of: {', '.join(EventType.values())}"
+        if project_ids is not None and any(isinstance(project_id, bool) or not str(project_id).isdigit() for project_id in project_ids):
+            return "Invalid project_ids. Use the ids of the projects"
+        if statuses is not None and any(status not in ObjectStatus.values() for status in statuses):
+            return f"Invalid statuses. Valid statuses are: {', '.join(ObjectStatus.values())}"
+        if fields is not None and any(field not in WEBHOOK_OBJECT_FIELDS for field in fields):
+            return f"Invalid fields. Valid fields are: {', '.join(WEBHOOK_OBJECT_FIELDS)}"
+        # A relative link cannot be used by the receivers
+        if fields is not None and "content_url" in fields and not BASE_URL:
+            return "Invalid fields. 'content_url' needs the public URL of the application (RR_BASE_URL)"
+        return None
+
+    def matches(self, event_type:EventType, project_id, status:str|None) -> bool:
+        """ Check if the event has to be sent to this webhook """
+        if event_type.value not in self.events:
+            return False
+        if self.project_ids is not None and int(project_id) not in self.project_ids:
+            return False
+        return self.statuses is None or status in self.statuses
+
+    def object_snapshot(self, obj:dict) -> dict:
+        """ Fields of the object embedded in the payload (the content link is signed when the webhook is sent) """
+        snapshot = {field: obj.get(field) for field in self.fields or [] if field != "content_url"}
+        if "content_url" in (self.fields or []):
+            snapshot["content_url"] = {"hash": obj.get("raw_hash")}  # Placeholder, see sign_content_url
+        return snapshot
+
+    def save_filters(self, c:Cursor) -> None:
+        """ Store the filters as user properties (a missing filter property means any) """
+        values = {
+            Property.WEBHOOK_EVENTS: ",".join(self.events),
+            Property.WEBHOOK_PROJECTS: ",".join(str(project_id) for project_id in self.project_ids or []),
+            Property.WEBHOOK_STATUSES: ",".join(self.statuses or []),
+            Property.WEBHOOK_FIELDS: ",".join(self.fields or []),
+        }
+        for key, value in values.items():
+            c.execute('DELETE FROM user_property WHERE key = ? AND user_id = ?', (key.value, self.user_id))
+            if value:
+                c.execute('INSERT INTO user_property (key, value, user_id) VALUES (?, ?, ?)', (key.value, value, self.user_id))
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "events": self.events,
+            "project_ids": self.project_ids,
+            "statuses": self.statuses,
+            "fields": self.fields,
+        }
+
+
+def get_webhook_subscriptions(c:Cursor, project_id) -> list[WebhookSubscription]:
+    """ Webhooks of the owners, reviewers and members of a project """
+    keys = [Property.WEBHOOK_URL, *WebhookSubscription.FILTER_PROPERTIES]
+    rows = c.execute(
+        queries.project_webhooks_query(len(keys)),
+        (*[key.value for key in keys], project_id, Role.OWNER.value, Role.REVIEWER.value, Role.MEMBER.value, USER_SYSTEM_ID)
+    ).fetchall()
+    properties:dict[int, dict] = {}
+    for user_id, key, value in rows:
+        properties.setdefault(user_id, {})[key] = value
+    return [
+        WebhookSubscription.from_properties(user_id, user_properties)
+        for user_id, user_properties in properties.items() if user_properties.get(Property.WEBHOOK_URL.value)
+    ]
+
+
+def enqueue_event_webhooks(c:Cursor, event_type:EventType, project_id:int, object_id:str, data:dict, status:str|None=None) -> int:
+    """ Queue the webhooks of an event for the subscriptions matching it, in the transaction of the change.
+        `status` is the status of the object (the new one for `object.updated`, None if the status did not change).
+
+        Returns the deliveries to send right away: call `webhook_dispatcher.wake()` after the commit if any
+        (the status changes wait for the coalescing window, see enqueue_webhook).
+
+        The statuses filter is applied to each status change: the subscriptions with a statuses filter are not
+        coalesced, every matching transition is its own delivery (a merge would hide it behind the last status) """
+    if system_settings.get_bool(SystemProperty.WEBHOOKS_DISABLED):
+        return 0
+    coalesce_key, coalesce_seconds = None, 0
+    if event_type == EventType.OBJECT_UPDATED:
+        coalesce_key = f"{event_type.value}:{object_id}"
+        coalesce_seconds = system_settings.get_int(SystemProperty.WEBHOOK_COALESCE_SECONDS, SYSTEM_WEBHOOK_COALESCE_SECONDS)
+    payload = {
+        "event": event_type.value,
+        "object_id": object_id,
+        "project_id": project_id,
+        **data,
+    }
+    due = 0
+    obj = None
+    for subscription in get_webhook_subscriptions(c, project_id):
+        if not subscription.matches(event_type, project_id, status):
+            continue
+        subscription_payload = payload
+        if subscription.fields:
+            # Snapshot of the object read once per event (none for the deleted objects)
+            if obj is None:
+                row = c.execute(queries.OBJECT, (object_id,)).fetchone()
+                obj = Object.from_db_row(row).to_dict() if row else {}
+            if obj:
+                subscription_payload = {**payload, "object": subscription.object_snapshot(obj)}
+        subscription_coalesce_seconds = coalesce_seconds if subscription.statuses is None else 0
+        enqueue_webhook(c, subscription.user_id, subscription.url, event_type.value, subscription_payload,
+                        coalesce_key=coalesce_key, coalesce_seconds=subscription_coalesce_seconds)
+        due += 1 if subscription_coalesce_seconds == 0 else 0
+    return due
+
+
+def content_signature(object_id:str, content_hash:str, expires:int) -> str:
+    """ Signature of a link to the content of an object (see content_url) """
+    return hmac.new(SECRET_KEY.encode(), f"{object_id}:{content_hash}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def content_url(object_id:str, content_hash:str|None) -> str:
+    """ Link to download the content of an object without authentication, valid for WEBHOOK_CONTENT_URL_TTL_SECONDS
+        and only while the object has this content """
+    content_hash = content_hash or ""
+    expires = int(time.time()) + WEBHOOK_CONTENT_URL_TTL_SECONDS
+    query = urlencode({"hash": content_hash, "expires": expires, "signature": content_signature(object_id, content_hash, expires)})
+    return f"{BASE_URL}/api/objects/{object_id}/content/signed?{query}"
+
+
+def check_content_signature(object_id:str, content_hash:str, expires:str|None, signature:str) -> bool:
+    """ Check a link made by content_url (not expired and not tampered with) """
+    if expires is None or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(content_signature(object_id, content_hash, int(expires)), signature)
+
+
+def sign_content_url(payload:str) -> str:
+    """ Replace the content link placeholder of the object snapshot with a signed link (at every attempt, so it is fresh) """
+    if '"content_url"' not in payload:
+        return payload
+    data = json.loads(payload)
+    snapshot = data.get("object")
+    if not isinstance(snapshot, dict) or not isinstance(snapshot.get("content_url"), dict):
+        return payload
+    snapshot["content_url"] = content_url(data["object_id"], snapshot["content_url"].get("hash"))
+    return json.dumps(data)
+
+
+def backoff_delay(attempts:int, retry_after:float|None=None) -> float:
+    """ Seconds before the next attempt: exponential with jitter (half fixed, half random),
+        at least the Retry-After asked by the receiver """
+    delay = min(WEBHOOK_BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1), WEBHOOK_BACKOFF_MAX_SECONDS)
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, WEBHOOK_BACKOFF_MAX_SECONDS))
+    return delay
+
+
+def send_webhook(delivery_id:int, url:str, event:str, payload:str) -> tuple[int|None, str|None, float|None]:
+    """ POST a webhook, returns the status code (None if not sent), the error (None if delivered)
+        and the seconds to wait asked by the receiver (Retry-After) """
+    headers = {
+        "Content-Type": "application/json",
+        "X-RR-Event": event,
+        "X-RR-Delivery": str(delivery_id),
+    }
+    try:
+        response = http_client.post(url, data=payload, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT_SECONDS, WEBHOOK_TIMEOUT_SECONDS))
+    except RequestException as e:
+        return None, f"{type(e).__name__}: {e}"[:500], None
+    if 200 <= response.status_code < 300:
+        return response.status_code, None, None
+    retry_after = response.headers.get("Retry-After")
+    return response.status_code, f"HTTP {response.status_code}", float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+def verify_webhook_endpoint(url:str) -> bool:
+    """ Check that a webhook URL answers (any HTTP status) and save the result with the health of the endpoint.
+        A reachable endpoint paused by the circuit breaker is probed at the next dispatch """
+    try:
+        http_client.head(url, timeout=(HTTP_CONNECT_TIMEOUT_SECONDS, WEBHOOK_TIMEOUT_SECONDS), allow_redirects=True)
+        verification, error = "ok", None
+    except RequestException as e:
+        verification, error = "failed", f"{type(e).__name__}: {e}"[:500]
+    db = Database()
+    try:
+        db.c.execute(
+            '''
+            INSERT INTO webhook_endpoint (url, verification, verification_error, verified_at, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ON CONFLICT(url) DO UPDATE SET
+                verification = excluded.verification,
+                verification_error = excluded.verification_error,
+                verified_at = excluded.verified_at,
+                retry_at = CASE WHEN excluded.verification = 'ok' AND state != ? THEN datetime('now') ELSE retry_at END,
+                updated_at = CURRENT_TIMESTAMP
+            ''',
+            (url, verification, error, CircuitState.CLOSED)
+        )
+        db.commit()
+    finally:
+        db.close()
+    if error is None:
+        log.info(f"Webhook endpoint {url} verified")
+    else:
+        log.warning(f"Webhook endpoint {url} not reachable: {error}")
+    return error is None
+
+
+def schedule_endpoint_verification(c:Cursor, url:str) -> None:
+    """ Mark a webhook URL as being checked, in the transaction that saves it
+        (call `webhook_dispatcher.verify(url)` after the commit) """
+    c.execute(
+        '''
+        INSERT INTO webhook_endpoint (url, verification, verification_error, updated_at) VALUES (?, 'pending', NULL, CURRENT_TIMESTAMP)
+        ON CONFLICT(url) DO UPDATE SET verification = 'pending', verification_error = NULL, updated_at = CURRENT_TIMESTAMP
+        ''',
+        (url,)
+    )
+
+
+class WebhookDispatcher:
+    """ Sends the webhooks of the outbox (`webhook_delivery`) with a bounded pool of workers.
+
+        The due deliveries are claimed by pushing their next attempt after the request timeout (a lease):
+        if the process stops during an attempt, the delivery is sent again once the lease expires.
+        Failed deliveries are retried with exponential backoff until WEBHOOK_MAX_ATTEMPTS, then they are dead.
+        After WEBHOOK_CIRCUIT_FAILURE_THRESHOLD consecutive failures, the deliveries to an endpoint are paused (circuit breaker). """
+
+    def __init__(self, workers:int=WEBHOOK_WORKERS) -> None:
+        self._workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="webhook")
+        self._lease_seconds = int(HTTP_CONNECT_TIMEOUT_SECONDS + WEBHOOK_TIMEOUT_SECONDS) * 2 + 10
+        self._in_flight = 0
+        self._dispatch_pending = False
+        self._lock = threading.Lock()
+        self._health_lock = threading.Lock()
+        self._stats = {
+            "attempts": 0,
+            "delivered": 0,
+            "failed": 0,
+            "dead": 0,
+            "errors": 0,
+            "circuit_trips": 0,
+        }
+
+    def wake(self) -> None:
+        """ Look for due deliveries now instead of waiting for the next scheduled dispatch """
+        with self._lock:
+            if self._dispatch_pending:
+                return
+            self._dispatch_pending = True
+        self._executor.submit(self._dispatch_once)
+
+    def _dispatch_once(self) -> None:
+        with self._lock:
+            self._dispatch_pending = False
+        self.dispatch()
+
+    def dispatch(self) -> int:
+        """ Claim the due deliveries (as many as the free workers) and send them, returns how many were claimed.
+
+            The deliveries to a paused endpoint (circuit open) wait: once its pause is over, a single delivery
+            is sent as a probe (circuit half-open) and its result closes the circuit or pauses the endpoint again """
+        with self._lock:
+            free = self._workers - self._in_flight
+            if free <= 0:
+                return 0
+            self._in_flight += free  # Reserve the workers while claiming
+        claimed = []
+        db = Database()
+        try:
+            lease = f"+{self._lease_seconds} seconds"
+            # The probe is leased like a delivery: if it is lost, the endpoint is probed again once the lease expires
+            probes = db.c.execute(
+                f'''
+                UPDATE webhook_endpoint
+                SET state = ?, retry_at = datetime('now', ?), updated_at = CURRENT_TIMESTAMP
+                WHERE url IN ({queries.WEBHOOK_ENDPOINTS_TO_PROBE})
+                RETURNING url
+                ''',
+                (CircuitState.HALF_OPEN, lease, CircuitState.OPEN, CircuitState.HALF_OPEN, DeliveryStatus.PENDING, free)
+            ).fetchall()
+            for (url,) in probes:
+                claimed += self._claim(db, queries.DUE_WEBHOOK_ENDPOINT_DELIVERY, (url, DeliveryStatus.PENDING))
+            if len(claimed) < free:
+                claimed += self._claim(
+                    db,
+                    queries.DUE_WEBHOOK_DELIVERIES,
+                    (DeliveryStatus.PENDING, CircuitState.OPEN, CircuitState.HALF_OPEN, free - len(claimed))
+                )
+            db.commit()
+        except Exception as e:
+            log.error(f"Webhook dispatcher: unable to claim the deliveries: {e}")
+            claimed = []
+            with self._lock:
+                self._stats["errors"] += 1
+        finally:
+            db.close()
+            with self._lock:
+                self._in_flight -= free - len(claimed)
+        for delivery in claimed:
+            self._executor.submit(self._deliver, *delivery)
+        return len(claimed)
+
+    def _claim(self, db:Database, select_query:str, params:tuple) -> list[tuple]:
+        """ Lease the deliveries selected by the query (ids), returns them (id, url, event, payload, attempts) """
+        return db.c.execute(
+            f'''
+            UPDATE webhook_delivery
+            SET attempts = attempts + 1, next_attempt_at = datetime('now', ?), updated_at = CURRENT_TIMESTAMP
+            WHERE id IN ({select_query})
+            RETURNING id, url, event, payload, attempts
+            ''',
+            (f"+{self._lease_seconds} seconds", *params)
+        ).fetchall()
+
+    def _deliver(self, delivery_id:int, url:str, event:str, payload:str, attempts:int) -> None:
+        try:
+            start = time.monotonic()
+            status_code, error, retry_after = send_webhook(delivery_id, url, event, sign_content_url(payload))
+            latency_ms = (time.monotonic() - start) * 1000
+            self._save_result(delivery_id, url, attempts, status_code, error, retry_after, latency_ms)
+            log.info(f"Webhook {event} #{delivery_id} sent to {url} | Status: {status_code} | Attempt: {attempts} | {latency_ms:.0f} ms")
+        except Exception as e:
+            log.error(f"Webhook dispatcher: error on delivery #{delivery_id}: {e}")
+            with self._lock:
+                self._stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        # Keep the workers busy while there are due deliveries
+        self.wake()
+
+    def _save_result(self, delivery_id:int, url:str, attempts:int, status_code:int|None, error:str|None,
+                     retry_after:float|None, latency_ms:float) -> None:
+        if error is None:
+            status, next_attempt, counter = DeliveryStatus.DELIVERED, None, "delivered"
+        elif attempts >= WEBHOOK_MAX_ATTEMPTS:
+            status, next_attempt, counter = DeliveryStatus.DEAD, None, "dead"
+            log.warning(f"Webhook #{delivery_id} dead after {attempts} attempts: {error}")
+        else:
+            status, next_attempt, counter = DeliveryStatus.PENDING, f"+{int(backoff_delay(attempts, retry_after))} seconds", "failed"
+        db = Database()
+        try:
+            # Health updates of an endpoint are read-modify-write: serialized between the workers
+            with self._health_lock:
+                db.c.execute(
+                    '''
+                    UPDATE webhook_delivery
+                    SET status = ?, next_attempt_at = COALESCE(datetime('now', ?), next_attempt_at),
+                        last_status_code = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    ''',
+                    (status, next_attempt, status_code, error, delivery_id)
+                )
+                tripped = self._save_health(db, url, error, latency_ms)
+                db.commit()
+        finally:
+            db.close()
+        if tripped is not None:
+            log.warning(f"Webhook endpoint {url} paused for {tripped} seconds after {error}")
+        with self._lock:
+            self._stats["attempts"] += 1
+            self._stats[counter] += 1
+            if tripped is not None:
+                self._stats["circuit_trips"] += 1
+
+    def _save_health(self, db:Database, url:str, error:str|None, latency_ms:float) -> int | None:
+        """ Update the success rate, latency and circuit breaker of an endpoint with the result of a delivery,
+            returns the seconds of pause if the circuit was opened """
+        row = db.c.execute(
+            "SELECT state, success_rate, latency_ms, consecutive_failures, trips FROM webhook_endpoint WHERE url = ?", (url,)
+        ).fetchone()
+        state, success_rate, avg_latency_ms, consecutive_failures, trips = row or (CircuitState.CLOSED, None, None, 0, 0)
+        success = 1.0 if error is None else 0.0
+        alpha = WEBHOOK_HEALTH_EWMA_ALPHA
+        success_rate = success if success_rate is None else alpha * success + (1 - alpha) * success_rate
+        avg_latency_ms = latency_ms if avg_latency_ms is None else alpha * latency_ms + (1 - alpha) * avg_latency_ms
+        open_seconds = None
+        if error is None:
+            state, consecutive_failures, trips, retry_at = CircuitState.CLOSED, 0, 0, None
+        else:
+            consecutive_failures += 1
+            retry_at = None
+            if state == CircuitState.HALF_OPEN or (state == CircuitState.CLOSED and consecutive_failures >= WEBHOOK_CIRCUIT_FAILURE_THRESHOLD):
+                trips += 1
+                open_seconds = int(min(WEBHOOK_CIRCUIT_OPEN_SECONDS * 2 ** (trips - 1), WEBHOOK_BACKOFF_MAX_SECONDS))
+                state, retry_at = CircuitState.OPEN, f"+{open_seconds} seconds"
+        db.c.execute(
+            '''
+            INSERT INTO webhook_endpoint (url, state, requests, errors, success_rate, latency_ms, consecutive_failures, trips, retry_at, last_error, updated_at)
+            VALUES (?, ?, 1, ?, ?, ?, ?, ?, datetime('now', ?), ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(url) DO UPDATE SET
+                state = excluded.state,
+                requests = requests + 1,
+                errors = errors + excluded.errors,
+                success_rate = excluded.success_rate,
+                latency_ms = excluded.latency_ms,
+                consecutive_failures = excluded.consecutive_failures,
+                trips = excluded.trips,
+                retry_at = CASE WHEN excluded.state = ? THEN NULL ELSE COALESCE(excluded.retry_at, retry_at) END,
+                last_error = COALESCE(excluded.last_error, last_error),
+                updated_at = CURRENT_TIMESTAMP
+            ''',
+            (url, state, 0 if error is None else 1, success_rate, avg_latency_ms, consecutive_failures, trips, retry_at, error, CircuitState.CLOSED)
+        )
+        return open_seconds
+
+    def verify(self, url:str) -> None:
+        """ Check in the background that a webhook URL answers (see verify_webhook_endpoint) """
+        self._executor.submit(verify_webhook_endpoint, url)
+
+    def stats(self) -> dict:
+        """ Current workers usage, counters, deliveries of the outbox and endpoints by status """
+        db = Database()
+        try:
+            outbox = dict(db.c.execute("SELECT status, COUNT(*) FROM webhook_delivery GROUP BY status").fetchall())
+            endpoints = dict(db.c.execute("SELECT state, COUNT(*) FROM webhook_endpoint GROUP BY state").fetchall())
+        finally:
+            db.close()
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "in_flight": self._in_flight,
+                "outbox": outbox,
+                "endpoints": endpoints,
+                **self._stats,
+            }
+
+
+webhook_dispatcher = WebhookDispatcher()
@@ -1,6 +1,7 @@
 from app.server import app
-from app.config import log, DEBUG
+from app.config import log, DEBUG, SERVER_THREADS, EVENTS_MAX_CLIENTS, DB_MAINTENANCE_INTERVAL_MINUTES, WEBHOOK_DISPATCH_INTERVAL_SECONDS
 from app.database import Database
+from app.webhooks import webhook_dispatcher
 from waitress import serve
 
 def main():
@@ -8,6 +9,46 @@ def main():
     db = Database()
     db.initialize()
     db.close()
+    app.scheduler.add_job(
+        func=Database.maintenance,
+        name="database_maintenance",
+        trigger="interval",
+        minutes=DB_MAINTENANCE_INTERVAL_MINUTES,
+        max_instances=1,
+        coalesce=True,
+    )
+    app.scheduler.add_job(
+        func=Database.collect_blob_garbage,
+        name="storage_garbage_collection",
+        trigger="interval",
+        hours=24,
+        max_instances=1,
+        coalesce=True,
+    )
+    app.scheduler.add_job(
+        func=Database.purge_change_log,
+        name="change_log_retention",
+        trigger="interval",
+        hours=24,
+        max_instances=1,
+        coalesce=True,
+    )
+    app.scheduler.add_job(
+        func=Database.purge_webhook_deliveries,
+        name="webhook_deliveries_retention",
+        trigger="interval",
+        hours=24,
+        max_instances=1,
+        coalesce=True,
+    )
+    app.scheduler.add_job(
+        func=webhook_dispatcher.dispatch,
+        name="webhook_dispatcher",
+        trigger="interval",
+        seconds=WEBHOOK_DISPATCH_INTERVAL_SECONDS,
+        max_instances=1,
+        coalesce=True,
+    )
     log.info("Starting server...")
     if DEBUG:
         app.config["TEMPLATES_AUTO_RELOAD"] = True
@@ -18,7 +59,8 @@ def main():
             load_dotenv=True
         )
     else:
-        serve(app, host="0.0.0.0", port="8080")
+        # An open live events stream holds a thread until it is closed: one more thread per stream, the requests keep theirs
+        serve(app, host="0.0.0.0", port="8080", threads=SERVER_THREADS + EVENTS_MAX_CLIENTS)
 if __name__ == "__main__":
     main()
     
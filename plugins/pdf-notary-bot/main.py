@@ -24,16 +24,49 @@ if PLUGIN_IS_BEHIND_PROXY:
 app.register_blueprint(core_blueprint, url_prefix=PLUGIN_BASE_URL_PREFIX)
 scheduler.start()
 
-# Background service to clean deleted reviews
-@scheduler.scheduled_job('interval', hours=24)
-def clean_deleted_reviews() -> None:
-    log.info("Starting cleaning background service")
+CHANGES_TOKEN_PATH = os.path.join(PLUGIN_SIGNED_PDFS_FOLDER, ".changes_token")
+
+
+def read_changes_token() -> int | None:
+    """ Token of the changes feed saved by the last cleaning """
+    try:
+        with open(CHANGES_TOKEN_PATH) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def save_changes_token(token:int) -> None:
+    """ Save the token of the changes feed for the next cleaning """
+    with open(CHANGES_TOKEN_PATH, "w") as f:
+        f.write(str(token))
+
+
+def is_review_deleted(project_id, object_id:str) -> bool:
+    """ Check if the review of this plugin on the object (or the object itself) does not exist anymore """
+    res = requests.get(url=f"{API_BASE_URL}/objects/{object_id}", headers={"x-api-key": API_KEY})
+    if res.status_code == 404:
+        return True
+    if res.status_code != 200 or project_id is None:
+        return False
+    res = requests.get(
+        url=f"{API_BASE_URL}/projects/{project_id}/objects/{object_id}/integrations/reviews",
+        headers={"x-api-key": API_KEY}
+    )
+    if res.status_code != 200:
+        return False
+    return not any(review.get("name") == PLUGIN_NAME for review in res.json().get("reviews", []))
+
+
+def clean_all_deleted_reviews() -> bool:
+    """ Delete the signed PDFs without a review, checking all the reviews of this user """
     res = requests.get(
         url=f"{API_BASE_URL}/integrations/reviews", 
         headers={"x-api-key": API_KEY}
     )
     if res.status_code != 200:
         log.error("Unable to get reviews for this user")
+        return False
 
     # Track all valid object IDs from reviews
     valid_object_ids = set()
@@ -53,10 +86,75 @@ def clean_deleted_reviews() -> None:
             file_path = os.path.join(PLUGIN_SIGNED_PDFS_FOLDER, file_name)
             log.info("Deleting signed PDF for Object ID = %s", current_object_id)
             os.remove(file_path)
+    return True
+
+
+def subscribe_webhook_filters() -> None:
+    """ Ask Round Review to send only the approvals to the webhook (the other notifications are ignored anyway),
+        with the document fields needed to sign it """
+    try:
+        res = requests.put(
+            url=f"{API_BASE_URL}/webhooks/subscription",
+            json={"events": ["object.updated"], "statuses": ["Approved"], "fields": ["name", "description", "raw_hash", "content_url"]},
+            headers={"x-api-key": API_KEY},
+            timeout=10,
+        )
+    except requests.RequestException as e:
+        log.warning("Unable to set the webhook filters: %s", e)
+        return
+    if res.status_code != 200:
+        log.warning("Unable to set the webhook filters (status %s)", res.status_code)
+        return
+    log.info("Webhook filters set: only the approvals are notified, with the document")
+
+
+# Background service to clean deleted reviews
+@scheduler.scheduled_job('interval', hours=24)
+def clean_deleted_reviews() -> None:
+    log.info("Starting cleaning background service")
+    token = read_changes_token()
+
+    # Follow the changes feed since the last cleaning: only the deleted reviews and objects are checked
+    deleted = {}
+    while token is not None:
+        res = requests.get(url=f"{API_BASE_URL}/changes", params={"since": token}, headers={"x-api-key": API_KEY})
+        if res.status_code == 410:
+            log.warning("Changes feed token expired, checking all the reviews")
+            token = None
+            break
+        if res.status_code != 200:
+            log.error("Unable to get the changes for this user")
+            return
+        data = res.json()
+        for change in data.get("changes", []):
+            if change.get("entity") in ("object", "review") and change.get("action") == "delete":
+                deleted[change["object_id"]] = change.get("project_id") or deleted.get(change["object_id"])
+        token = data["next_token"]
+        if not data.get("has_more"):
+            break
+
+    if token is None:
+        # First cleaning (or expired token): take the current token first, then check everything
+        res = requests.get(url=f"{API_BASE_URL}/changes", headers={"x-api-key": API_KEY})
+        if res.status_code != 200:
+            log.error("Unable to get the changes token for this user")
+            return
+        token = res.json()["next_token"]
+        if not clean_all_deleted_reviews():
+            return
+    else:
+        for object_id, project_id in deleted.items():
+            file_path = os.path.join(PLUGIN_SIGNED_PDFS_FOLDER, f"{object_id}.pdf")
+            if os.path.exists(file_path) and is_review_deleted(project_id, object_id):
+                log.info("Deleting signed PDF for Object ID = %s", object_id)
+                os.remove(file_path)
+
+    save_changes_token(token)
     log.info("Cleaning background service completed")
 
 
 if __name__ == '__main__':
+    scheduler.add_job(subscribe_webhook_filters)
     if DEBUG:
         app.config["TEMPLATES_AUTO_RELOAD"] = True
         app.run(host="0.0.0.0", port=8081, debug=DEBUG)
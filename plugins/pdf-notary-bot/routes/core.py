@@ -2,6 +2,7 @@ import os, json, io, hashlib
 import base64
 import requests
 from types import SimpleNamespace
+from urllib.parse import urljoin
 from flask import request, Blueprint, current_app
 from pyhanko.sign import SimpleSigner, PdfSignatureMetadata, fields, signers
 from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
@@ -44,27 +45,43 @@ def handle_webhook():
         log.info("Notification ignored")
         return {"message": "Notification ignored"}, 200
 
-    res = requests.get(
-        url=f"{API_BASE_URL}/objects/{object_id}?raw=1", 
-        headers={"x-api-key": API_KEY}
-    )
-
-    if res.status_code != 200:
-        log.error("Failed to fetch PDF")
-        return {"error": "Failed to fetch PDF"}, 500
-
-    object = json.loads(json.dumps(res.json()), object_hook=lambda d: SimpleNamespace(**d)).object
+    # The document is embedded in the notification when the webhook asks for its fields, otherwise it is fetched
+    snapshot = data.get("object")
+    if snapshot is not None:
+        object = SimpleNamespace(**snapshot)
+    else:
+        res = requests.get(
+            url=f"{API_BASE_URL}/objects/{object_id}", 
+            headers={"x-api-key": API_KEY}
+        )
+
+        if res.status_code != 200:
+            log.error("Failed to fetch object")
+            return {"error": "Failed to fetch object"}, 500
+
+        object = json.loads(json.dumps(res.json()), object_hook=lambda d: SimpleNamespace(**d)).object
     
     if "NO_SIGNATURE" in object.description: 
         if status != "Approved":
             log.warning("Notification valid, but NO_SIGNATURE found in description. Aborted.")
             return {"message": "Notification valid, but NO_SIGNATURE found in description. Aborted."}, 200
     
+    # Fetch the PDF content (binary), with the signed link of the notification if any
+    if getattr(object, "content_url", None):
+        res = requests.get(url=urljoin(API_BASE_URL, object.content_url))
+    else:
+        res = requests.get(
+            url=f"{API_BASE_URL}/objects/{object_id}/content",
+            headers={"x-api-key": API_KEY}
+        )
+
+    if res.status_code != 200:
+        log.error("Failed to fetch PDF")
+        return {"error": "Failed to fetch PDF"}, 500
+
     # Sign the PDF
     pdf_writer = IncrementalPdfFileWriter(
-        io.BytesIO(
-            base64.urlsafe_b64decode(object.raw)
-        ), 
+        io.BytesIO(res.content), 
         strict=False
     )
     sign_img = None
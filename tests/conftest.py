@@ -0,0 +1,69 @@
+""" Fixtures of the tests: the application on a new database, in a temporary directory.
+
+    Usage (from the repository root): python -m pytest """
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ADMIN_PASSWORD = "test-password"
+PDF = b"%PDF-1.4\n" + b"x" * 2000 + b"\n%%EOF"
+
+
+def pytest_configure(config) -> None:
+    """ The database and the blob store paths are relative: work in a temporary directory, before the app is imported """
+    os.environ["RR_DEFAULT_USER_PASSWORD"] = ADMIN_PASSWORD
+    os.chdir(tempfile.mkdtemp(prefix="roundreview-tests-"))
+    os.makedirs("database")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.server import app
+    from app.database import Database
+    db = Database()
+    db.initialize()
+    db.close()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def db(app):
+    from app.database import Database
+    db = Database()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def client(app):
+    """ Client logged in as the admin """
+    from app.config import USER_ADMIN_EMAIL
+    client = app.test_client()
+    response = client.post("/login", data={"email": USER_ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def project_id(client) -> int:
+    """ New project owned by the admin """
+    response = client.post("/api/projects", json={"title": "Tests"})
+    assert response.status_code == 201, response.json
+    return response.json["project_id"]
+
+
+def upload(client, project_id:int, name:str="document", path:str="/", content:bytes=PDF) -> str:
+    """ Upload a document, returns its id """
+    response = client.post(
+        f"/api/projects/{project_id}/objects",
+        data={"name": name, "path": path, "file": (io.BytesIO(content), f"{name}.pdf", "application/pdf")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 201, response.json
+    return response.json["object_id"]
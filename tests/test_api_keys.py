@@ -0,0 +1,33 @@
+from app.config import USER_SYSTEM_ID
+from app.models import Property
+
+ADMIN_ID = USER_SYSTEM_ID + 1
+
+
+def enable_api_key(client, db) -> str:
+    assert client.post("/settings/properties", data={"enable_api_key": "on"}).status_code == 200
+    row = db.c.execute("SELECT value FROM user_property WHERE key = ? AND user_id = ?", (Property.API_KEY.value, ADMIN_ID)).fetchone()
+    assert row is not None
+    return row[0]
+
+
+def test_revoked_api_key_is_rejected_immediately(app, client, db):
+    api_key = enable_api_key(client, db)
+    anonymous = app.test_client()
+    # Twice: the second request is served from the cache
+    for _ in range(2):
+        assert anonymous.get("/api/projects", headers={"X-API-Key": api_key}).status_code == 200
+
+    assert client.post("/settings/properties", data={}).status_code == 200
+    assert anonymous.get("/api/projects", headers={"X-API-Key": api_key}).status_code == 401
+
+    # A new key works right away, the old one stays revoked
+    new_api_key = enable_api_key(client, db)
+    assert new_api_key != api_key
+    assert anonymous.get("/api/projects", headers={"X-API-Key": new_api_key}).status_code == 200
+    assert anonymous.get("/api/projects", headers={"X-API-Key": api_key}).status_code == 401
+    assert client.post("/settings/properties", data={}).status_code == 200
+
+
+def test_unknown_api_key(app):
+    assert app.test_client().get("/api/projects", headers={"X-API-Key": "unknown"}).status_code == 401
@@ -0,0 +1,58 @@
+from app.database import Database
+from conftest import upload
+
+
+def changes_since(client, token:int, limit:int=500) -> tuple[list[dict], int]:
+    """ All the changes after a token, following has_more, and the token to resume from """
+    changes = []
+    while True:
+        response = client.get(f"/api/changes?since={token}&limit={limit}")
+        assert response.status_code == 200, response.json
+        changes += response.json["changes"]
+        token = response.json["next_token"]
+        if not response.json["has_more"]:
+            return changes, token
+
+
+def test_changes_feed(client, db, project_id):
+    token = client.get("/api/changes").json["next_token"]
+
+    object_id = upload(client, project_id)
+    assert client.put(f"/api/objects/{object_id}", json={"status": "Approved"}).status_code == 200
+    comment = client.post(f"/api/objects/{object_id}/comments", json={"page": 1, "x": 1, "y": 1, "text": "Hi"}).json["comment"]
+    assert client.delete(f"/api/objects/{object_id}").status_code == 200
+
+    # Changes of a project the user is not a member of
+    db.c.execute("INSERT INTO project (title) VALUES ('Other')")
+    db.c.execute("INSERT INTO object (id, path, project_id, name, status) VALUES ('other', '/', ?, 'other', 'No Review')", (db.c.lastrowid,))
+    db.commit()
+
+    changes, next_token = changes_since(client, token, limit=2)
+    entries = [(change["entity"], change["entity_id"], change["action"]) for change in changes]
+    assert ("object", object_id, "create") in entries
+    assert ("object", object_id, "update") in entries
+    assert ("comment", comment["id"], "create") in entries
+    assert entries[-1] == ("object", object_id, "delete")
+    assert all(change["project_id"] == project_id for change in changes)
+    assert [change["token"] for change in changes] == sorted(change["token"] for change in changes)
+
+    assert changes_since(client, next_token) == ([], next_token)
+
+
+def test_changes_feed_validation(client):
+    assert client.get("/api/changes?since=-1").status_code == 400
+    assert client.get("/api/changes?since=abc").status_code == 400
+    assert client.get("/api/changes?limit=0").status_code == 400
+
+
+def test_changes_feed_retention(client, db, project_id):
+    token = client.get("/api/changes").json["next_token"]
+    upload(client, project_id)
+    db.c.execute("UPDATE change_log SET created_at = datetime('now', '-400 days')")
+    db.commit()
+    Database.purge_change_log()
+
+    assert client.get(f"/api/changes?since={token}").status_code == 410
+    next_token = client.get("/api/changes").json["next_token"]
+    assert next_token > token
+    assert client.get(f"/api/changes?since={next_token}").status_code == 200
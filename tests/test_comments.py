@@ -0,0 +1,92 @@
+import pytest
+from app.config import USER_SYSTEM_ID
+from conftest import upload
+
+ADMIN_ID = USER_SYSTEM_ID + 1
+
+
+def test_comment_crud(client, project_id):
+    object_id = upload(client, project_id)
+    url = f"/api/objects/{object_id}/comments"
+
+    response = client.post(url, json={"page": 2, "x": 10.5, "y": 20, "text": " Fix the title "})
+    assert response.status_code == 201, response.json
+    comment = response.json["comment"]
+    assert (comment["page"], comment["x"], comment["y"], comment["text"]) == (2, 10.5, 20.0, "Fix the title")
+    assert [c["id"] for c in client.get(url).json["comments"]] == [comment["id"]]
+    assert client.get(url + "?page=1").json["comments"] == []
+
+    response = client.patch(f"{url}/{comment['id']}", json={"resolved": True, "page": 3, "x": 1, "y": 2})
+    assert response.status_code == 200, response.json
+    assert (response.json["comment"]["page"], response.json["comment"]["x"], response.json["comment"]["resolved"]) == (3, 1.0, True)
+
+    assert client.delete(f"{url}/{comment['id']}").status_code == 200
+    assert client.get(url).json["comments"] == []
+    assert client.delete(f"{url}/{comment['id']}").status_code == 404
+
+
+@pytest.mark.parametrize("fields", [
+    {"page": 1, "x": "nan", "y": 1},
+    {"page": 1, "x": 1, "y": "inf"},
+    {"page": 1, "x": "-Infinity", "y": 1},
+    {"page": 1, "x": 1, "y": "1e400"},
+    {"page": 1, "x": 1e400, "y": 1},
+    {"page": "one", "x": 1, "y": 1},
+    {"page": 1, "x": None, "y": 1},
+])
+def test_comment_invalid_position(client, project_id, fields):
+    object_id = upload(client, project_id)
+    url = f"/api/objects/{object_id}/comments"
+    response = client.post(url, json={**fields, "text": "Hi"})
+    assert response.status_code == 400
+    assert response.json["error"] == "Invalid fields. 'page' must be a number, 'x' and 'y' coordinates"
+
+    comment = client.post(url, json={"page": 1, "x": 1, "y": 1, "text": "Hi"}).json["comment"]
+    response = client.patch(f"{url}/{comment['id']}", json=fields)
+    assert response.status_code == 400
+    assert response.json["error"] == "Invalid fields. 'page' must be a number, 'x' and 'y' coordinates"
+
+
+def test_comment_validation(client, project_id):
+    object_id = upload(client, project_id)
+    url = f"/api/objects/{object_id}/comments"
+    assert client.post(url, json={"page": 1, "x": 1, "text": "Hi"}).status_code == 400
+    assert client.post(url, json={"page": 0, "x": 1, "y": 1, "text": "Hi"}).status_code == 400
+    assert client.post(url, json={"page": 1, "x": 1, "y": 1, "text": "  "}).status_code == 400
+    assert client.post("/api/objects/unknown/comments", json={"page": 1, "x": 1, "y": 1, "text": "Hi"}).status_code == 404
+
+    comment = client.post(url, json={"page": 1, "x": 1, "y": 1, "text": "Hi"}).json["comment"]
+    assert client.patch(f"{url}/{comment['id']}", json={"other": 1}).status_code == 400
+    assert client.patch(f"{url}/{comment['id']}", json={"page": 0}).status_code == 400
+    assert client.patch(f"{url}/{comment['id']}", json={"text": ""}).status_code == 400
+    assert client.patch(f"{url}/{comment['id']}", json={"resolved": "maybe"}).status_code == 400
+    assert client.patch(f"{url}/unknown", json={"resolved": True}).status_code == 404
+
+
+def test_comment_text_and_position_only_by_the_author(client, db, project_id):
+    object_id = upload(client, project_id)
+    url = f"/api/objects/{object_id}/comments"
+    comment = client.post(url, json={"page": 1, "x": 1, "y": 1, "text": "Hi"}).json["comment"]
+    db.c.execute("UPDATE comment SET user_id = ? WHERE id = ?", (USER_SYSTEM_ID, comment["id"]))
+    db.commit()
+
+    assert client.patch(f"{url}/{comment['id']}", json={"text": "Changed"}).status_code == 403
+    assert client.patch(f"{url}/{comment['id']}", json={"x": 5}).status_code == 403
+    assert client.patch(f"{url}/{comment['id']}", json={"resolved": True}).status_code == 200
+
+
+def test_object_update_comments_field_is_deprecated(client, project_id):
+    object_id = upload(client, project_id)
+
+    response = client.put(f"/api/objects/{object_id}", json={"comments": "{}"})
+    assert response.status_code == 200, response.json
+    assert response.headers["Deprecation"] == "true"
+    assert "Warning" in response.headers
+
+    response = client.put(f"/api/objects/{object_id}", json={"comments": "{}", "name": "renamed"})
+    assert response.status_code == 200
+    assert response.headers["Deprecation"] == "true"
+    assert client.get(f"/api/objects/{object_id}").json["object"]["name"] == "renamed"
+
+    response = client.put(f"/api/objects/{object_id}", json={"name": "again"})
+    assert "Deprecation" not in response.headers
@@ -0,0 +1,84 @@
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from app.database import Database
+from app.storage import blob_store
+
+SCHEMA_DIR = Path(__file__).resolve().parent.parent / "app" / "schema"
+
+
+def baseline_database(path:str) -> None:
+    """ Database of the first release (schemas 0 and 1) with documents saved in object.raw and JSON comments """
+    comments = {"inlineComments": [
+        {"id": "comment-1700000000000", "page": 1, "x": 10, "y": 20.5, "authorId": 2, "text": "Fix the title", "resolved": True},
+        {"id": "comment-1700000001000", "page": 2, "x": 1, "y": 2, "authorId": 2, "text": "Typo"},
+    ]}
+    free_form = {"inlineComments": [{"id": "comment-1", "page": "two", "text": "Not migrated"}]}
+    con = sqlite3.connect(path)
+    for name in ("0-db_init-versioning.sql", "1-db_init-tables.sql"):
+        con.executescript((SCHEMA_DIR / name).read_text())
+    con.execute("INSERT INTO user (id, name, email, password, admin) VALUES (1, 'System', 'system@local', '', -1)")
+    con.execute("INSERT INTO user (id, name, email, password, admin) VALUES (2, 'Admin', 'admin@local', '', 1)")
+    con.execute("INSERT INTO project (id, title) VALUES (1, 'Baseline')")
+    con.execute("INSERT INTO project_user (project_id, user_id, role) VALUES (1, 2, 'Owner')")
+    con.executemany(
+        "INSERT INTO object (id, path, user_id, project_id, name, raw, comments, status) VALUES (?, ?, 2, 1, ?, ?, ?, 'No Review')",
+        [
+            ("a", "/reports/2024", "first", b"content A", json.dumps(comments)),
+            ("b", "/reports", "second", b"content B", None),
+            ("c", "/", "copy", b"content A", json.dumps(free_form)),
+        ]
+    )
+    con.execute("INSERT INTO object_integration_review (id, name, value, user_id, object_id) VALUES ('r', 'Bot', 'ok', 2, 'a')")
+    con.commit()
+    con.close()
+
+
+def test_migrations_of_a_baseline_database(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    baseline_database(path)
+    db = Database(path)
+    try:
+        db.initialize()
+    finally:
+        db.close()
+
+    con = sqlite3.connect(path)
+    latest = max(int(p.name.split("-")[0]) for p in SCHEMA_DIR.glob("*.sql"))
+    assert con.execute("SELECT MAX(id) FROM rr_db_version").fetchone()[0] == latest
+
+    # Contents moved to the blob store, identical ones stored once
+    rows = con.execute("SELECT id, raw, raw_hash, raw_size FROM object ORDER BY id").fetchall()
+    digest_a = hashlib.sha256(b"content A").hexdigest()
+    assert [(row[0], row[1], row[2], row[3]) for row in rows] == [
+        ("a", None, digest_a, 9),
+        ("b", None, hashlib.sha256(b"content B").hexdigest(), 9),
+        ("c", None, digest_a, 9),
+    ]
+    with blob_store.open(digest_a) as blob:
+        assert blob.read() == b"content A"
+
+    # Comments moved to their table, the free-form ones kept in the document
+    comments = con.execute("SELECT object_id, page, x, y, user_id, text, resolved, created_at FROM comment ORDER BY page").fetchall()
+    assert comments == [
+        ("a", 1, 10.0, 20.5, 2, "Fix the title", 1, "2023-11-14 22:13:20"),
+        ("a", 2, 1.0, 2.0, 2, "Typo", 0, "2023-11-14 22:13:21"),
+    ]
+    assert con.execute("SELECT comments FROM object WHERE id = 'a'").fetchone()[0] is None
+    assert con.execute("SELECT comments FROM object WHERE id = 'c'").fetchone()[0] is not None
+
+    # Folders built from the paths of the documents
+    folders = dict(con.execute("SELECT path, total_count FROM folder WHERE project_id = 1").fetchall())
+    assert folders == {"/": 3, "/reports": 2, "/reports/2024": 1}
+    assert con.execute("SELECT COUNT(*) FROM object_integration_review").fetchone()[0] == 1
+    con.close()
+
+    # A second start on the migrated database changes nothing
+    db = Database(path)
+    try:
+        db.initialize()
+        assert db.c.execute("SELECT COUNT(*) FROM comment").fetchone()[0] == 2
+        assert db.check_query_plans()
+    finally:
+        db.close()
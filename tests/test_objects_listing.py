@@ -0,0 +1,87 @@
+from conftest import upload
+
+
+def age_revision(db, project_id:int) -> None:
+    """ Move the last change of the project a few seconds back (Last-Modified is not sent within the same second) """
+    db.c.execute("UPDATE project SET revised_at = datetime('now', '-5 seconds') WHERE id = ?", (project_id,))
+    db.commit()
+
+
+def test_listing_validators(client, db, project_id):
+    object_id = upload(client, project_id)
+    url = f"/api/projects/{project_id}/objects"
+    age_revision(db, project_id)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    # If-None-Match takes precedence
+    assert client.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}).status_code == 200
+
+    assert client.put(f"/api/objects/{object_id}", json={"name": "renamed"}).status_code == 200
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+    response = client.get(url, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert "Last-Modified" not in response.headers  # Changed in the current second
+
+
+def test_listing_revision_ignores_other_columns(db, project_id, client):
+    object_id = upload(client, project_id)
+    revision = db.c.execute("SELECT revision FROM project WHERE id = ?", (project_id,)).fetchone()[0]
+    db.c.execute("UPDATE object SET raw = NULL WHERE id = ?", (object_id,))
+    assert db.c.execute("SELECT revision FROM project WHERE id = ?", (project_id,)).fetchone()[0] == revision
+    db.c.execute("UPDATE object SET status = 'Approved' WHERE id = ?", (object_id,))
+    assert db.c.execute("SELECT revision FROM project WHERE id = ?", (project_id,)).fetchone()[0] == revision + 1
+    db.commit()
+
+
+def list_all(client, url:str) -> list[dict]:
+    """ All the objects of a listing, following the cursors """
+    objects, cursor = [], None
+    for _ in range(20):
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200, response.json
+        objects += response.json["objects"]
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            return objects
+    raise AssertionError("Too many pages")
+
+
+def test_cursor_pagination(client, db, project_id):
+    names = ["delta", "alpha", "echo", "charlie", "bravo"]
+    ids = {name: upload(client, project_id, name=name, path="/a" if name < "c" else "/b") for name in names}
+    # Same update date for some objects: the id breaks the ties
+    db.c.execute("UPDATE object SET update_date = '2024-01-01 10:00:00' WHERE id IN (?, ?, ?)", (ids["alpha"], ids["echo"], ids["bravo"]))
+    db.commit()
+    url = f"/api/projects/{project_id}/objects?limit=2"
+
+    by_name = list_all(client, url + "&sort=name")
+    assert [obj["name"] for obj in by_name] == sorted(names)
+    by_name_desc = list_all(client, url + "&sort=-name&fields=name")
+    assert [obj["name"] for obj in by_name_desc] == sorted(names, reverse=True)
+    assert set(by_name_desc[0]) == {"id", "name"}
+
+    by_date = list_all(client, url + "&sort=-update_date")
+    assert sorted(obj["id"] for obj in by_date) == sorted(ids.values())
+    keys = [(obj["update_date"], obj["id"]) for obj in by_date]
+    assert keys == sorted(keys, reverse=True)
+
+    filtered = list_all(client, url + "&sort=name&path=/a")
+    assert [obj["name"] for obj in filtered] == ["alpha", "bravo"]
+
+
+def test_cursor_validation(client, project_id):
+    upload(client, project_id, name="one")
+    upload(client, project_id, name="two")
+    url = f"/api/projects/{project_id}/objects"
+    cursor = client.get(url + "?sort=name&limit=1").json["next_cursor"]
+    assert cursor is not None
+    assert client.get(url + f"?sort=name&limit=1&cursor={cursor}").json["objects"][0]["name"] == "two"
+    assert client.get(url + f"?sort=-update_date&cursor={cursor}").status_code == 400
+    assert client.get(url + "?cursor=not-a-cursor").status_code == 400
+    assert client.get(url + "?limit=0").status_code == 400
+    assert client.get(url + "?sort=size").status_code == 400
+    assert client.get(url + "?fields=raw").status_code == 400
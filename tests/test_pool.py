@@ -0,0 +1,50 @@
+import threading
+import pytest
+from app.database import Database
+from app.pool import ConnectionPool, PoolExhaustedError
+
+
+def test_nested_database_shares_the_transaction(db):
+    db.c.execute("CREATE TABLE IF NOT EXISTS pool_test (value TEXT)")
+    db.c.execute("INSERT INTO pool_test (value) VALUES ('outer')")
+    nested = Database()
+    try:
+        assert nested.c.connection is db.c.connection
+        assert nested.c.execute("SELECT COUNT(*) FROM pool_test WHERE value = 'outer'").fetchone()[0] == 1
+        nested.c.connection.rollback()  # Rolls back the changes of the outer instance too
+    finally:
+        nested.close()
+    assert db.c.execute("SELECT COUNT(*) FROM pool_test WHERE value = 'outer'").fetchone()[0] == 0
+
+
+def test_pool_timeout(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=0.1)
+    leased, done = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        connection = pool.acquire()
+        leased.set()
+        done.wait(5)
+        pool.release(connection)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    try:
+        assert leased.wait(5)
+        with pytest.raises(PoolExhaustedError):
+            pool.acquire()
+    finally:
+        done.set()
+        holder.join()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_exhausted_is_a_503(client, monkeypatch):
+    def exhausted(self):
+        raise PoolExhaustedError("No database connection available")
+
+    monkeypatch.setattr(ConnectionPool, "acquire", exhausted)
+    response = client.get("/api/projects")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"].isdigit()
+    assert "error" in response.json
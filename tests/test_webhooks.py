@@ -0,0 +1,246 @@
+import json
+import time
+from urllib.parse import urlencode
+import pytest
+from app import webhooks
+from app.cache import system_settings
+from app.config import USER_SYSTEM_ID, WEBHOOK_CIRCUIT_FAILURE_THRESHOLD, WEBHOOK_CIRCUIT_OPEN_SECONDS
+from app.models import Property, SystemProperty
+from app.webhooks import CircuitState, WebhookDispatcher, webhook_dispatcher
+from conftest import PDF, upload
+
+ADMIN_ID = USER_SYSTEM_ID + 1
+WEBHOOK_URL = "http://127.0.0.1:9/webhook"
+
+
+@pytest.fixture
+def webhook(client, db, monkeypatch):
+    """ Webhook of the admin, the deliveries are kept in the outbox (not sent) """
+    monkeypatch.setattr(webhook_dispatcher, "wake", lambda: None)
+    db.c.execute("INSERT INTO user_property (key, value, user_id) VALUES (?, ?, ?)", (Property.WEBHOOK_URL.value, WEBHOOK_URL, ADMIN_ID))
+    db.commit()
+    yield
+    db.c.execute("DELETE FROM webhook_delivery")
+    db.c.execute("DELETE FROM user_property WHERE user_id IN (?, ?) AND key LIKE 'WEBHOOK%'", (ADMIN_ID, USER_SYSTEM_ID))
+    db.commit()
+    system_settings.invalidate()
+
+
+def set_coalesce_seconds(db, seconds:int) -> None:
+    db.c.execute("INSERT INTO user_property (key, value, user_id) VALUES (?, ?, ?)", (SystemProperty.WEBHOOK_COALESCE_SECONDS.value, str(seconds), USER_SYSTEM_ID))
+    db.commit()
+    system_settings.invalidate()
+
+
+def subscribe(client, **filters) -> None:
+    response = client.put("/api/webhooks/subscription", json=filters)
+    assert response.status_code == 200, response.json
+
+
+def deliveries(db, event:str="object.updated") -> list[dict]:
+    rows = db.c.execute("SELECT payload FROM webhook_delivery WHERE event = ? ORDER BY id", (event,)).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def set_statuses(client, object_id:str, statuses:list[str]) -> None:
+    for status in statuses:
+        assert client.put(f"/api/objects/{object_id}", json={"status": status}).status_code == 200
+
+
+def test_status_changes_coalesced(client, db, project_id, webhook):
+    subscribe(client, events=["object.updated"])
+    set_coalesce_seconds(db, 60)
+    object_id = upload(client, project_id)
+    set_statuses(client, object_id, ["Pending Review", "Under Review", "Require Changes"])
+
+    payloads = deliveries(db)
+    assert len(payloads) == 1
+    assert payloads[0]["updated_fields"] == {"status": "Require Changes"}
+    assert [t["status"] for t in payloads[0]["transitions"]] == ["Pending Review", "Under Review", "Require Changes"]
+
+
+def test_status_changes_not_coalesced_without_window(client, db, project_id, webhook):
+    subscribe(client, events=["object.updated"])
+    object_id = upload(client, project_id)
+    set_statuses(client, object_id, ["Pending Review", "Approved"])
+    assert [[t["status"] for t in p["transitions"]] for p in deliveries(db)] == [["Pending Review"], ["Approved"]]
+
+
+def test_statuses_filter_applied_per_transition(client, db, project_id, webhook):
+    subscribe(client, events=["object.updated"], statuses=["Approved", "Require Changes"])
+    set_coalesce_seconds(db, 60)
+    object_id = upload(client, project_id)
+    set_statuses(client, object_id, ["Approved", "Under Review", "Require Changes", "Approved"])
+
+    # Each matching transition on its own, the other ones are not sent
+    payloads = deliveries(db)
+    assert [[t["status"] for t in p["transitions"]] for p in payloads] == [["Approved"], ["Require Changes"], ["Approved"]]
+    assert [p["updated_fields"]["status"] for p in payloads] == ["Approved", "Require Changes", "Approved"]
+
+
+def test_claimed_delivery_not_coalesced(client, db, project_id, webhook):
+    subscribe(client, events=["object.updated"])
+    set_coalesce_seconds(db, 60)
+    object_id = upload(client, project_id)
+    set_statuses(client, object_id, ["Pending Review"])
+    db.c.execute("UPDATE webhook_delivery SET attempts = 1")
+    db.commit()
+    set_statuses(client, object_id, ["Approved"])
+    assert [[t["status"] for t in p["transitions"]] for p in deliveries(db)] == [["Pending Review"], ["Approved"]]
+
+
+def test_subscription_filters(client, db, project_id, webhook):
+    other_project_id = client.post("/api/projects", json={"title": "Other"}).json["project_id"]
+    subscribe(client, events=["object.created", "comment.created"], project_ids=[project_id])
+    assert client.get("/api/webhooks/subscription").json["subscription"]["project_ids"] == [project_id]
+
+    object_id = upload(client, project_id)
+    upload(client, other_project_id)
+    set_statuses(client, object_id, ["Approved"])
+    client.post(f"/api/objects/{object_id}/comments", json={"page": 1, "x": 1, "y": 1, "text": "Hi"})
+
+    events = [row[0] for row in db.c.execute("SELECT event FROM webhook_delivery ORDER BY id").fetchall()]
+    assert events == ["object.created", "comment.created"]
+    assert all(p["project_id"] == project_id for p in deliveries(db, "object.created"))
+
+
+def test_statuses_filter_on_other_events(client, db, project_id, webhook):
+    subscribe(client, events=["comment.created"], statuses=["Approved"])
+    object_id = upload(client, project_id)
+    comment = {"page": 1, "x": 1, "y": 1, "text": "Hi"}
+    client.post(f"/api/objects/{object_id}/comments", json=comment)
+    set_statuses(client, object_id, ["Approved"])
+    client.post(f"/api/objects/{object_id}/comments", json=comment)
+    assert len(deliveries(db, "comment.created")) == 1
+
+
+@pytest.mark.parametrize("filters", [
+    {"events": []},
+    {"events": ["object.renamed"]},
+    {"project_ids": ["one"]},
+    {"project_ids": [True]},
+    {"statuses": ["Done"]},
+    {"fields": ["raw"]},
+    {"events": "object.updated"},
+])
+def test_subscription_filters_validation(client, filters):
+    assert client.put("/api/webhooks/subscription", json=filters).status_code == 400
+
+
+def test_content_url_needs_base_url(client, monkeypatch):
+    monkeypatch.setattr(webhooks, "BASE_URL", "")
+    assert client.put("/api/webhooks/subscription", json={"fields": ["name", "content_url"]}).status_code == 400
+    monkeypatch.setattr(webhooks, "BASE_URL", "https://review.example.com")
+    assert client.put("/api/webhooks/subscription", json={"fields": ["name", "content_url"]}).status_code == 200
+    assert client.put("/api/webhooks/subscription", json={}).status_code == 200
+
+
+def test_payload_with_signed_content_url(app, client, db, project_id, webhook, monkeypatch):
+    monkeypatch.setattr(webhooks, "BASE_URL", "https://review.example.com")
+    subscribe(client, events=["object.updated"], fields=["name", "content_url"])
+    object_id = upload(client, project_id, name="report")
+    set_statuses(client, object_id, ["Approved"])
+
+    payload = db.c.execute("SELECT payload FROM webhook_delivery WHERE event = 'object.updated'").fetchone()[0]
+    obj = json.loads(webhooks.sign_content_url(payload))["object"]
+    assert obj["name"] == "report"
+    assert obj["content_url"].startswith(f"https://review.example.com/api/objects/{object_id}/content/signed?")
+    response = app.test_client().get(obj["content_url"].removeprefix("https://review.example.com"))
+    assert response.status_code == 200
+    assert response.data == PDF
+
+
+def test_signed_content_url_tampered_or_expired(app, client, db, project_id):
+    object_id = upload(client, project_id)
+    content_hash = db.c.execute("SELECT raw_hash FROM object WHERE id = ?", (object_id,)).fetchone()[0]
+    anonymous = app.test_client()
+
+    def get(object_id:str, content_hash:str, expires:int, signature:str) -> int:
+        query = urlencode({"hash": content_hash, "expires": expires, "signature": signature})
+        return anonymous.get(f"/api/objects/{object_id}/content/signed?{query}").status_code
+
+    expires = int(time.time()) + 60
+    signature = webhooks.content_signature(object_id, content_hash, expires)
+    assert get(object_id, content_hash, expires, signature) == 200
+    assert get(object_id, content_hash, expires, "0" * len(signature)) == 403
+    assert get(object_id, content_hash, expires + 1, signature) == 403
+    assert get(object_id, "0" * len(content_hash), expires, signature) == 403
+    assert get(upload(client, project_id), content_hash, expires, signature) == 403
+    assert anonymous.get(f"/api/objects/{object_id}/content/signed?hash={content_hash}&signature={signature}").status_code == 403
+
+    expired = int(time.time()) - 1
+    assert get(object_id, content_hash, expired, webhooks.content_signature(object_id, content_hash, expired)) == 403
+    assert not webhooks.check_content_signature(object_id, content_hash, "-1", signature)
+
+    # Valid only for the content it was made for
+    db.c.execute("UPDATE object SET raw_hash = ? WHERE id = ?", ("f" * len(content_hash), object_id))
+    db.commit()
+    assert get(object_id, content_hash, expires, signature) == 410
+
+
+class RecordingExecutor:
+    """ Keeps the deliveries submitted by the dispatcher instead of sending them """
+    def __init__(self) -> None:
+        self.submitted = []
+
+    def submit(self, fn, *args) -> None:
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def endpoints(db):
+    yield
+    db.c.execute("DELETE FROM webhook_delivery")
+    db.c.execute("DELETE FROM webhook_endpoint")
+    db.commit()
+
+
+def endpoint_state(db, url:str) -> tuple:
+    return db.c.execute("SELECT state, consecutive_failures, trips FROM webhook_endpoint WHERE url = ?", (url,)).fetchone()
+
+
+def test_circuit_opens_after_consecutive_failures(app, db, endpoints):
+    dispatcher = WebhookDispatcher(workers=1)
+    for _ in range(WEBHOOK_CIRCUIT_FAILURE_THRESHOLD - 1):
+        assert dispatcher._save_health(db, WEBHOOK_URL, "HTTP 500", 10) is None
+    # A success resets the count
+    assert dispatcher._save_health(db, WEBHOOK_URL, None, 10) is None
+    assert endpoint_state(db, WEBHOOK_URL) == (CircuitState.CLOSED, 0, 0)
+
+    for _ in range(WEBHOOK_CIRCUIT_FAILURE_THRESHOLD - 1):
+        assert dispatcher._save_health(db, WEBHOOK_URL, "HTTP 500", 10) is None
+    assert dispatcher._save_health(db, WEBHOOK_URL, "HTTP 500", 10) == WEBHOOK_CIRCUIT_OPEN_SECONDS
+    assert endpoint_state(db, WEBHOOK_URL) == (CircuitState.OPEN, WEBHOOK_CIRCUIT_FAILURE_THRESHOLD, 1)
+
+    # A failed probe pauses the endpoint again, twice as long; a successful one closes the circuit
+    db.c.execute("UPDATE webhook_endpoint SET state = ? WHERE url = ?", (CircuitState.HALF_OPEN, WEBHOOK_URL))
+    assert dispatcher._save_health(db, WEBHOOK_URL, "timeout", 10) == WEBHOOK_CIRCUIT_OPEN_SECONDS * 2
+    db.c.execute("UPDATE webhook_endpoint SET state = ? WHERE url = ?", (CircuitState.HALF_OPEN, WEBHOOK_URL))
+    assert dispatcher._save_health(db, WEBHOOK_URL, None, 10) is None
+    assert endpoint_state(db, WEBHOOK_URL) == (CircuitState.CLOSED, 0, 0)
+    db.commit()
+
+
+def test_dispatch_skips_open_endpoints(app, db, endpoints):
+    paused_url = "http://127.0.0.1:9/paused"
+    for url in (paused_url, paused_url, WEBHOOK_URL):
+        webhooks.enqueue_webhook(db.c, ADMIN_ID, url, "object.updated", {"event": "object.updated"})
+    db.c.execute(
+        "INSERT INTO webhook_endpoint (url, state, trips, retry_at) VALUES (?, ?, 1, datetime('now', '+60 seconds'))",
+        (paused_url, CircuitState.OPEN)
+    )
+    db.commit()
+    dispatcher = WebhookDispatcher(workers=4)
+    dispatcher._executor = RecordingExecutor()
+
+    assert dispatcher.dispatch() == 1
+    assert [args[1] for args in dispatcher._executor.submitted] == [WEBHOOK_URL]
+
+    # Once the pause is over a single delivery is sent as a probe
+    db.c.execute("UPDATE webhook_endpoint SET retry_at = datetime('now', '-1 seconds') WHERE url = ?", (paused_url,))
+    db.commit()
+    dispatcher = WebhookDispatcher(workers=4)
+    dispatcher._executor = RecordingExecutor()
+    assert dispatcher.dispatch() == 1
+    assert [args[1] for args in dispatcher._executor.submitted] == [paused_url]
+    assert endpoint_state(db, paused_url)[0] == CircuitState.HALF_OPEN
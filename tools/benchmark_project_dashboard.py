@@ -0,0 +1,114 @@
+""" Benchmark of the project page data: the baseline loader (all the objects of the project, tree and recent
+    objects built in Python) against services.get_project_dashboard (indexed queries only).
+
+    Usage (from the repository root): python tools/benchmark_project_dashboard.py [--objects 10000 50000] [--runs 10]
+
+    Each size runs in a new database in a temporary directory, with random paths (up to 3 levels) and update dates """
+import os
+import sys
+import time
+import uuid
+import random
+import logging
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def build_object_tree(objects:list) -> dict:
+    """ Folder tree of the objects, as built by the project page before the folder table """
+    tree = {'root': {'_objects': []}}
+    for obj in objects:
+        path_parts = obj.path.strip('/').split('/')
+        current_level = tree['root']
+        if path_parts == ['']:
+            current_level['_objects'].append(obj)
+            continue
+        for part in path_parts:
+            if part not in current_level:
+                current_level[part] = {'_objects': []}
+            current_level = current_level[part]
+        current_level['_objects'].append(obj)
+    return tree
+
+
+def baseline_loader(db, project_id:int, user_id:int) -> tuple:
+    """ Project page data before the dashboard loader: project, role, all the objects, tree and the 5 recent ones """
+    from app.models import Object, Project, Role
+    from app.queries import OBJECT_COLUMNS
+    project = db.c.execute(
+        "SELECT p.id, p.title, p.deleted FROM project p INNER JOIN project_user pu ON p.id = pu.project_id WHERE pu.user_id = ? AND p.deleted = 0",
+        (user_id,)
+    ).fetchall()
+    role = db.c.execute("SELECT role FROM project_user WHERE project_id = ? AND user_id = ?", (project_id, user_id)).fetchone()
+    rows = db.c.execute(f"SELECT {OBJECT_COLUMNS} FROM object WHERE project_id = ? AND status IS NOT NULL", (project_id,)).fetchall()
+    objects = [Object.from_db_row(row) for row in rows]
+    tree = build_object_tree(objects)
+    recent = sorted(objects, key=lambda obj: obj.update_date, reverse=True)[:5]
+    return [Project.from_db_row(row) for row in project], Role(role[0]), tree, recent
+
+
+def populate(db, count:int) -> tuple[int, int]:
+    """ Project owned by the admin user with `count` objects, returns (project_id, user_id) """
+    from app.config import USER_SYSTEM_ID
+    from app.folders import rebuild_folders
+    user_id = USER_SYSTEM_ID + 1
+    db.c.execute("INSERT INTO project (title) VALUES (?)", ("Benchmark",))
+    project_id = db.c.lastrowid
+    db.c.execute("INSERT INTO project_user (project_id, user_id, role) VALUES (?, ?, ?)", (project_id, user_id, "Owner"))
+    folders = [f"/f{a}" for a in range(20)] + [f"/f{a}/s{b}" for a in range(20) for b in range(10)] + [f"/f{a}/s{b}/t{c}" for a in range(5) for b in range(5) for c in range(5)]
+    rows = []
+    for i in range(count):
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - random.randint(0, 3 * 365 * 86400)))
+        rows.append((str(uuid.uuid4()), random.choice(folders), user_id, project_id, f"document {i}", "", 1, "No Review", updated, updated))
+    db.c.executemany(
+        "INSERT INTO object (id, path, user_id, project_id, name, description, version, status, upload_date, update_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    rebuild_folders(db.c, project_id)
+    db.commit()
+    db.c.execute("ANALYZE")
+    return project_id, user_id
+
+
+def measure(loader, runs:int) -> float:
+    """ Median duration of the loader in milliseconds """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        loader()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark of the project page data loaders")
+    parser.add_argument("--objects", type=int, nargs="+", default=[10000, 50000], help="Sizes of the project to measure")
+    parser.add_argument("--runs", type=int, default=10, help="Runs of each loader (the median is reported)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("RR_DEFAULT_USER_PASSWORD", "benchmark")
+    from app.config import log
+    log.setLevel(logging.ERROR)  # Only the results
+    for count in args.objects:
+        with tempfile.TemporaryDirectory() as work:
+            os.chdir(work)
+            os.makedirs("database")
+            from app.database import Database
+            from app.services import get_project_dashboard
+            db = Database(os.path.join(work, "database", "roundreview.db"))
+            try:
+                db.initialize()
+                project_id, user_id = populate(db, count)
+                baseline = measure(lambda: baseline_loader(db, project_id, user_id), args.runs)
+                dashboard = measure(lambda: get_project_dashboard(db, project_id, user_id), args.runs)
+            finally:
+                db.close()
+        print(f"{count} objects: baseline {baseline:.1f} ms, dashboard {dashboard:.1f} ms ({baseline / dashboard:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
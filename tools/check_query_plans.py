@@ -0,0 +1,38 @@
+""" Query plan regression check: fails (exit code 1) if a query of Database.INDEXED_QUERIES, the SQL run by the
+    routes (see app/queries.py), falls back to a full table scan or sorts a top-N query without an index.
+
+    Usage (from the repository root): python tools/check_query_plans.py
+
+    The check runs on a new database with the latest schema, in a temporary directory """
+import os
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main() -> int:
+    os.environ.setdefault("RR_DEFAULT_USER_PASSWORD", "check")
+    from app.config import log
+    log.setLevel(logging.WARNING)  # The plans falling back to a scan are logged as warnings
+    with tempfile.TemporaryDirectory() as work:
+        os.chdir(work)
+        os.makedirs("database")
+        from app.database import Database
+        db = Database(os.path.join(work, "database", "roundreview.db"))
+        try:
+            db.initialize()
+            valid = db.check_query_plans()
+        finally:
+            db.close()
+    if not valid:
+        print("Query plan check failed: some hot queries fall back to a full table scan (see the warnings above)")
+        return 1
+    print(f"Query plan check passed: {len(Database.INDEXED_QUERIES)} queries resolved with indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())